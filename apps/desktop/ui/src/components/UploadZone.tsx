@@ -1,6 +1,6 @@
 import { useState, useRef, useCallback } from "react";
 import { Upload, FileAudio, FileVideo, Check, Loader2, AlertCircle } from "lucide-react";
-import { uploadSession } from "@/lib/api";
+import { uploadSession, waitForSessionReady } from "@/lib/api";
 
 type UploadState = "idle" | "dragging" | "uploading" | "success" | "error";
 type UploadedFile = {
@@ -48,7 +48,7 @@ const UploadZone = ({ onFileUploaded }: UploadZoneProps) => {
 
       try {
         // Real progress tracking - no fake timers
-        const response = await uploadSession(
+        const uploaded = await uploadSession(
           file, 
           file.name.replace(/\.[^/.]+$/, ""),
           (progress) => {
@@ -60,6 +60,10 @@ const UploadZone = ({ onFileUploaded }: UploadZoneProps) => {
           }
         );
 
+        // Audio is extracted after the upload returns; wait for it
+        setUploadingFile((prev) => (prev ? { ...prev, progress: 100, status: "processing" } : prev));
+        const response = uploaded.status === "ready" ? uploaded : await waitForSessionReady(uploaded.id);
+
         if (response.status === "ready") {
           const completedFile = { ...uploadedFile, progress: 100, status: "ready" as const };
           setUploadingFile(completedFile);
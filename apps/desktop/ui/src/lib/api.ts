@@ -35,17 +35,34 @@ export interface TranscriptionResponse {
   updated_at?: string;
 }
 
+// Sessions per page when listing (the backend allows up to 500)
+const SESSION_PAGE_SIZE = 200;
+
 /**
- * Fetch all sessions from the backend
+ * Fetch all sessions from the backend, newest first
+ *
+ * Follows the X-Next-Cursor header page by page.
  */
 export async function fetchSessions(): Promise<Session[]> {
-  const response = await fetch(`${API_BASE_URL}/sessions`);
-  
-  if (!response.ok) {
-    throw new Error(`Failed to fetch sessions: ${response.statusText}`);
-  }
-  
-  return response.json();
+  const sessions: Session[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const params = new URLSearchParams({ limit: String(SESSION_PAGE_SIZE) });
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
+    const response = await fetch(`${API_BASE_URL}/sessions/?${params}`);
+
+    if (!response.ok) {
+      throw new Error(`Failed to fetch sessions: ${response.statusText}`);
+    }
+
+    sessions.push(...(await response.json()));
+    cursor = response.headers.get("X-Next-Cursor");
+  } while (cursor);
+
+  return sessions;
 }
 
 /**
@@ -70,8 +87,9 @@ export async function uploadSession(
   onProgress?: (progress: number) => void
 ): Promise<Session> {
   const formData = new FormData();
-  formData.append("file", file);
+  // Fields before the file: the server reads them before streaming the file to disk
   formData.append("title", title);
+  formData.append("file", file);
   
   return new Promise((resolve, reject) => {
     const xhr = new XMLHttpRequest();
@@ -118,6 +136,20 @@ export async function uploadSession(
   });
 }
 
+/**
+ * Poll a session until background audio extraction has finished
+ * (uploads return as soon as the file is stored)
+ */
+export async function waitForSessionReady(id: string, intervalMs: number = 2000): Promise<Session> {
+  for (;;) {
+    const session = await fetchSessionById(id);
+    if (session.status === "ready" || session.status === "failed") {
+      return session;
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 /**
  * Delete a session and all associated files
  */
@@ -0,0 +1,145 @@
+"""
+Operational metrics routes.
+
+Read-only runtime counters for operators and capacity planning.
+"""
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session as DBSession
+
+from core.processing import get_processing_metrics
+from core.resilience import get_provider_metrics
+from core.job_ledger import get_ledger_summary
+from core.metadata import get_metadata_metrics
+from core.media_jobs import media_executor
+from core.clips import get_clip_metrics
+from core.db_metrics import get_database_metrics
+from core.session_cache import get_session_cache_metrics
+from core.lifecycle import lifecycle_manager
+from core.transcription_queue import transcription_queue
+from db.postgres.deps import get_db
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/processing")
+def processing_metrics():
+    """
+    Process pool metrics for CPU-bound transcript post-processing.
+    
+    Returns worker count, queue depth and per-task execution/wait timings.
+    """
+    return get_processing_metrics()
+
+
+@router.get("/provider")
+def provider_metrics():
+    """
+    Transcription provider resilience metrics.
+    
+    Returns circuit breaker state and retry counts per operation.
+    """
+    return get_provider_metrics()
+
+
+@router.get("/transcription")
+def transcription_metrics(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: DBSession = Depends(get_db)
+):
+    """
+    Aggregated transcription job ledger for capacity planning.
+    
+    Args:
+        since: Only include jobs queued at or after this time (ISO 8601)
+        until: Only include jobs queued before this time (ISO 8601)
+    
+    Returns p50/p90/p99 of processing seconds per audio minute, queue wait,
+    processing time, retries and per-stage wall time for completed jobs,
+    plus failure rates by audio duration bucket.
+    """
+    return get_ledger_summary(db, since=since, until=until)
+
+
+@router.get("/queue")
+def queue_metrics():
+    """
+    Transcription queue contents.
+    
+    Returns running jobs and queued jobs in the order workers will take them.
+    """
+    return transcription_queue.snapshot()
+
+
+@router.get("/metadata")
+def metadata_metrics():
+    """
+    Media metadata cache metrics.
+    
+    Returns cache size, memory/disk hits and how many probes were answered
+    from WAV headers versus ffprobe.
+    """
+    return get_metadata_metrics()
+
+
+@router.get("/media")
+def media_metrics():
+    """
+    FFmpeg/ffprobe executor state.
+    
+    Returns the concurrency limit, per-job thread and nice settings,
+    running jobs and queued jobs with their positions.
+    """
+    return media_executor.snapshot()
+
+
+@router.get("/clips")
+def clip_metrics():
+    """
+    Segment clip cache metrics.
+    
+    Returns cache size against its limit, hit/miss counters and evictions.
+    """
+    return get_clip_metrics()
+
+
+@router.get("/lifecycle")
+def lifecycle_metrics():
+    """
+    Storage lifecycle state for originals.
+    
+    Returns the configured action, last pass time and how many originals
+    were archived, moved to cold storage or deleted, plus bytes freed on
+    the hot volume.
+    """
+    return lifecycle_manager.snapshot()
+
+
+@router.get("/database")
+def database_metrics(top: int = Query(default=20, ge=1, le=500)):
+    """
+    PostgreSQL and MongoDB pool and query metrics.
+    
+    Args:
+        top: Statement/command shapes to list per pool, by total time
+    
+    Returns checkout wait, hold time and peak utilization per pool
+    (sync, async and MongoDB), the most expensive normalized statements,
+    per-route totals and the slow-query log.
+    """
+    return get_database_metrics(top=top)
+
+
+@router.get("/session-cache")
+def session_cache_metrics():
+    """
+    Session row cache metrics.
+    
+    Returns entries against the limit, hit/miss counters, invalidations
+    and whether the cross-process invalidation channel is connected.
+    """
+    return get_session_cache_metrics()
@@ -6,29 +6,57 @@ Keeps business logic minimal - this is data layer access only.
 """
 
 import json
+import base64
 import asyncio
-from typing import List
+import mimetypes
+from typing import Callable, List, Literal, Tuple
 from uuid import UUID
 from datetime import datetime
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session as DBSession
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
+from pymongo.errors import PyMongoError
 
-from db.postgres.models import Session
-from db.postgres.deps import get_db
+from db.postgres.models import Session, UploadSession, UploadPart
+from db.postgres.database import SessionLocal
+from db.postgres.deps import get_async_db
 from db.mongo.database import get_mongo_database
-from db.mongo.models import transcription_to_mongo_document
-from core.storage import get_original_file_path, get_audio_file_path
-from core.audio import extract_audio, get_audio_duration
-from core.transcription import transcribe_audio
+from db.mongo.models import LATEST_TRANSCRIPTION_SORT, completed_transcription_filter, render_transcription_json
+from core.storage import get_peaks_file_path, get_playback_file_path, link_or_copy
+from core.blobs import (
+    BLOB_KIND_ORIGINAL, BlobMissingError, blob_tier, ensure_local_copy, find_blob, hash_file, new_hasher, new_temp_path,
+    normalize_content_hash, reference_blob, release_blob, store_blob
+)
+from core.audio import is_streamable_upload, StreamingAudioExtractor
+from core.extraction import schedule_extraction
+from core.metadata import forget_media
+from core.upload_stream import FILE_DATA, FILE_END, FILE_START, StreamingUploadParser, UploadParseError
+from core.uploads import (
+    MAX_UPLOAD_SIZE, UploadError, allocate_upload_file, choose_part_size, hash_upload_file, part_count_for, part_range,
+    write_part
+)
+from core.config import settings
+from core.status import transcription_status, set_transcription_status, extraction_status, set_extraction_status, DEFAULT_POLL_SECONDS
+from core.transcription import TranscriptionError
+from core.transcription_queue import transcription_queue, PRIORITY_USER
+from core.processing import pack_segments, run_cpu_bound_async
+from core.resilience import sarvam_breaker
+from core.waveform import ensure_peaks_file
+from core.playback import ensure_playback_rendition, RenditionError, PLAYBACK_MEDIA_TYPE
+from core.clips import CLIP_FORMATS, ClipError, clip_cache, get_segment_clip
+from core.session_cache import get_cached_session
 
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
-# Global dict to store transcription status for active jobs
-transcription_status = {}
+# Largest page GET /sessions/ returns
+MAX_SESSION_PAGE_SIZE = 500
 
 
 # Pydantic schemas for request/response validation
@@ -54,6 +82,8 @@ class SessionResponse(BaseModel):
     file_size_bytes: int | None
     file_type: str | None
     audio_duration_seconds: int | None
+    audio_extraction_method: str | None = None
+    original_storage_tier: str | None = None
     status: str
     created_at: datetime
     
@@ -61,6 +91,40 @@ class SessionResponse(BaseModel):
         from_attributes = True
 
 
+class LocalIngestRequest(BaseModel):
+    """Schema for importing a file that is already on this machine"""
+    path: str
+    title: str | None = None  # Defaults to the file name
+
+
+class UploadCreate(BaseModel):
+    """Schema for starting a resumable upload"""
+    title: str
+    file_name: str
+    file_size: int
+    content_type: str | None = None
+    part_size: int | None = None  # Defaults to settings.UPLOAD_PART_SIZE
+    content_sha256: str | None = None  # Whole-file hash, verified on completion
+
+
+class UploadSessionResponse(BaseModel):
+    """Schema for resumable upload state"""
+    id: UUID
+    status: str
+    file_size_bytes: int
+    part_size: int
+    part_count: int
+    received_parts: List[int]
+    session_id: UUID | None
+
+
+class UploadPartResponse(BaseModel):
+    """Schema for a confirmed upload part"""
+    part_number: int
+    size_bytes: int
+    sha256: str
+
+
 class SessionUpdate(BaseModel):
     """Schema for updating a session"""
     title: str | None = None
@@ -86,11 +150,55 @@ class TranscriptionResponse(BaseModel):
     total_segments: int
 
 
+async def render_transcription_response(
+    session_id: UUID,
+    transcription_doc: dict,
+    include_metadata: bool = False
+) -> Response:
+    """
+    Build a JSON response for a stored transcription off the event loop.
+    
+    Segments are packed on a worker thread, then formatting and JSON
+    encoding run in the process pool; the handler only ships the bytes.
+    
+    Args:
+        session_id: Session UUID
+        transcription_doc: MongoDB transcription document
+        include_metadata: Include speaker_names and timestamps (full
+            /transcription payload) instead of the TranscriptionResponse shape
+    """
+    segments = transcription_doc.get("segments", [])
+    speaker_names = transcription_doc.get("speaker_names", {})
+    
+    header = {"session_id": str(session_id)}
+    segment_fields = tuple(TranscriptSegment.model_fields)
+    if include_metadata:
+        header.update(jsonable_encoder({
+            "speaker_names": speaker_names,
+            "created_at": transcription_doc.get("created_at"),
+            "updated_at": transcription_doc.get("updated_at")
+        }))
+        segment_fields = None
+    
+    # Packing walks every segment too: keep it off the event loop
+    packed = await asyncio.to_thread(pack_segments, segments, "speaker_id")
+    body = await run_cpu_bound_async(
+        "render_transcription",
+        render_transcription_json,
+        header,
+        packed,
+        speaker_names,
+        segment_fields,
+        size_hint=len(segments)
+    )
+    return Response(content=body, media_type="application/json")
+
+
 # Routes
 @router.post("/", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
-def create_session(
+async def create_session(
     session_data: SessionCreate,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new session.
@@ -99,39 +207,124 @@ def create_session(
     """
     db_session = Session(**session_data.model_dump())
     db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
+    await db.commit()
+    await db.refresh(db_session)
     return db_session
 
 
+def _encode_cursor(created_at: datetime, session_id: UUID) -> str:
+    """Opaque cursor pointing just past a session in (created_at, id) order."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(session_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["c"]), UUID(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _session_columns(fields: str | None) -> List:
+    """Columns for a fields= projection (id and created_at are always included)."""
+    if not fields:
+        names = list(SessionResponse.model_fields)
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in SessionResponse.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        names = ["id", "created_at"] + [name for name in names if name not in ("id", "created_at")]
+    return [getattr(Session, name) for name in names]
+
+
 @router.get("/", response_model=List[SessionResponse])
-def list_sessions(
-    skip: int = 0,
-    limit: int = 100,
-    db: DBSession = Depends(get_db)
+async def list_sessions(
+    request: Request,
+    limit: int = Query(100, ge=1, le=MAX_SESSION_PAGE_SIZE),
+    cursor: str | None = None,
+    order: Literal["desc", "asc"] = "desc",
+    status_filter: List[str] | None = Query(None, alias="status"),
+    session_type: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    fields: str | None = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List all sessions with pagination.
+    List sessions, newest first, one page at a time.
+    
+    Pages are keyset-paginated on (created_at, id): a page costs the
+    same however deep it is. When there are more sessions, the response
+    carries an X-Next-Cursor header (and a Link rel="next" header);
+    pass it back as cursor= for the next page.
     
     Args:
-        skip: Number of records to skip (default: 0)
         limit: Maximum records to return (default: 100)
+        cursor: X-Next-Cursor of the previous page
+        order: "desc" (newest first, default) or "asc"
+        status_filter: Only these statuses (?status=ready&status=uploaded)
+        session_type: Only this session type
+        created_after: Only sessions created at or after this time (ISO 8601)
+        created_before: Only sessions created before this time (ISO 8601)
+        fields: Comma-separated fields to return (e.g. "title,status");
+            id and created_at are always included
     """
-    sessions = db.query(Session).offset(skip).limit(limit).all()
-    return sessions
+    columns = _session_columns(fields)
+    query = select(*columns)
+    
+    if status_filter:
+        query = query.where(Session.status.in_(status_filter))
+    if session_type:
+        query = query.where(Session.session_type == session_type)
+    if created_after:
+        query = query.where(Session.created_at >= created_after)
+    if created_before:
+        query = query.where(Session.created_at < created_before)
+    
+    key = tuple_(Session.created_at, Session.id)
+    if cursor:
+        position = tuple_(*_decode_cursor(cursor))
+        query = query.where(key < position if order == "desc" else key > position)
+    if order == "desc":
+        query = query.order_by(Session.created_at.desc(), Session.id.desc())
+    else:
+        query = query.order_by(Session.created_at.asc(), Session.id.asc())
+    
+    # One extra row tells whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    
+    return JSONResponse(
+        content=jsonable_encoder([row._asdict() for row in rows]),
+        headers=headers
+    )
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
-def get_session(
+async def get_session(
     session_id: UUID,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific session by ID.
     
     Returns 404 if session not found.
     """
-    session = db.query(Session).filter(Session.id == session_id).first()
+    session = await get_cached_session(db, session_id)
     
     if not session:
         raise HTTPException(
@@ -143,17 +336,17 @@ def get_session(
 
 
 @router.patch("/{session_id}", response_model=SessionResponse)
-def update_session(
+async def update_session(
     session_id: UUID,
     session_data: SessionUpdate,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a session's fields.
     
     Only provided fields are updated (partial update).
     """
-    session = db.query(Session).filter(Session.id == session_id).first()
+    session = await db.get(Session, session_id)
     
     if not session:
         raise HTTPException(
@@ -166,145 +359,761 @@ def update_session(
     for key, value in update_data.items():
         setattr(session, key, value)
     
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 
-@router.post("/upload", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
+def _blob_call(func: Callable, *args):
+    """
+    Run a core.blobs function with its own sync database session.
+    
+    Blob functions serialize on a thread lock and move files, so routes
+    run them in a worker thread (asyncio.to_thread) rather than on the
+    event loop.
+    """
+    with SessionLocal() as sync_db:
+        return func(sync_db, *args)
+
+
+def _adopt_original(content_key: str, temp_original: Path | None, extension: str, known_original=None) -> Tuple[Path, str | None]:
+    """
+    Store an uploaded original as a blob, or reference the identical
+    one already stored (runs in a worker thread).
+    
+    Returns:
+        Tuple of (blob path, storage tier)
+    
+    Raises:
+        BlobMissingError: known_original was dropped meanwhile
+    """
+    with SessionLocal() as sync_db:
+        if known_original is not None:
+            path = reference_blob(sync_db, known_original)
+        else:
+            path = store_blob(sync_db, content_key, BLOB_KIND_ORIGINAL, temp_original, extension)
+        return path, blob_tier(sync_db, content_key)
+
+
+def _write_upload_chunk(buffer, hasher, chunk: bytes) -> None:
+    """Hash and write one batch of upload bytes (runs off the event loop)."""
+    hasher.update(chunk)
+    if buffer:
+        buffer.write(chunk)
+
+
+# The body is parsed by hand (see core/upload_stream.py); document the form for /docs
+_UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "title": {"type": "string", "description": "Session title (defaults to the file name)"},
+                        "content_sha256": {"type": "string", "description": "Hex sha256 of the file; send before the file"},
+                        "file": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/upload", response_model=SessionResponse, status_code=status.HTTP_202_ACCEPTED, openapi_extra=_UPLOAD_FORM_SCHEMA)
 async def upload_session_file(
-    file: UploadFile = File(...),
-    title: str = File(...),
-    db: DBSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Upload audio/video file and process it.
+    Upload audio/video file and start processing it.
     
     Flow:
-    1. Create session record with status='uploaded'
-    2. Save original file to storage/original/
-    3. Extract audio using FFmpeg
-    4. Save WAV to storage/audio/
-    5. Update session with paths and status='ready' or 'failed'
+    1. Parse the multipart stream as it arrives; create session record
+       with status='uploaded' when the file part starts
+    2. Hash the file bytes and write them straight to a temp file in the
+       blob store, off the event loop (streamable containers are piped
+       into FFmpeg at the same time)
+    3. Store it as a content-addressed blob - or, if identical content
+       was uploaded before, reference the existing blob instead
+    4. Return 202 with status='uploaded'; the extraction stage
+       (core/extraction.py) continues in the background through
+       'extracting' to 'ready' or 'failed' (poll /sessions/{id}/status)
     
-    Args:
+    Form fields:
         file: The uploaded audio/video file
-        title: Title for this session
+        title: Title for this session (defaults to the file name)
+        content_sha256: Optional hex sha256 of the file, sent before it.
+            When that content is already stored, the body is only
+            hashed to verify it and never written to disk (409 if the
+            stored copy is deleted before the upload finishes)
+    
+    Args:
+        request: Raw request (multipart/form-data body)
         db: Database session
     
     Returns:
-        Created session with all file paths populated
+        Created session with the original stored (status='uploaded')
     """
-    # Validate file was provided
-    if not file.filename:
+    # Stream file in 10MB batches to support 2-4 hour videos (5-20GB+)
+    CHUNK_SIZE = 10 * 1024 * 1024  # 10MB batches
+    
+    try:
+        parser = StreamingUploadParser(request.headers.get("content-type"), batch_size=CHUNK_SIZE)
+    except UploadParseError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No file provided"
+            detail=str(e)
         )
     
-    # Get file extension
-    file_extension = Path(file.filename).suffix
-    if not file_extension:
-        file_extension = ".bin"  # Fallback for files without extension
-    
-    # Create initial session record (size will be updated after streaming)
-    db_session = Session(
-        title=title,
-        status="uploaded",
-        file_name=file.filename,
-        file_size_bytes=0,  # Will be updated after streaming
-        file_type=file.content_type or "application/octet-stream"
-    )
-    db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
-    
-    session_id = str(db_session.id)
+    db_session: Session | None = None
+    session_id = ""
+    file_extension = ".bin"
     file_size = 0
+    extractor: StreamingAudioExtractor | None = None
+    hasher = new_hasher()
+    claimed_hash: str | None = None
+    known_original = None
+    temp_original: Path | None = None
+    buffer = None
+    temp_audio = new_temp_path(".wav")
     
     try:
-        # Save original file with STREAMING (not buffering entire file in RAM)
-        original_path = get_original_file_path(session_id, file_extension)
-        
-        # Stream file in 10MB chunks to support 2-4 hour videos (5-20GB+)
-        CHUNK_SIZE = 10 * 1024 * 1024  # 10MB chunks
-        MAX_FILE_SIZE = 20 * 1024 * 1024 * 1024  # 20GB limit (4-hour 1080p video)
-        
-        with open(original_path, "wb") as buffer:
-            while chunk := await file.read(CHUNK_SIZE):
+        async for event, payload in parser.parse(request.stream()):
+            if event == FILE_START:
+                # Validate file was provided
+                if not payload:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="No file provided"
+                    )
+                
+                # Get file extension
+                file_extension = Path(payload).suffix or ".bin"  # Fallback for files without extension
+                
+                # Create initial session record (size will be updated after streaming)
+                db_session = Session(
+                    title=parser.fields.get("title") or Path(payload).stem,
+                    status="uploaded",
+                    file_name=payload,
+                    file_size_bytes=0,  # Will be updated after streaming
+                    file_type=parser.file_content_type or "application/octet-stream"
+                )
+                db.add(db_session)
+                await db.commit()
+                await db.refresh(db_session)
+                session_id = str(db_session.id)
+                
+                # Known content: verify the hash while reading, but skip the disk write and streaming extraction
+                claimed_hash = normalize_content_hash(parser.fields.get("content_sha256"))
+                known_original = await asyncio.to_thread(_blob_call, find_blob, claimed_hash) if claimed_hash else None
+                if known_original is None:
+                    temp_original = new_temp_path(file_extension)
+                    buffer = open(temp_original, "wb")
+            
+            elif event == FILE_DATA:
+                chunk = payload
                 file_size += len(chunk)
                 
                 # Enforce file size limit to prevent disk exhaustion
-                if file_size > MAX_FILE_SIZE:
-                    # Clean up partial file
-                    buffer.close()
-                    if original_path.exists():
-                        original_path.unlink()
-                    
-                    db.delete(db_session)
-                    db.commit()
-                    
+                if file_size > MAX_UPLOAD_SIZE:
+                    # Partial files are removed below
                     raise HTTPException(
                         status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"File size exceeds maximum limit of {MAX_FILE_SIZE // (1024**3)}GB. Please upload a smaller file."
+                        detail=f"File size exceeds maximum limit of {MAX_UPLOAD_SIZE // (1024**3)}GB. Please upload a smaller file."
                     )
                 
-                buffer.write(chunk)
+                await asyncio.to_thread(_write_upload_chunk, buffer, hasher, chunk)
+                
+                # Streamable containers are extracted while the upload arrives
+                if buffer and file_size == len(chunk) and settings.STREAMING_EXTRACTION and is_streamable_upload(file_extension, chunk):
+                    extractor = StreamingAudioExtractor(temp_audio)
+                    if not await extractor.start():
+                        extractor = None
+                if extractor:
+                    await extractor.feed(chunk)
+                
+                step_message = "Uploading and extracting audio" if extractor else "Uploading"
+                set_extraction_status(session_id, "uploading", f"{step_message}: {file_size / (1024 * 1024):.0f} MB received", 0)
+            
+            elif event == FILE_END and buffer:
+                buffer.close()
         
-        # Update file size in database
-        db_session.file_size_bytes = file_size
+        if db_session is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No file provided"
+            )
         
-        # Update session with original file path
-        db_session.original_file_path = str(original_path)
-        db.commit()
+        content_key = hasher.hexdigest()
+        if known_original is not None and content_key != claimed_hash:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded content does not match content_sha256"
+            )
         
-        # Extract audio
-        audio_path = get_audio_file_path(session_id)
-        success, message = extract_audio(original_path, audio_path)
+        # Store the original (or reference the identical one already stored)
+        try:
+            original_path, storage_tier = await asyncio.to_thread(
+                _adopt_original, content_key, temp_original, file_extension, known_original
+            )
+        except BlobMissingError:
+            # The body was not kept, and the stored copy went away while it arrived
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stored content was deleted during the upload; upload again without content_sha256"
+            )
         
-        if success:
-            # Audio extraction successful
-            db_session.audio_file_path = str(audio_path)
-            
-            # Get audio duration
-            duration = get_audio_duration(audio_path)
-            if duration:
-                db_session.audio_duration_seconds = duration
-                db_session.duration_seconds = duration  # Also populate main duration field
-            
-            db_session.status = "ready"
-            db.commit()
-            db.refresh(db_session)
-            return db_session
-        else:
-            # Audio extraction failed
-            db_session.status = "failed"
-            db.commit()
-            db.refresh(db_session)
-            
+        # Update file size, title (if sent after the file) and original blob in database
+        db_session.title = parser.fields.get("title") or db_session.title
+        db_session.file_size_bytes = file_size
+        db_session.original_blob_key = content_key
+        db_session.original_file_path = str(original_path)
+        db_session.original_storage_tier = storage_tier
+        await db.commit()
+        await db.refresh(db_session)
+        
+        # The extraction stage owns the streaming extractor and its output from here
+        schedule_extraction(db_session.id, content_key, original_path, temp_audio, extractor)
+        extractor, temp_audio = None, None
+        return db_session
+    
+    except (HTTPException, UploadParseError, ClientDisconnect) as e:
+        # The upload itself was rejected or cut off: drop the session
+        if extractor:
+            await extractor.abort()
+        if db_session is not None and db_session.original_file_path is None:
+            await db.delete(db_session)
+            await db.commit()
+            extraction_status.pop(session_id, None)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e) or "Upload interrupted"
+        )
+    except Exception as e:
+        # Handle unexpected errors
+        if extractor:
+            await extractor.abort()
+        if db_session is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Audio extraction failed: {message}"
+                detail=f"File upload failed: {str(e)}"
             )
+        set_extraction_status(session_id, "failed", str(e), 0)
+        db_session.status = "failed"
+        await db.commit()
+        
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"File upload failed: {str(e)}"
+        )
+    finally:
+        # Temp files that were not adopted into the blob store
+        if buffer:
+            buffer.close()
+        if temp_original:
+            temp_original.unlink(missing_ok=True)
+        if temp_audio:
+            temp_audio.unlink(missing_ok=True)
+
+
+def _resolve_ingest_path(raw_path: str) -> Path:
+    """
+    Resolve a client-supplied path and check it lies under LOCAL_INGEST_ROOTS.
+    
+    Symlinks and ".." are resolved before the check, so neither can
+    escape the allowed roots.
+    
+    Raises:
+        HTTPException: 403 if ingest is disabled or the path is outside
+            the roots, 404 if it is not an existing regular file
+    """
+    roots = [Path(root.strip()).expanduser().resolve() for root in settings.LOCAL_INGEST_ROOTS.split(",") if root.strip()]
+    if not roots:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Local ingest is disabled (set LOCAL_INGEST_ROOTS)"
+        )
+    
+    path = Path(raw_path).expanduser()
+    if not path.is_absolute():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Path must be absolute"
+        )
+    path = path.resolve()
+    if not any(path.is_relative_to(root) for root in roots):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Path is outside the allowed ingest directories"
+        )
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File not found: {path}"
+        )
+    return path
+
+
+@router.post("/ingest", response_model=SessionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_local_file(
+    request: LocalIngestRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a session from a file on this machine, without an HTTP upload.
+    
+    For the desktop app, where the API runs next to the user's files.
+    The file is hashed in place; unless identical content is already
+    stored, it is brought into the blob store with a reflink clone or a
+    kernel-side copy - never streamed through the API. Never a hard link:
+    the user's file stays theirs to edit.
+    Audio is then extracted (or reused) in the background, as for uploads.
+    
+    Args:
+        request: Absolute path under LOCAL_INGEST_ROOTS, optional title
+        db: Database session
+    
+    Returns:
+        Created session with the original stored (status='uploaded')
+    """
+    source_path = _resolve_ingest_path(request.path)
+    file_extension = source_path.suffix or ".bin"
+    
+    db_session = Session(
+        title=request.title or source_path.stem,
+        status="uploaded",
+        file_name=source_path.name,
+        file_size_bytes=source_path.stat().st_size,
+        file_type=mimetypes.guess_type(source_path.name)[0] or "application/octet-stream"
+    )
+    db.add(db_session)
+    await db.commit()
+    await db.refresh(db_session)
+    
+    session_id = str(db_session.id)
+    temp_original: Path | None = None
+    
+    try:
+        set_extraction_status(session_id, "uploading", "Importing local file", 0)
+        content_key = await asyncio.to_thread(hash_file, source_path)
+        
+        # Store the original (or reference the identical one already stored)
+        known_original = await asyncio.to_thread(_blob_call, find_blob, content_key)
+        if known_original is not None:
+            try:
+                original_path, storage_tier = await asyncio.to_thread(
+                    _adopt_original, content_key, None, file_extension, known_original
+                )
+                print(f"📥 Ingest for {session_id}: content already stored")
+            except BlobMissingError:
+                # Dropped since the lookup: store our own copy below
+                known_original = None
+        if known_original is None:
+            # Clone or copy: a hard link would share later edits of the user's file
+            temp_original = new_temp_path(file_extension)
+            method = await asyncio.to_thread(link_or_copy, source_path, temp_original, True)
+            original_path, storage_tier = await asyncio.to_thread(
+                _adopt_original, content_key, temp_original, file_extension
+            )
+            print(f"📥 Ingest for {session_id}: {method} from {source_path}")
+        
+        db_session.original_blob_key = content_key
+        db_session.original_file_path = str(original_path)
+        db_session.original_storage_tier = storage_tier
+        await db.commit()
+        await db.refresh(db_session)
+        
+        schedule_extraction(db_session.id, content_key, original_path)
+        return db_session
     
     except HTTPException:
-        # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        # Handle unexpected errors
+        set_extraction_status(session_id, "failed", str(e), 0)
         db_session.status = "failed"
-        db.commit()
+        await db.commit()
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
+            detail=f"Local ingest failed: {str(e)}"
+        )
+    finally:
+        if temp_original:
+            temp_original.unlink(missing_ok=True)
+
+
+async def _get_upload(
+    db: AsyncSession,
+    upload_id: UUID,
+    for_update: bool = False,
+    for_part_write: bool = False
+) -> UploadSession:
+    """
+    Load an upload, optionally locking its row until the transaction ends.
+    
+    for_part_write takes FOR KEY SHARE, to record a received part:
+    parts are recorded in parallel with each other (and may still update
+    the row's non-key columns), but complete/abort (FOR UPDATE) wait for
+    a recording in progress.
+    """
+    query = select(UploadSession).where(UploadSession.id == upload_id)
+    if for_update:
+        query = query.with_for_update()
+    elif for_part_write:
+        query = query.with_for_update(read=True, key_share=True)
+    upload = (await db.execute(query)).scalar_one_or_none()
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Upload {upload_id} not found"
+        )
+    return upload
+
+
+async def _received_parts(db: AsyncSession, upload_id: UUID) -> List[int]:
+    rows = await db.scalars(
+        select(UploadPart.part_number).where(UploadPart.upload_id == upload_id).order_by(UploadPart.part_number)
+    )
+    return list(rows)
+
+
+async def _upload_response(db: AsyncSession, upload: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=upload.id,
+        status=upload.status,
+        file_size_bytes=upload.file_size_bytes,
+        part_size=upload.part_size,
+        part_count=upload.part_count,
+        received_parts=await _received_parts(db, upload.id),
+        session_id=upload.session_id
+    )
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    request: UploadCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start a resumable upload.
+    
+    Flow:
+    1. POST /sessions/uploads - returns the part layout
+    2. PUT /sessions/uploads/{id}/parts/{n} - parts 1..part_count, in any
+       order and in parallel, each with an X-Part-SHA256 header
+    3. POST /sessions/uploads/{id}/complete - creates the session
+    
+    After an interruption, GET /sessions/uploads/{id} lists the confirmed
+    parts; only the missing ones need to be sent again.
+    
+    Args:
+        request: File name, size and title (optionally part size and whole-file sha256)
+        db: Database session
+    
+    Returns:
+        Upload state with part size and count
+    """
+    if request.file_size <= 0 or request.file_size > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if request.file_size > 0 else status.HTTP_400_BAD_REQUEST,
+            detail=f"File size must be between 1 byte and {MAX_UPLOAD_SIZE // (1024**3)}GB"
+        )
+    content_sha256 = normalize_content_hash(request.content_sha256)
+    if request.content_sha256 and not content_sha256:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="content_sha256 must be a hex sha256 digest"
+        )
+    
+    part_size = choose_part_size(request.file_size, request.part_size)
+    temp_path = new_temp_path(Path(request.file_name).suffix or ".bin")
+    try:
+        await asyncio.to_thread(allocate_upload_file, temp_path, request.file_size)
+    except OSError as e:
+        temp_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+            detail=f"Could not allocate upload: {e}"
         )
+    
+    upload = UploadSession(
+        title=request.title,
+        file_name=request.file_name,
+        file_type=request.content_type or mimetypes.guess_type(request.file_name)[0] or "application/octet-stream",
+        file_size_bytes=request.file_size,
+        part_size=part_size,
+        part_count=part_count_for(request.file_size, part_size),
+        temp_path=str(temp_path),
+        content_sha256=content_sha256,
+        status="open"
+    )
+    db.add(upload)
+    await db.commit()
+    await db.refresh(upload)
+    return await _upload_response(db, upload)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(
+    upload_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a resumable upload's state, including the confirmed parts.
+    
+    Args:
+        upload_id: UUID of the upload
+        db: Database session
+    
+    Returns:
+        Upload state
+    """
+    return await _upload_response(db, await _get_upload(db, upload_id))
+
+
+@router.put("/uploads/{upload_id}/parts/{part_number}", response_model=UploadPartResponse)
+async def upload_part(
+    upload_id: UUID,
+    part_number: int,
+    request: Request,
+    part_sha256: str | None = Header(None, alias="X-Part-SHA256"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Receive one part (raw request body) and write it at its offset.
+    
+    Re-sending a part overwrites it, so retries are safe. No transaction
+    (or pooled connection) is held while the body arrives; the part is
+    recorded afterwards in a short transaction, and only while the upload
+    is still open - once completion has started it gets 409. Completion
+    re-hashes every part, so bytes that land after it started are caught.
+    
+    Args:
+        upload_id: UUID of the upload
+        part_number: 1-based part number
+        request: Raw request (body is the part's bytes)
+        part_sha256: Hex sha256 of the part
+        db: Database session
+    
+    Returns:
+        The confirmed part
+    """
+    expected_hash = normalize_content_hash(part_sha256)
+    if not expected_hash:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="X-Part-SHA256 header with the part's hex sha256 is required"
+        )
+    
+    upload = await _get_upload(db, upload_id)
+    if upload.status != "open":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {upload.status}"
+        )
+    if not 1 <= part_number <= upload.part_count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part number must be between 1 and {upload.part_count}"
+        )
+    offset, expected_size = part_range(upload.file_size_bytes, upload.part_size, part_number)
+    # Release the connection while the body arrives
+    await db.commit()
+    
+    try:
+        size, digest = await write_part(Path(upload.temp_path), offset, expected_size, request.stream())
+    except UploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except FileNotFoundError:
+        # Completed (file moved) or aborted while this part arrived
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is no longer open"
+        )
+    if digest != expected_hash:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part {part_number} checksum mismatch"
+        )
+    
+    upload = await _get_upload(db, upload_id, for_part_write=True)
+    if upload.status != "open":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {upload.status}"
+        )
+    now = datetime.utcnow()
+    statement = insert(UploadPart).values(
+        upload_id=upload.id, part_number=part_number, offset_bytes=offset,
+        size_bytes=size, sha256=digest, received_at=now
+    ).on_conflict_do_update(
+        index_elements=[UploadPart.upload_id, UploadPart.part_number],
+        set_={"sha256": digest, "received_at": now}
+    )
+    await db.execute(statement)
+    upload.updated_at = now
+    await db.commit()
+    
+    return UploadPartResponse(part_number=part_number, size_bytes=size, sha256=digest)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=SessionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def complete_upload(
+    upload_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Finish a resumable upload and create its session.
+    
+    The assembled file is hashed once and renamed into the blob store -
+    the parts are already in place. Each part is checked against the
+    sha256 recorded for it, so a part still being re-sent with other
+    bytes is reported (409) instead of stored. Audio is then extracted (or reused)
+    in the background, as for single-request uploads. Calling this again
+    after success returns the same session.
+    
+    Args:
+        upload_id: UUID of the upload
+        db: Database session
+    
+    Returns:
+        Created session with the original stored (status='uploaded')
+    """
+    upload = await _get_upload(db, upload_id, for_update=True)
+    if upload.status == "completed" and upload.session_id:
+        db_session = await db.get(Session, upload.session_id)
+        if db_session:
+            return db_session
+    if upload.status != "open":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {upload.status}"
+        )
+    
+    recorded = dict((await db.execute(
+        select(UploadPart.part_number, UploadPart.sha256).where(UploadPart.upload_id == upload.id)
+    )).all())
+    missing = [n for n in range(1, upload.part_count + 1) if n not in recorded]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{len(missing)} part(s) missing, first: {missing[:10]}"
+        )
+    
+    upload.status = "completing"
+    await db.commit()
+    
+    temp_original = Path(upload.temp_path)
+    try:
+        content_key, part_digests = await asyncio.to_thread(
+            hash_upload_file, temp_original, upload.file_size_bytes, upload.part_size
+        )
+    except Exception as e:
+        upload.status = "open"
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Upload completion failed: {str(e)}"
+        )
+    changed = [n for n, digest in enumerate(part_digests, start=1) if digest != recorded[n]]
+    if changed:
+        # A re-send with different bytes was still being written; the client resolves it
+        upload.status = "open"
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{len(changed)} part(s) changed during completion, re-send: {changed[:10]}"
+        )
+    if upload.content_sha256 and content_key != upload.content_sha256:
+        # Every part matched its own checksum, so the client's layout was wrong
+        upload.status = "aborted"
+        await db.commit()
+        temp_original.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded content does not match content_sha256"
+        )
+    
+    db_session = Session(
+        title=upload.title,
+        status="uploaded",
+        file_name=upload.file_name,
+        file_size_bytes=upload.file_size_bytes,
+        file_type=upload.file_type
+    )
+    db.add(db_session)
+    await db.commit()
+    await db.refresh(db_session)
+    
+    session_id = str(db_session.id)
+    try:
+        # Rename into the blob store (or drop it if identical content is stored)
+        original_path, storage_tier = await asyncio.to_thread(
+            _adopt_original, content_key, temp_original, temp_original.suffix
+        )
+        db_session.original_blob_key = content_key
+        db_session.original_file_path = str(original_path)
+        db_session.original_storage_tier = storage_tier
+        upload.status = "completed"
+        upload.session_id = db_session.id
+        upload.updated_at = datetime.utcnow()
+        await db.commit()
+        await db.refresh(db_session)
+        
+        schedule_extraction(db_session.id, content_key, original_path)
+        return db_session
+    
+    except Exception as e:
+        set_extraction_status(session_id, "failed", str(e), 0)
+        db_session.status = "failed"
+        await db.commit()
+        
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Upload completion failed: {str(e)}"
+        )
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Abandon a resumable upload and free its disk space.
+    
+    Args:
+        upload_id: UUID of the upload
+        db: Database session
+    
+    Returns:
+        204 No Content on success
+    """
+    upload = await _get_upload(db, upload_id, for_update=True)
+    if upload.status in ("completing", "completed"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is {upload.status}"
+        )
+    Path(upload.temp_path).unlink(missing_ok=True)
+    await db.delete(upload)
+    await db.commit()
+    return None
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: UUID,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a session and all associated files.
@@ -316,8 +1125,9 @@ async def delete_session(
     Returns:
         204 No Content on success
     """
-    # Get session
-    db_session = db.query(Session).filter(Session.id == session_id).first()
+    # Get session (locked, so a finishing extraction stage cannot set its
+    # audio blob between this read and the delete)
+    db_session = await db.get(Session, session_id, with_for_update=True)
     
     if not db_session:
         raise HTTPException(
@@ -325,9 +1135,13 @@ async def delete_session(
             detail=f"Session {session_id} not found"
         )
     
-    # Delete files from disk if they exist
-    if db_session.original_file_path:
+    # Shared blobs are released after the session row is gone (see below)
+    blob_keys = [key for key in (db_session.original_blob_key, db_session.audio_blob_key) if key]
+    
+    # Delete files from disk if they exist (sessions stored before blobs existed)
+    if db_session.original_file_path and not db_session.original_blob_key:
         original_path = Path(db_session.original_file_path)
+        forget_media(original_path)
         if original_path.exists():
             try:
                 original_path.unlink()
@@ -335,18 +1149,37 @@ async def delete_session(
                 # Log but don't fail - continue with deletion
                 print(f"Warning: Failed to delete original file: {e}")
     
-    if db_session.audio_file_path:
+    if db_session.audio_file_path and not db_session.audio_blob_key:
         audio_path = Path(db_session.audio_file_path)
+        forget_media(audio_path)
         if audio_path.exists():
             try:
                 audio_path.unlink()
             except Exception as e:
                 print(f"Warning: Failed to delete audio file: {e}")
     
+    get_peaks_file_path(str(session_id)).unlink(missing_ok=True)
+    get_playback_file_path(str(session_id)).unlink(missing_ok=True)
+    clip_cache.remove_session(str(session_id))
+    
     # Delete from database
-    db.delete(db_session)
-    db.commit()
+    await db.delete(db_session)
+    await db.commit()
     
+    # Drop this session's references; files go when no other session uses them
+    for key in blob_keys:
+        await asyncio.to_thread(_blob_call, release_blob, key)
+
+    # Delete the transcription (including any unfinished staging document)
+    try:
+        await asyncio.to_thread(
+            get_mongo_database().transcriptions.delete_many,
+            {"session_id": str(session_id)}
+        )
+    except PyMongoError as e:
+        # The session is gone either way; reconciliation removes the leftover
+        print(f"⚠️ Failed to delete transcription for {session_id}: {e}")
+
     return None
 
 
@@ -354,7 +1187,7 @@ async def delete_session(
 async def transcribe_session(
     session_id: UUID,
     regenerate: bool = False,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate transcription for a session using Sarvam AI Batch API with diarization.
@@ -362,8 +1195,9 @@ async def transcribe_session(
     This endpoint:
     1. Checks MongoDB for existing transcription (unless regenerate=True)
     2. If exists in MongoDB, returns cached transcription immediately
-    3. Otherwise, generates new transcription using Sarvam Batch API
-    4. Saves to MongoDB and returns only if save succeeds
+    3. Otherwise, queues a user-priority job (joining and promoting an eager
+       background job for this session if one is already queued or running)
+    4. Waits for the job to generate the transcription and save it to MongoDB
     5. If MongoDB save fails, raises 500 error
     
     For live progress updates, connect to GET /{session_id}/transcribe/status (SSE).
@@ -380,30 +1214,27 @@ async def transcribe_session(
         404: Session not found
         400: Session doesn't have audio file
         500: Transcription failed or MongoDB save failed
+        503: Provider circuit breaker is open and PROVIDER_CIRCUIT_OPEN_POLICY="fail" (see Retry-After)
     """
     # Check MongoDB for existing transcription first (unless regenerate=True)
     if not regenerate:
         try:
-            mongo_db = get_mongo_database()
-            existing = mongo_db.transcriptions.find_one({"session_id": str(session_id)})
+            existing = await asyncio.to_thread(
+                get_mongo_database().transcriptions.find_one,
+                completed_transcription_filter(str(session_id)),
+                sort=LATEST_TRANSCRIPTION_SORT
+            )
             
             if existing:
                 print(f"✅ Found cached transcription for {session_id} ({existing.get('total_segments', 0)} segments)")
                 
                 # Convert MongoDB document to response format
-                from db.mongo.models import get_transcription_response
-                response_data = get_transcription_response(existing)
-                
-                return TranscriptionResponse(
-                    session_id=session_id,
-                    segments=[TranscriptSegment(**seg) for seg in response_data["segments"]],
-                    total_segments=response_data["total_segments"]
-                )
+                return await render_transcription_response(session_id, existing)
         except Exception as e:
             print(f"⚠️ MongoDB lookup failed: {e}")
     
     # Get session from database
-    db_session = db.query(Session).filter(Session.id == session_id).first()
+    db_session = await get_cached_session(db, session_id)
     
     if not db_session:
         raise HTTPException(
@@ -420,93 +1251,250 @@ async def transcribe_session(
     
     audio_path = Path(db_session.audio_file_path)
     
-    if not audio_path.exists():
+    if not await ensure_local_copy(audio_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Audio file not found at: {audio_path}"
         )
     
-    # Initialize status tracking
-    status_key = str(session_id)
-    transcription_status[status_key] = {
-        "step": "starting",
-        "message": "Initializing transcription...",
-        "progress": 0
-    }
-    
-    # Status callback for transcription progress
-    def update_status(step: str, message: str, progress: int):
-        transcription_status[status_key] = {
-            "step": step,
-            "message": message,
-            "progress": progress
-        }
-        print(f"📊 [{session_id}] {step}: {message} ({progress}%)")
+    # Fail fast while the provider is in a brownout instead of queueing a doomed job
+    retry_after = sarvam_breaker.retry_after()
+    if retry_after > 0 and settings.PROVIDER_CIRCUIT_OPEN_POLICY == "fail":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Transcription provider is temporarily unavailable. Please retry shortly.",
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
     
-    # Call Sarvam AI Batch transcription service with status callback
-    success, message, segments = transcribe_audio(audio_path, status_callback=update_status)
+    # Queue at user priority (or join/promote a queued eager job for this session)
+    # and wait for the worker. Shielded so a client disconnect doesn't cancel a
+    # job other requests may be waiting on.
+    job = await transcription_queue.submit(session_id, priority=PRIORITY_USER, trigger="user")
     
-    if not success:
-        transcription_status[status_key] = {
-            "step": "failed",
-            "message": message,
-            "progress": 0
-        }
+    try:
+        total_segments = await asyncio.shield(job)
+        
+        print(f"✅ Saved transcription for session {session_id} to MongoDB ({total_segments} segments)")
+        
+    except PyMongoError as e:
+        print(f"❌ CRITICAL: Failed to save transcription to MongoDB: {e}")
+        set_transcription_status(str(session_id), "failed", f"Failed to save to database: {str(e)}", 0)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Transcription generated but failed to save to database: {str(e)}"
+        )
+    except Exception as e:
+        message = str(e) if isinstance(e, TranscriptionError) else f"Transcription failed: {str(e)}"
+        set_transcription_status(str(session_id), "failed", message, 0)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Transcription failed: {message}"
         )
     
-    # Save transcription to MongoDB - MUST succeed to return transcription
+    # Return transcript segments (only after successful MongoDB save)
+    transcription_doc = await asyncio.to_thread(
+        get_mongo_database().transcriptions.find_one,
+        completed_transcription_filter(str(session_id)),
+        sort=LATEST_TRANSCRIPTION_SORT
+    )
+    return await render_transcription_response(session_id, transcription_doc)
+
+
+@router.get("/{session_id}/waveform")
+async def get_waveform_peaks(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Download the session's waveform peak pyramid (binary, Range-capable).
+    
+    Built in the background after audio extraction; generated on demand
+    for older sessions. Clients read the 20-byte header and level table
+    first (Range: bytes=0-147 covers up to 8 levels), then fetch only the
+    level matching their zoom. See core/waveform.py for the layout.
+    
+    Returns:
+        application/octet-stream peaks file
+    """
+    db_session = await get_cached_session(db, session_id)
+    
+    if not db_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session {session_id} not found"
+        )
+    
+    if not db_session.audio_file_path or not await ensure_local_copy(Path(db_session.audio_file_path)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No audio file for this session. Upload and extract audio first."
+        )
+    
     try:
-        mongo_db = get_mongo_database()
-        transcription_doc = transcription_to_mongo_document(
-            session_id=str(session_id),
-            title=db_session.title,
-            segments=segments,
-            total_duration=float(db_session.audio_duration_seconds or 0)
+        peaks_path = await ensure_peaks_file(Path(db_session.audio_file_path), get_peaks_file_path(str(session_id)))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
         )
-        
-        # Insert or update transcription in MongoDB
-        result = mongo_db.transcriptions.replace_one(
-            {"session_id": str(session_id)},
-            transcription_doc,
-            upsert=True
+    
+    return FileResponse(
+        peaks_path,
+        media_type="application/octet-stream",
+        headers={"Cache-Control": "private, max-age=3600"}
+    )
+
+
+@router.get("/{session_id}/audio")
+async def get_playback_audio(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream session audio for playback (low-bitrate MP3, Range-capable).
+    
+    The rendition is generated on first request and cached. It is
+    constant bitrate, so players can seek to a transcript timestamp with
+    one Range request instead of downloading from the start.
+    
+    With PLAYBACK_ACCEL_REDIRECT_PREFIX set, the response is an
+    X-Accel-Redirect and nginx serves the file itself (sendfile, Range).
+    
+    Returns:
+        audio/mpeg (206 Partial Content for Range requests)
+    """
+    db_session = await get_cached_session(db, session_id)
+    
+    if not db_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session {session_id} not found"
         )
-        
-        print(f"✅ Saved transcription for session {session_id} to MongoDB ({len(segments)} segments)")
-        
-    except Exception as e:
-        print(f"❌ CRITICAL: Failed to save transcription to MongoDB: {e}")
-        transcription_status[status_key] = {
-            "step": "failed",
-            "message": f"Failed to save to database: {str(e)}",
-            "progress": 0
-        }
+    
+    if not db_session.audio_file_path or not await ensure_local_copy(Path(db_session.audio_file_path)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No audio file for this session. Upload and extract audio first."
+        )
+    
+    try:
+        rendition_path = await ensure_playback_rendition(
+            Path(db_session.audio_file_path),
+            get_playback_file_path(str(session_id))
+        )
+    except RenditionError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Transcription generated but failed to save to database: {str(e)}"
+            detail=f"Failed to prepare playback audio: {str(e)}"
         )
     
-    # Mark as completed
-    transcription_status[status_key] = {
-        "step": "completed",
-        "message": f"Transcription complete: {len(segments)} segments",
-        "progress": 100
-    }
+    if settings.PLAYBACK_ACCEL_REDIRECT_PREFIX:
+        return Response(
+            headers={
+                "X-Accel-Redirect": f"{settings.PLAYBACK_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{rendition_path.name}",
+                "Content-Type": PLAYBACK_MEDIA_TYPE
+            }
+        )
     
-    # Return transcript segments (only after successful MongoDB save)
-    return TranscriptionResponse(
-        session_id=session_id,
-        segments=[TranscriptSegment(**seg) for seg in segments],
-        total_segments=len(segments)
+    return FileResponse(
+        rendition_path,
+        media_type=PLAYBACK_MEDIA_TYPE,
+        headers={"Cache-Control": "private, max-age=3600"}
+    )
+
+
+@router.get("/{session_id}/segments/{index}/audio")
+async def get_segment_audio(
+    session_id: UUID,
+    index: int,
+    format: str = "wav",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Audio clip for one transcript segment.
+    
+    The clip is cut from the session WAV by byte range (no FFmpeg) using
+    the segment's start/end from MongoDB, optionally encoded to MP3, and
+    kept in an LRU disk cache - repeat plays are a static file serve.
+    
+    Args:
+        session_id: UUID of the session
+        index: 0-based position in the transcript (segment id N is index N-1)
+        format: "wav" (default) or "mp3"
+    
+    Returns:
+        audio/wav or audio/mpeg clip (Range-capable)
+    """
+    if format not in CLIP_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported clip format '{format}'. Use one of: {', '.join(CLIP_FORMATS)}"
+        )
+    if index < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Segment index must be >= 0"
+        )
+    
+    db_session = await get_cached_session(db, session_id)
+    
+    if not db_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session {session_id} not found"
+        )
+    
+    if not db_session.audio_file_path or not await ensure_local_copy(Path(db_session.audio_file_path)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No audio file for this session. Upload and extract audio first."
+        )
+    
+    # Fetch only the one segment
+    transcription_doc = await asyncio.to_thread(
+        get_mongo_database().transcriptions.find_one,
+        completed_transcription_filter(str(session_id)),
+        {"segments": {"$slice": [index, 1]}},
+        sort=LATEST_TRANSCRIPTION_SORT
+    )
+    if not transcription_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No transcription found for session {session_id}"
+        )
+    if not transcription_doc.get("segments"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Segment {index} not found"
+        )
+    
+    segment = transcription_doc["segments"][0]
+    try:
+        clip_path = await get_segment_clip(
+            str(session_id),
+            index,
+            Path(db_session.audio_file_path),
+            float(segment.get("start", 0.0)),
+            float(segment.get("end", 0.0)),
+            format
+        )
+    except ClipError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    return FileResponse(
+        clip_path,
+        media_type=CLIP_FORMATS[format],
+        headers={"Cache-Control": "private, max-age=3600"}
     )
 
 
 @router.get("/{session_id}/transcribe/status")
 async def transcribe_status_stream(
     session_id: UUID,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Stream live transcription status updates via Server-Sent Events (SSE).
@@ -526,7 +1514,64 @@ async def transcribe_status_stream(
     eventSource.addEventListener('error', () => eventSource.close());
     ```
     """
-    db_session = db.query(Session).filter(Session.id == session_id).first()
+    db_session = await get_cached_session(db, session_id)
+    
+    if not db_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session {session_id} not found"
+        )
+    
+    return _status_event_stream(
+        transcription_status,
+        str(session_id),
+        {"step": "waiting", "message": "Waiting for transcription to start...", "progress": 0}
+    )
+
+
+@router.get("/{session_id}/extraction/status")
+async def extraction_status_stream(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream live audio extraction progress via Server-Sent Events (SSE).
+    
+    Events carry FFmpeg progress as a percentage plus an ETA:
+    { step: "extracting", message: "Extracting audio: 12:00 of 3:58:10 (41.2x)",
+      progress: 5, eta_seconds: 340, poll_after_seconds: 30 }
+    The stream ends when extraction completes or fails.
+    """
+    db_session = await get_cached_session(db, session_id)
+    
+    if not db_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session {session_id} not found"
+        )
+    
+    return _status_event_stream(
+        extraction_status,
+        str(session_id),
+        {"step": "waiting", "message": "Waiting for extraction to start...", "progress": 0}
+    )
+
+
+@router.get("/{session_id}/status")
+async def get_session_status(
+    session_id: UUID,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Current processing status of a session, for clients that poll.
+    
+    Returns the session status plus the latest extraction and
+    transcription updates (null when nothing is running). The
+    Retry-After header suggests when to poll again - longer while a
+    long extraction still has a lot of time left.
+    """
+    db_session = await get_cached_session(db, session_id)
     
     if not db_session:
         raise HTTPException(
@@ -534,22 +1579,44 @@ async def transcribe_status_stream(
             detail=f"Session {session_id} not found"
         )
     
+    key = str(session_id)
+    extraction = extraction_status.get(key)
+    transcription = transcription_status.get(key)
+    
+    poll_after = (extraction or {}).get("poll_after_seconds")
+    if transcription and transcription.get("step") not in ("completed", "failed"):
+        poll_after = min(poll_after or DEFAULT_POLL_SECONDS, DEFAULT_POLL_SECONDS)
+    if poll_after:
+        response.headers["Retry-After"] = str(poll_after)
+    
+    return {
+        "session_id": key,
+        "status": db_session.status,
+        "extraction": extraction,
+        "transcription": transcription,
+    }
+
+
+def _status_event_stream(channel: dict, status_key: str, waiting_status: dict) -> StreamingResponse:
+    """
+    Stream a status channel entry as Server-Sent Events until it completes or fails.
+    
+    Args:
+        channel: Status dict from core.status (transcription_status, extraction_status)
+        status_key: Session UUID (as string)
+        waiting_status: Status sent until the job publishes its first update
+    """
     async def event_generator():
-        status_key = str(session_id)
         last_status = None
         
         while True:
             # Get current status
-            current_status = transcription_status.get(status_key, {
-                "step": "waiting",
-                "message": "Waiting for transcription to start...",
-                "progress": 0
-            })
+            current_status = channel.get(status_key, waiting_status)
             
             # Only send if status changed
             if current_status != last_status:
                 # Send SSE event
-                yield f"data: {json.dumps(current_status)}\\n\\n"
+                yield f"data: {json.dumps(current_status)}\n\n"
                 last_status = current_status
             
             # Check if completed or failed
@@ -560,8 +1627,8 @@ async def transcribe_status_stream(
             await asyncio.sleep(0.5)
         
         # Clean up status after completion
-        if status_key in transcription_status:
-            del transcription_status[status_key]
+        if status_key in channel:
+            del channel[status_key]
     
     return StreamingResponse(
         event_generator(),
@@ -584,7 +1651,7 @@ class SpeakerNamesUpdate(BaseModel):
 @router.get("/{session_id}/transcription")
 async def get_transcription(
     session_id: UUID,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get cached transcription from MongoDB with speaker names applied.
@@ -592,8 +1659,11 @@ async def get_transcription(
     Returns 404 if no transcription exists for this session.
     """
     try:
-        mongo_db = get_mongo_database()
-        transcription_doc = mongo_db.transcriptions.find_one({"session_id": str(session_id)})
+        transcription_doc = await asyncio.to_thread(
+            get_mongo_database().transcriptions.find_one,
+            completed_transcription_filter(str(session_id)),
+            sort=LATEST_TRANSCRIPTION_SORT
+        )
         
         if not transcription_doc:
             raise HTTPException(
@@ -602,17 +1672,7 @@ async def get_transcription(
             )
         
         # Convert to response format with speaker names applied
-        from db.mongo.models import get_transcription_response
-        response_data = get_transcription_response(transcription_doc)
-        
-        return {
-            "session_id": str(session_id),
-            "segments": response_data["segments"],
-            "total_segments": response_data["total_segments"],
-            "speaker_names": response_data["speaker_names"],
-            "created_at": response_data["created_at"],
-            "updated_at": response_data["updated_at"]
-        }
+        return await render_transcription_response(session_id, transcription_doc, include_metadata=True)
     
     except HTTPException:
         raise
@@ -627,7 +1687,7 @@ async def get_transcription(
 async def update_speaker_names(
     session_id: UUID,
     speaker_update: SpeakerNamesUpdate,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update speaker names globally for a session.
@@ -644,20 +1704,21 @@ async def update_speaker_names(
     }
     """
     try:
-        mongo_db = get_mongo_database()
-        
         # Update speaker_names and updated_at timestamp
-        result = mongo_db.transcriptions.update_one(
-            {"session_id": str(session_id)},
+        result = await asyncio.to_thread(
+            get_mongo_database().transcriptions.find_one_and_update,
+            completed_transcription_filter(str(session_id)),
             {
                 "$set": {
                     "speaker_names": speaker_update.speaker_names,
                     "updated_at": datetime.utcnow()
                 }
-            }
+            },
+            projection={"_id": 1},
+            sort=LATEST_TRANSCRIPTION_SORT
         )
         
-        if result.matched_count == 0:
+        if result is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No transcription found for session {session_id}"
@@ -685,7 +1746,7 @@ async def update_segment_speaker(
     session_id: UUID,
     segment_index: int,
     new_speaker: str,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update the speaker for a specific segment.
@@ -699,20 +1760,21 @@ async def update_segment_speaker(
     PUT /sessions/{session_id}/segments/3/speaker?new_speaker=Speaker_2
     """
     try:
-        mongo_db = get_mongo_database()
-        
         # Update specific segment's speaker_id
-        result = mongo_db.transcriptions.update_one(
-            {"session_id": str(session_id)},
+        result = await asyncio.to_thread(
+            get_mongo_database().transcriptions.find_one_and_update,
+            completed_transcription_filter(str(session_id)),
             {
                 "$set": {
                     f"segments.{segment_index}.speaker_id": new_speaker,
                     "updated_at": datetime.utcnow()
                 }
-            }
+            },
+            projection={"_id": 1},
+            sort=LATEST_TRANSCRIPTION_SORT
         )
         
-        if result.matched_count == 0:
+        if result is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No transcription found for session {session_id}"
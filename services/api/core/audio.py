@@ -3,17 +3,52 @@ Audio extraction service using FFmpeg.
 
 Extracts audio from video files and converts to WAV format
 optimized for future transcription (16kHz mono PCM).
+
+Uploads in streamable containers are extracted while they arrive
+(StreamingAudioExtractor); everything else is extracted from the saved
+original once the upload finishes (extract_audio), which skips FFmpeg
+entirely or avoids resampling when the input is already speech-ready.
 """
 
+import asyncio
+import struct
 import subprocess
-import json
+import time
 from pathlib import Path
-from typing import Tuple
+from typing import Callable, Tuple
+
+from core.media_jobs import MediaJob, media_executor
+from core.metadata import MediaInfo, probe_media, probe_wav_head
+from core.storage import link_or_copy
+
+
+# Containers FFmpeg can demux from a pipe without seeking
+STREAMABLE_EXTENSIONS = {
+    ".mp3", ".wav", ".flac", ".ogg", ".oga", ".opus", ".aac", ".ac3",
+    ".webm", ".mkv", ".mka", ".ts", ".mts", ".m2ts", ".mpg", ".mpeg", ".flv", ".avi",
+}
+
+# ISO-BMFF containers: streamable only when the moov atom precedes the media data
+ISO_BMFF_EXTENSIONS = {".mp4", ".m4a", ".m4v", ".mov", ".3gp"}
+
+# Canonical transcription audio format
+TARGET_CODEC = "pcm_s16le"
+TARGET_SAMPLE_RATE = 16000
+TARGET_CHANNELS = 1
+
+# FFmpeg timeout for full-file extraction (queue time not included)
+EXTRACTION_TIMEOUT = 1800  # 30 minutes
+
+# How much of the stderr tail to keep for error messages
+FFMPEG_ERROR_TAIL = 500
 
 
 def get_audio_duration(file_path: Path) -> int | None:
     """
-    Get audio duration in seconds using ffprobe.
+    Get audio duration in seconds.
+    
+    Reads WAV headers natively and falls back to ffprobe for other
+    containers; results are cached (see core.metadata).
     
     Args:
         file_path: Path to audio file
@@ -21,82 +56,379 @@ def get_audio_duration(file_path: Path) -> int | None:
     Returns:
         Duration in seconds (rounded to int) or None if failed
     """
-    try:
-        command = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "json",
-            str(file_path)
-        ]
+    info = probe_media(file_path)
+    if info is None or not info.duration:
+        return None
+    return int(info.duration)
+
+
+def wav_output_args(output_path: Path) -> list:
+    """FFmpeg output options for the canonical transcription WAV."""
+    return [
+        "-vn",                                  # No video
+        "-acodec", TARGET_CODEC,                # PCM 16-bit little-endian
+        "-ar", str(TARGET_SAMPLE_RATE),         # Sample rate: 16kHz
+        "-ac", str(TARGET_CHANNELS),            # Mono channel
+        "-y",                                   # Overwrite output file
+        str(output_path)                        # Output file
+    ]
+
+
+def is_speech_ready(info: MediaInfo | None) -> bool:
+    """True if the audio already is 16 kHz mono 16-bit PCM."""
+    return (
+        info is not None
+        and info.audio_codec == TARGET_CODEC
+        and info.sample_rate == TARGET_SAMPLE_RATE
+        and info.channels == TARGET_CHANNELS
+    )
+
+
+def choose_extraction_method(info: MediaInfo | None) -> str:
+    """
+    Pick the cheapest way to turn an input into the canonical WAV.
+    
+    Args:
+        info: Probed input metadata (None if probing failed)
+    
+    Returns:
+        "link" (already the canonical WAV), "remux" (canonical PCM in
+        another container), "decode" (16 kHz mono in another codec) or
+        "transcode" (everything else)
+    """
+    if info is None:
+        return "transcode"
+    if is_speech_ready(info):
+        return "link" if info.format_name == "wav" and not info.has_video else "remux"
+    if info.sample_rate == TARGET_SAMPLE_RATE and info.channels == TARGET_CHANNELS:
+        return "decode"
+    return "transcode"
+
+
+def _extract_command(input_path: Path, output_path: Path, method: str = "transcode") -> list:
+    """FFmpeg command for the chosen extraction method."""
+    if method == "remux":
+        # Copy the PCM stream into a WAV container - no decoding at all
+        return ["ffmpeg", "-i", str(input_path), "-map", "0:a:0", "-vn", "-c:a", "copy", "-y", str(output_path)]
+    if method == "decode":
+        # Already 16 kHz mono - decode to PCM without resampling or downmixing
+        return ["ffmpeg", "-i", str(input_path), "-map", "0:a:0", "-vn", "-acodec", TARGET_CODEC, "-y", str(output_path)]
+    return [
+        "ffmpeg",
+        "-i", str(input_path),      # Input file
+        *wav_output_args(output_path)
+    ]
+
+
+def _extraction_result(result: subprocess.CompletedProcess, method: str) -> Tuple[bool, str, str]:
+    if result.returncode == 0:
+        return True, "Audio extracted successfully", method
+    error_msg = result.stderr[-FFMPEG_ERROR_TAIL:] if result.stderr else "Unknown FFmpeg error"
+    return False, f"FFmpeg failed: {error_msg}", method
+
+
+def _format_clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ExtractionProgress:
+    """
+    Turns FFmpeg -progress blocks into percentage/ETA status updates.
+    
+    out_time is compared against the probed duration of the input. The
+    ETA divides the remaining media time by FFmpeg's reported speed
+    (media seconds per wall second), falling back to the rate observed
+    since the first progress block.
+    """
+    
+    def __init__(self, duration: float | None, status_callback: Callable):
+        self.duration = duration
+        self.status_callback = status_callback
+        self._first: Tuple[float, float] | None = None  # (wall clock, out_time) of the first block
+    
+    def _rate(self, out_time: float, speed: str) -> float:
+        try:
+            return float(speed.rstrip("x"))
+        except ValueError:
+            pass
+        now = time.monotonic()
+        started, base = self._first
+        return (out_time - base) / (now - started) if now > started else 0.0
+    
+    def __call__(self, block: dict) -> None:
+        if block.get("progress") == "end":
+            return
         
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        out_time_us = block.get("out_time_us", "")
+        if not out_time_us.isdigit() or not self.duration:
+            self.status_callback("extracting", "Extracting audio...", 0, None)
+            return
         
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            duration = data.get("format", {}).get("duration")
-            if duration:
-                return int(float(duration))
-        return None
+        out_time = int(out_time_us) / 1_000_000
+        if self._first is None:
+            self._first = (time.monotonic(), out_time)
         
-    except Exception:
-        return None
+        speed = block.get("speed", "").strip()
+        rate = self._rate(out_time, speed)
+        eta = max(0.0, self.duration - out_time) / rate if rate > 0 else None
+        percent = min(99, int(out_time / self.duration * 100))
+        
+        message = f"Extracting audio: {_format_clock(out_time)} of {_format_clock(self.duration)}"
+        if speed and speed != "N/A":
+            message += f" ({speed})"
+        self.status_callback("extracting", message, percent, eta)
+
+
+def _plan_extraction(input_path: Path, status_callback: Callable | None) -> Tuple[str, ExtractionProgress | None]:
+    """Probe the input once and pick the method and progress reporter."""
+    info = probe_media(input_path)
+    method = choose_extraction_method(info)
+    if status_callback is None or method == "link":
+        return method, None
+    status_callback("queued", "Waiting for a media worker...", 0, None)
+    return method, ExtractionProgress(info.duration if info else None, status_callback)
+
+
+def _link_audio(input_path: Path, output_path: Path) -> Tuple[bool, str, str]:
+    method = link_or_copy(input_path, output_path)
+    return True, "Input is already 16kHz mono PCM WAV, no extraction needed", method
 
 
-def extract_audio(input_path: Path, output_path: Path) -> Tuple[bool, str]:
+def _extraction_error(error: Exception, method: str) -> Tuple[bool, str, str]:
+    if isinstance(error, subprocess.TimeoutExpired):
+        return False, "Audio extraction timed out (>30 minutes)", method
+    if isinstance(error, FileNotFoundError):
+        return False, "FFmpeg not installed or not in PATH", method
+    return False, f"Unexpected error during audio extraction: {str(error)}", method
+
+
+def extract_audio(input_path: Path, output_path: Path, status_callback: Callable | None = None) -> Tuple[bool, str, str]:
     """
     Extract audio from video/audio file and convert to WAV.
     
-    Uses FFmpeg to:
-    - Extract audio stream from any video/audio format
-    - Convert to WAV format
-    - Resample to 16kHz (optimal for speech recognition)
-    - Convert to mono channel
-    - Use PCM codec
+    Inspects the input once and takes the cheapest path:
+    - Already 16kHz mono PCM WAV: hard link / reflink / copy, no FFmpeg
+    - 16kHz mono PCM in another container: stream copy into WAV (remux)
+    - 16kHz mono in another codec (e.g. FLAC): decode only
+    - Anything else: FFmpeg extracts the audio stream, resamples to 16kHz
+      (optimal for speech recognition), downmixes to mono, PCM codec
+    
+    Blocking (waits for a media executor slot, then for FFmpeg) - use
+    extract_audio_async from request handlers.
     
     Args:
         input_path: Path to the original uploaded file
         output_path: Path where WAV file should be saved
+        status_callback: Optional callback (step, message, progress, eta_seconds)
+            fed from FFmpeg's progress output
     
     Returns:
-        Tuple of (success: bool, message: str)
+        Tuple of (success: bool, message: str, method: str) where method is
+        "hardlink", "reflink", "copy", "remux", "decode" or "transcode"
     """
+    method = "transcode"
     try:
-        # FFmpeg command for audio extraction and conversion
-        command = [
-            "ffmpeg",
-            "-i", str(input_path),      # Input file
-            "-vn",                       # No video
-            "-acodec", "pcm_s16le",      # PCM 16-bit little-endian
-            "-ar", "16000",              # Sample rate: 16kHz
-            "-ac", "1",                  # Mono channel
-            "-y",                        # Overwrite output file
-            str(output_path)             # Output file
-        ]
-        
-        # Run FFmpeg with extended timeout for 2-4 hour videos
+        method, on_progress = _plan_extraction(input_path, status_callback)
+        if method == "link":
+            return _link_audio(input_path, output_path)
+        # Extended timeout for 2-4 hour videos
         # Processing time: ~5-15 minutes for 4-hour 1080p video
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            timeout=1800  # 30 minute timeout (was 5 minutes)
+        result = media_executor.run(
+            f"extract_audio:{method}",
+            _extract_command(input_path, output_path, method),
+            timeout=EXTRACTION_TIMEOUT,
+            on_progress=on_progress
         )
-        
-        if result.returncode == 0:
-            return True, "Audio extracted successfully"
-        else:
-            error_msg = result.stderr[-500:] if result.stderr else "Unknown FFmpeg error"
-            return False, f"FFmpeg failed: {error_msg}"
-            
-    except subprocess.TimeoutExpired:
-        return False, "Audio extraction timed out (>30 minutes)"
-    except FileNotFoundError:
-        return False, "FFmpeg not installed or not in PATH"
+        return _extraction_result(result, method)
     except Exception as e:
-        return False, f"Unexpected error during audio extraction: {str(e)}"
+        return _extraction_error(e, method)
+
+
+async def extract_audio_async(input_path: Path, output_path: Path, status_callback: Callable | None = None) -> Tuple[bool, str, str]:
+    """
+    Async variant of extract_audio.
+    
+    Queues for a media executor slot without blocking the event loop,
+    so one large upload does not stall other requests.
+    """
+    method = "transcode"
+    try:
+        method, on_progress = await asyncio.to_thread(_plan_extraction, input_path, status_callback)
+        if method == "link":
+            return await asyncio.to_thread(_link_audio, input_path, output_path)
+        result = await media_executor.run_async(
+            f"extract_audio:{method}",
+            _extract_command(input_path, output_path, method),
+            timeout=EXTRACTION_TIMEOUT,
+            on_progress=on_progress
+        )
+        return _extraction_result(result, method)
+    except Exception as e:
+        return _extraction_error(e, method)
+
+
+def _moov_before_mdat(head: bytes) -> bool:
+    """
+    Walk the top-level ISO-BMFF boxes in the first bytes of a file.
+
+    Returns True only if a moov box is found before any mdat box, i.e.
+    the file was written "fast start" and can be demuxed from a pipe.
+    """
+    offset = 0
+    while offset + 8 <= len(head):
+        size, box_type = struct.unpack(">I4s", head[offset:offset + 8])
+        if box_type == b"moov":
+            return True
+        if box_type == b"mdat":
+            return False
+        if size == 1:
+            if offset + 16 > len(head):
+                return False
+            size = struct.unpack(">Q", head[offset + 8:offset + 16])[0]
+        if size < 8:
+            # size 0 = box runs to end of file, anything else is corrupt
+            return False
+        offset += size
+    return False
+
+
+def is_streamable_upload(extension: str, head: bytes) -> bool:
+    """
+    Decide whether an upload can be extracted while it is still arriving.
+
+    Args:
+        extension: Original file extension (e.g. ".mp4")
+        head: First chunk of the upload
+
+    Returns:
+        True if FFmpeg can read the container sequentially from stdin and
+        the input actually needs transcoding
+    """
+    extension = extension.lower()
+    if is_speech_ready(probe_wav_head(head)):
+        # Already the canonical WAV - linking it afterwards beats re-encoding
+        return False
+    if extension in STREAMABLE_EXTENSIONS:
+        return True
+    if extension in ISO_BMFF_EXTENSIONS:
+        return _moov_before_mdat(head)
+    return False
+
+
+class StreamingAudioExtractor:
+    """
+    Extract audio from an upload while it streams in.
+
+    Upload chunks are teed into an FFmpeg process's stdin as they are
+    written to disk, so the WAV is ready about when the upload finishes
+    instead of after a second full pass over the original.
+
+    Usage:
+        extractor = StreamingAudioExtractor(audio_path)
+        if await extractor.start():
+            await extractor.feed(chunk)       # for every chunk
+            success, message = await extractor.finish()
+        # on failure, fall back to extract_audio_async(original_path, audio_path)
+
+    A failure never interrupts the upload itself: once FFmpeg dies, feed()
+    becomes a no-op and finish() reports the error.
+
+    The process holds a media executor slot for the whole upload, so it
+    only starts when a slot is free right now - otherwise the upload is
+    extracted afterwards through the normal queue.
+    """
+
+    def __init__(self, output_path: Path):
+        self.output_path = output_path
+        self.failed = False
+        self._process: asyncio.subprocess.Process | None = None
+        self._stderr_task: asyncio.Task | None = None
+        self._stderr_tail = b""
+        self._slot: MediaJob | None = None
+
+    async def start(self) -> bool:
+        """Start FFmpeg. Returns False if no slot is free or it could not be launched."""
+        self._slot = media_executor.try_acquire("stream_extract")
+        if self._slot is None:
+            return False
+        command = media_executor.prepare_command([
+            "ffmpeg",
+            "-v", "error",
+            "-i", "pipe:0",
+            *wav_output_args(self.output_path)
+        ])
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except (FileNotFoundError, OSError) as e:
+            print(f"⚠️ Streaming extraction unavailable: {e}")
+            self._release(failed=True)
+            return False
+        media_executor.lower_priority(self._process.pid)
+        # Drain stderr concurrently so a chatty FFmpeg never blocks on a full pipe
+        self._stderr_task = asyncio.create_task(self._read_stderr())
+        return True
+
+    async def _read_stderr(self) -> None:
+        while chunk := await self._process.stderr.read(4096):
+            self._stderr_tail = (self._stderr_tail + chunk)[-FFMPEG_ERROR_TAIL:]
+
+    async def feed(self, chunk: bytes) -> None:
+        """Send an upload chunk to FFmpeg (no-op once it has failed)."""
+        if self.failed or self._process is None:
+            return
+        try:
+            self._process.stdin.write(chunk)
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # FFmpeg exited early (unreadable stream) - finish() reports why
+            self.failed = True
+
+    def _release(self, failed: bool) -> None:
+        if self._slot is not None:
+            media_executor.release(self._slot, failed=failed)
+            self._slot = None
+
+    async def finish(self, timeout: float = 300) -> Tuple[bool, str]:
+        """
+        Close stdin and wait for FFmpeg to write the rest of the WAV.
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self._process is None:
+            return False, "Streaming extraction was not started"
+        try:
+            if not self._process.stdin.is_closing():
+                self._process.stdin.close()
+            await asyncio.wait_for(self._process.wait(), timeout=timeout)
+            await self._stderr_task
+        except asyncio.TimeoutError:
+            await self.abort()
+            return False, "Streaming audio extraction timed out"
+        except (BrokenPipeError, ConnectionResetError):
+            await self._process.wait()
+
+        if self._process.returncode == 0 and not self.failed:
+            self._release(failed=False)
+            return True, "Audio extracted while uploading"
+        self._release(failed=True)
+        error_msg = self._stderr_tail.decode(errors="replace") or "Unknown FFmpeg error"
+        return False, f"FFmpeg failed: {error_msg}"
+
+    async def abort(self) -> None:
+        """Kill FFmpeg and remove any partial output."""
+        if self._process is not None and self._process.returncode is None:
+            self._process.stdin.close()
+            self._process.kill()
+            await self._process.wait()
+        if self._stderr_task is not None:
+            self._stderr_task.cancel()
+        self._release(failed=True)
+        self.output_path.unlink(missing_ok=True)
@@ -0,0 +1,488 @@
+"""
+Content-addressed blob store for originals and extracted audio.
+
+Uploads are hashed (sha256) while they stream to a temp file under
+storage/blobs/tmp/; the finished file is then moved to
+storage/blobs/original/<key[:2]>/<key><ext>. An upload whose hash is
+already stored is discarded instead, and its session points at the
+existing blob.
+
+The WAV extracted from an original is stored as a derived blob keyed
+by the original's hash plus the extraction recipe, so a repeat upload
+also reuses the audio and never runs FFmpeg.
+
+Each blob row (storage_blobs) counts the sessions referencing it; the
+file is deleted when the last reference is released. Changes to a blob
+lock its key in PostgreSQL (advisory lock plus row lock), so API
+workers on other processes or nodes never adopt a blob that is being
+dropped. Once its audio
+is extracted, an original may be moved to a cheaper tier by
+core/lifecycle.py (retier_blob); the row's location then overrides the
+default path.
+
+With a remote object store (core/object_store.py), the files under
+storage/blobs/ are a node-local cache: new blobs are uploaded in the
+background, and ensure_local_copy() downloads a blob this node does
+not have before it is read.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session as DBSession
+
+from core.audio import TARGET_CHANNELS, TARGET_SAMPLE_RATE
+from core.metadata import forget_media
+from core.object_store import ObjectNotFoundError, get_object_store
+from core.storage import BLOB_TMP_DIR, BLOBS_DIR, get_blob_path
+from db.postgres.models import Session, StorageBlob
+
+
+BLOB_KIND_ORIGINAL = "original"
+BLOB_KIND_AUDIO = "audio"
+
+# Identifies how derived audio was produced; bump it when the extraction
+# output changes so old WAVs are not reused for new uploads
+AUDIO_RECIPE = f"pcm16-{TARGET_SAMPLE_RATE // 1000}k-{TARGET_CHANNELS}ch"
+
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+# Read size when hashing a file that is already on disk
+_HASH_CHUNK = 8 * 1024 * 1024
+
+# Serializes file moves/deletes with their ref count updates within this
+# process (other processes are excluded by _lock_blob)
+_lock = threading.Lock()
+
+# Background uploads/deletes against a remote object store
+_transfers = ThreadPoolExecutor(max_workers=2, thread_name_prefix="blob-transfer")
+
+# Downloads in flight, keyed by local path (single flight)
+_downloads: Dict[str, asyncio.Task] = {}
+
+
+class BlobMissingError(Exception):
+    """Raised when a blob to reference was dropped (or lost its file) meanwhile."""
+
+
+def new_hasher():
+    """Hash object used for upload content keys."""
+    return hashlib.sha256()
+
+
+def hash_file(path: Path) -> str:
+    """
+    Content key of a file on disk (blocking; run it in a thread).
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex sha256 digest
+    """
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def normalize_content_hash(value: str | None) -> str | None:
+    """
+    Validate a client-supplied content hash.
+
+    Args:
+        value: Hex sha256 of the upload, as sent by the client
+
+    Returns:
+        Lowercase hex digest, or None if missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip().lower()
+    return value if _SHA256_HEX.match(value) else None
+
+
+def audio_blob_key(original_key: str) -> str:
+    """Key of the WAV derived from an original blob."""
+    return f"{original_key}.{AUDIO_RECIPE}"
+
+
+def blob_file_path(blob: StorageBlob) -> Path:
+    if blob.location:
+        return Path(blob.location)
+    return get_blob_path(blob.kind, blob.key, blob.extension)
+
+
+def blob_tier(db: DBSession, key: str) -> str | None:
+    """Storage tier of a blob ("hot", "archived", "cold", "deleted"), None if unknown."""
+    blob = db.get(StorageBlob, key)
+    return blob.tier if blob is not None else None
+
+
+def blob_object_key(kind: str, key: str, extension: str) -> str:
+    """Object store key of a blob, e.g. "original/<sha256>.mp4"."""
+    return f"{kind}/{key}{extension}"
+
+
+def _object_key_for_path(path: Path) -> str | None:
+    """Object key of a local blob path (storage/blobs/<kind>/<shard>/<name>)."""
+    try:
+        parts = path.relative_to(BLOBS_DIR).parts
+    except ValueError:
+        return None
+    return f"{parts[0]}/{parts[2]}" if len(parts) == 3 else None
+
+
+def _upload_remote(object_key: str, path: Path) -> None:
+    try:
+        get_object_store().put_file(object_key, path)
+        print(f"🪣 Uploaded blob {object_key}")
+    except Exception as e:
+        # The local copy stays authoritative until a later upload succeeds
+        print(f"⚠️ Failed to upload blob {object_key}: {e}")
+
+
+def _delete_remote(object_key: str) -> None:
+    try:
+        get_object_store().delete(object_key)
+    except Exception as e:
+        print(f"⚠️ Failed to delete remote blob {object_key}: {e}")
+
+
+def new_temp_path(extension: str = "") -> Path:
+    """
+    Temp path for a file that may become a blob.
+
+    Lives inside the blob store so adopting it is a rename on the same
+    filesystem. The extension is kept so FFmpeg can infer the format.
+    """
+    BLOB_TMP_DIR.mkdir(parents=True, exist_ok=True)
+    return BLOB_TMP_DIR / f"{uuid.uuid4().hex}{extension}"
+
+
+def find_blob(db: DBSession, key: str) -> StorageBlob | None:
+    """
+    Look up a blob whose file is present on disk.
+
+    Args:
+        db: Database session
+        key: Blob key
+
+    Returns:
+        The blob row, or None if unknown or its file has gone missing
+        (locally and, with a remote store, remotely)
+    """
+    blob = db.get(StorageBlob, key)
+    if blob is None or not _blob_present(blob):
+        return None
+    return blob
+
+
+def _blob_present(blob: StorageBlob) -> bool:
+    """Whether a blob's file exists locally or, with a remote store, remotely."""
+    if blob_file_path(blob).exists():
+        return True
+
+    store = get_object_store()
+    if store.remote:
+        try:
+            return store.exists(blob_object_key(blob.kind, blob.key, blob.extension))
+        except Exception as e:
+            print(f"⚠️ Object store lookup failed for {blob.key}: {e}")
+    return False
+
+
+def _lock_blob(db: DBSession, key: str) -> StorageBlob | None:
+    """
+    Lock a blob key until the transaction ends, and load its row.
+
+    The advisory lock also covers keys with no row yet (two workers
+    storing the same new content); the row lock keeps lifecycle
+    re-tiering out.
+
+    Returns:
+        The current blob row, or None if there is none
+    """
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"), {"key": key})
+    return (
+        db.query(StorageBlob)
+        .filter(StorageBlob.key == key)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+
+
+def _add_reference(db: DBSession, key: str, kind: str, extension: str, size_bytes: int, placed: bool = False) -> None:
+    """
+    Insert the blob row, or bump its ref count if it exists (one statement, race-free).
+
+    placed: a new file was just put at the default blob path (e.g. the
+    same content uploaded again after lifecycle deleted it), so the row
+    is pointed back at it as a hot blob.
+    """
+    now = datetime.utcnow()
+    statement = insert(StorageBlob).values(
+        key=key, kind=kind, extension=extension, size_bytes=size_bytes,
+        ref_count=1, created_at=now, last_referenced_at=now
+    )
+    updates = {"ref_count": StorageBlob.ref_count + 1, "last_referenced_at": now}
+    if placed:
+        updates.update(extension=extension, size_bytes=size_bytes, tier="hot", location=None, tiered_at=None)
+    statement = statement.on_conflict_do_update(
+        index_elements=[StorageBlob.key],
+        set_=updates
+    )
+    db.execute(statement)
+    db.commit()
+
+
+def store_blob(db: DBSession, key: str, kind: str, temp_path: Path, extension: str = "") -> Path:
+    """
+    Move a finished temp file into the store and take a reference to it.
+
+    If the blob already exists, the temp file is discarded and the
+    existing file is referenced instead.
+
+    Args:
+        db: Database session
+        key: Blob key (sha256 for originals, audio_blob_key() for audio)
+        kind: BLOB_KIND_ORIGINAL or BLOB_KIND_AUDIO
+        temp_path: File to adopt (from new_temp_path)
+        extension: Extension to store a new blob with
+
+    Returns:
+        Path of the blob file
+    """
+    with _lock:
+        existing = _lock_blob(db, key)
+        if existing is not None and not _blob_present(existing):
+            existing = None
+        if existing is not None:
+            temp_path.unlink(missing_ok=True)
+            path = blob_file_path(existing)
+            _add_reference(db, key, kind, existing.extension, existing.size_bytes)
+            return path
+
+        path = get_blob_path(kind, key, extension)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, path)
+        _add_reference(db, key, kind, extension, path.stat().st_size, placed=True)
+
+    if get_object_store().remote:
+        _transfers.submit(_upload_remote, blob_object_key(kind, key, extension), path)
+    return path
+
+
+def reference_blob(db: DBSession, blob: StorageBlob) -> Path:
+    """
+    Take another reference to an existing blob (a repeat upload).
+
+    The blob may have been released by its last session, or re-tiered,
+    since find_blob returned it (an upload can take minutes); it is
+    checked again under its lock.
+
+    Args:
+        db: Database session
+        blob: Blob returned by find_blob
+
+    Returns:
+        Path of the blob file
+
+    Raises:
+        BlobMissingError: The blob or its file is gone
+    """
+    with _lock:
+        current = _lock_blob(db, blob.key)
+        if current is None or not _blob_present(current):
+            db.rollback()
+            raise BlobMissingError(f"Blob {blob.key} is no longer stored")
+        path = blob_file_path(current)
+        _add_reference(db, current.key, current.kind, current.extension, current.size_bytes)
+    return path
+
+
+def retier_blob(
+    db: DBSession,
+    key: str,
+    tier: str,
+    new_path: Path | None,
+    extension: str | None = None,
+    last_referenced_at: datetime | None = None
+) -> bool:
+    """
+    Point a hot blob, and every session referencing it, at a new tier.
+
+    The replacement file (if any) must already be in place; the old
+    file is removed afterwards. Nothing changes if the blob was released,
+    re-tiered or (given last_referenced_at) referenced again meanwhile -
+    the caller's new file is then removed.
+
+    Args:
+        db: Database session
+        key: Blob key
+        tier: New tier ("archived", "cold" or "deleted")
+        new_path: File now holding the blob, or None if it was dropped
+        extension: New extension when the format changed (archival transcode)
+        last_referenced_at: The blob's last_referenced_at when it was selected
+
+    Returns:
+        True if the blob was re-tiered
+    """
+    with _lock:
+        blob = _lock_blob(db, key)
+        if (
+            blob is None
+            or blob.tier != "hot"
+            or (last_referenced_at is not None and blob.last_referenced_at != last_referenced_at)
+        ):
+            current = blob_file_path(blob) if blob is not None else None
+            db.rollback()
+            if new_path is not None and new_path != current:
+                new_path.unlink(missing_ok=True)
+            return False
+
+        old_path = blob_file_path(blob)
+        if extension is not None:
+            blob.extension = extension
+        default_path = get_blob_path(blob.kind, blob.key, blob.extension)
+        blob.location = str(new_path) if new_path is not None and new_path != default_path else None
+        blob.size_bytes = new_path.stat().st_size if new_path is not None else 0
+        blob.tier = tier
+        blob.tiered_at = datetime.utcnow()
+
+        if blob.kind == BLOB_KIND_ORIGINAL:
+            db.query(Session).filter(Session.original_blob_key == key).update(
+                {
+                    Session.original_file_path: str(new_path) if new_path is not None else None,
+                    Session.original_storage_tier: tier,
+                },
+                synchronize_session=False
+            )
+        db.commit()
+
+    if old_path != new_path:
+        forget_media(old_path)
+        old_path.unlink(missing_ok=True)
+    return True
+
+
+def _drop_blob(db: DBSession, blob: StorageBlob) -> str:
+    """Delete a blob row and its file (lock held). Returns its object key."""
+    path = blob_file_path(blob)
+    object_key = blob_object_key(blob.kind, blob.key, blob.extension)
+    db.delete(blob)
+    db.commit()
+    forget_media(path)
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"⚠️ Failed to delete blob {blob.key}: {e}")
+    return object_key
+
+
+def release_blob(db: DBSession, key: str) -> None:
+    """
+    Drop one reference; deletes the blob row and file at zero.
+
+    Args:
+        db: Database session
+        key: Blob key
+    """
+    with _lock:
+        blob = _lock_blob(db, key)
+        if blob is None:
+            return
+        blob.ref_count -= 1
+        if blob.ref_count > 0:
+            db.commit()
+            return
+        object_key = _drop_blob(db, blob)
+    if get_object_store().remote:
+        _transfers.submit(_delete_remote, object_key)
+    print(f"🗑️ Deleted unreferenced blob {key}")
+
+
+def reset_blob_references(db: DBSession, key: str, references: int) -> None:
+    """
+    Set a blob's ref count to the number of sessions actually using it.
+
+    Used by reconciliation (core/reconcile.py) when the counter drifted,
+    e.g. after a crash between deleting a session and releasing its
+    blobs. A blob with no references is deleted like in release_blob.
+
+    Args:
+        db: Database session
+        key: Blob key
+        references: Sessions referencing the blob
+    """
+    with _lock:
+        blob = _lock_blob(db, key)
+        if blob is None:
+            return
+        if references > 0:
+            blob.ref_count = references
+            db.commit()
+            return
+        object_key = _drop_blob(db, blob)
+    if get_object_store().remote:
+        _transfers.submit(_delete_remote, object_key)
+    print(f"🗑️ Deleted unreferenced blob {key}")
+
+
+def fetch_local_copy(path: Path) -> bool:
+    """
+    Make sure a session file is on this node's disk (blocking).
+
+    Blob files missing locally are downloaded from a remote object
+    store; other paths are only checked for existence.
+
+    Args:
+        path: Session original/audio path
+
+    Returns:
+        True if the file now exists locally
+    """
+    if path.exists():
+        return True
+    object_key = _object_key_for_path(path)
+    if object_key is None or not get_object_store().remote:
+        return False
+    try:
+        get_object_store().download(object_key, path)
+    except ObjectNotFoundError:
+        return False
+    print(f"🪣 Fetched blob {object_key} from the object store")
+    return True
+
+
+async def ensure_local_copy(path: Path) -> bool:
+    """
+    Async fetch_local_copy(); concurrent callers share one download.
+
+    Args:
+        path: Session original/audio path
+
+    Returns:
+        True if the file now exists locally
+    """
+    if path.exists():
+        return True
+    task_key = str(path)
+    task = _downloads.get(task_key)
+    if task is None:
+        task = asyncio.create_task(asyncio.to_thread(fetch_local_copy, path))
+        _downloads[task_key] = task
+        task.add_done_callback(lambda _: _downloads.pop(task_key, None))
+    return await asyncio.shield(task)
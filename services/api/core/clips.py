@@ -0,0 +1,290 @@
+"""
+Per-segment audio clips with a size-bounded LRU disk cache.
+
+A transcript segment's audio is cut straight out of the session WAV by
+byte range: the PCM offsets follow from the header, and the samples are
+copied in the kernel (copy_file_range) behind a fresh 44-byte header.
+No FFmpeg is involved unless the client asks for an encoded (MP3) clip.
+
+Clips are cached under storage/clips/ and evicted least-recently-used
+once the cache exceeds settings.CLIP_CACHE_MAX_BYTES, so repeat plays
+are served like static files.
+"""
+
+import asyncio
+import os
+import struct
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict
+
+from core.config import settings
+from core.media_jobs import media_executor
+from core.metadata import probe_wav
+from core.storage import CLIPS_DIR
+
+
+# Supported clip formats -> media type
+CLIP_FORMATS = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+}
+
+# FFmpeg timeout for encoding one clip
+CLIP_ENCODE_TIMEOUT = 120
+
+# Copy size per copy_file_range / read-write step
+_COPY_CHUNK = 8 * 1024 * 1024
+
+
+class ClipError(Exception):
+    """Raised when a clip cannot be produced."""
+
+
+class ClipCache:
+    """
+    LRU index over the files in CLIPS_DIR, bounded by total size.
+
+    The index is rebuilt from the directory (oldest access first) on first
+    use, so the cache survives restarts; hits bump the file's mtime to
+    keep that order across restarts too. Leftover .tmp files from an
+    interrupted write are removed while indexing.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._loaded = False
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self) -> None:
+        """Index existing clips, least recently used first (lock held)."""
+        if self._loaded:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix == ".tmp":
+                path.unlink(missing_ok=True)
+            elif path.suffix in (".wav", ".mp3"):
+                stat = path.stat()
+                files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._bytes += size
+        self._loaded = True
+
+    def lookup(self, name: str) -> Path | None:
+        """Return a cached clip and mark it most recently used."""
+        with self._lock:
+            self._load()
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+        path = self.directory / name
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(name)
+            return None
+        return path
+
+    def add(self, name: str) -> None:
+        """Register a newly written clip and evict down to the size limit."""
+        path = self.directory / name
+        size = path.stat().st_size
+        with self._lock:
+            self._load()
+            self._forget(name)
+            self._entries[name] = size
+            self._bytes += size
+            # Never evict the clip that is about to be served
+            while self._bytes > settings.CLIP_CACHE_MAX_BYTES and len(self._entries) > 1:
+                oldest, _ = next(iter(self._entries.items()))
+                self._forget(oldest)
+                (self.directory / oldest).unlink(missing_ok=True)
+                self.evictions += 1
+
+    def _forget(self, name: str) -> None:
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._bytes -= size
+
+    def remove_session(self, session_id: str) -> None:
+        """Drop every cached clip of a session."""
+        with self._lock:
+            self._load()
+            for name in [n for n in self._entries if n.startswith(f"{session_id}_")]:
+                self._forget(name)
+                (self.directory / name).unlink(missing_ok=True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._load()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": settings.CLIP_CACHE_MAX_BYTES,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+clip_cache = ClipCache(CLIPS_DIR)
+
+
+def _wav_header(data_size: int, channels: int, sample_rate: int, bits: int) -> bytes:
+    """Canonical 44-byte PCM WAV header."""
+    block_align = channels * bits // 8
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits,
+        b"data", data_size
+    )
+
+
+def _copy_range(src, dst, offset: int, count: int) -> None:
+    """Copy bytes between files in the kernel when possible."""
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    copy_file_range = getattr(os, "copy_file_range", None)
+    while count > 0:
+        step = min(count, _COPY_CHUNK)
+        copied = 0
+        if copy_file_range is not None:
+            try:
+                copied = copy_file_range(src_fd, dst_fd, step, offset)
+            except OSError:
+                copy_file_range = None
+        if not copied:
+            src.seek(offset)
+            data = src.read(step)
+            if not data:
+                break
+            dst.write(data)
+            dst.flush()
+            copied = len(data)
+        offset += copied
+        count -= copied
+
+
+def cut_wav_clip(audio_path: Path, output_path: Path, start: float, end: float) -> None:
+    """
+    Cut [start, end) seconds out of a PCM WAV by byte range.
+
+    Args:
+        audio_path: Source WAV
+        output_path: Destination clip WAV
+        start: Clip start in seconds
+        end: Clip end in seconds
+
+    Raises:
+        ClipError: If the source is not a PCM WAV or the range is empty
+    """
+    info = probe_wav(audio_path)
+    if info is None or info.audio_codec.startswith("pcm_f"):
+        raise ClipError("Session audio is not an integer PCM WAV")
+
+    block_align = info.channels * info.bits_per_sample // 8
+    byte_rate = info.sample_rate * block_align
+    data_size = int(round(info.duration * byte_rate))
+
+    # Align both ends to whole sample frames
+    first = min(data_size, max(0, int(start * info.sample_rate)) * block_align)
+    last = min(data_size, max(0, int(end * info.sample_rate + 0.5)) * block_align)
+    if last <= first:
+        raise ClipError(f"Empty clip range {start:.2f}-{end:.2f}s")
+
+    with open(audio_path, "rb") as src, open(output_path, "wb") as dst:
+        dst.write(_wav_header(last - first, info.channels, info.sample_rate, info.bits_per_sample))
+        dst.flush()
+        _copy_range(src, dst, info.data_offset + first, last - first)
+
+
+def clip_file_name(session_id: str, index: int, start: float, end: float, audio_mtime_ns: int, fmt: str) -> str:
+    """Cache key: a re-transcription (new times) or re-extraction (new WAV) gets a new name."""
+    return f"{session_id}_{index}_{int(start * 1000)}_{int(end * 1000)}_{audio_mtime_ns}.{fmt}"
+
+
+# Clips being produced, keyed by file name (single flight)
+_pending: Dict[str, asyncio.Task] = {}
+
+
+async def _produce(audio_path: Path, name: str, start: float, end: float, fmt: str) -> None:
+    tmp_wav = CLIPS_DIR / f"{name}.{uuid.uuid4().hex}.tmp"
+    try:
+        await asyncio.to_thread(cut_wav_clip, audio_path, tmp_wav, start, end)
+        if fmt == "mp3":
+            tmp_mp3 = CLIPS_DIR / f"{name}.{uuid.uuid4().hex}.tmp"
+            try:
+                result = await media_executor.run_async(
+                    "encode_clip",
+                    ["ffmpeg", "-i", str(tmp_wav), "-codec:a", "libmp3lame", "-b:a", settings.PLAYBACK_BITRATE, "-f", "mp3", "-y", str(tmp_mp3)],
+                    timeout=CLIP_ENCODE_TIMEOUT
+                )
+                if result.returncode != 0:
+                    raise ClipError(f"FFmpeg failed: {result.stderr[-500:] if result.stderr else 'Unknown FFmpeg error'}")
+                os.replace(tmp_mp3, CLIPS_DIR / name)
+            except FileNotFoundError:
+                raise ClipError("FFmpeg not installed or not in PATH")
+            finally:
+                tmp_mp3.unlink(missing_ok=True)
+        else:
+            os.replace(tmp_wav, CLIPS_DIR / name)
+    finally:
+        tmp_wav.unlink(missing_ok=True)
+    clip_cache.add(name)
+
+
+async def get_segment_clip(session_id: str, index: int, audio_path: Path, start: float, end: float, fmt: str = "wav") -> Path:
+    """
+    Return a cached clip for one transcript segment, producing it on a miss.
+
+    Args:
+        session_id: Session UUID (as string)
+        index: Segment index in the transcript
+        audio_path: Session WAV
+        start: Segment start in seconds
+        end: Segment end in seconds
+        fmt: "wav" (byte-range cut) or "mp3" (cut, then encoded)
+
+    Returns:
+        Path of the clip file
+
+    Raises:
+        ClipError: If the clip cannot be produced
+    """
+    name = clip_file_name(session_id, index, start, end, audio_path.stat().st_mtime_ns, fmt)
+    cached = clip_cache.lookup(name)
+    if cached is not None:
+        return cached
+
+    task = _pending.get(name)
+    if task is None:
+        task = asyncio.create_task(_produce(audio_path, name, start, end, fmt))
+        _pending[name] = task
+        task.add_done_callback(lambda _: _pending.pop(name, None))
+    await asyncio.shield(task)
+    return CLIPS_DIR / name
+
+
+def get_clip_metrics() -> dict:
+    """
+    Snapshot of clip cache metrics.
+
+    Returns:
+        Dict with cache size, limit, hit/miss counters and evictions
+    """
+    return clip_cache.snapshot()
@@ -22,10 +22,80 @@ class Settings(BaseSettings):
     
     # PostgreSQL
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str = ""  # "" = DATABASE_URL with the asyncpg driver
     
     # Sarvam AI
     SARVAM_API_KEY: str
     
+    # Process pool for CPU-bound transcript post-processing
+    PROCESS_POOL_WORKERS: int = 0  # 0 = auto (min(2, CPU count))
+    PROCESS_POOL_INLINE_THRESHOLD: int = 200  # Batches smaller than this run in-process
+    
+    # Transcription queue
+    TRANSCRIPTION_WORKERS: int = 2  # Concurrent transcription jobs
+    EAGER_TRANSCRIPTION: bool = False  # Auto-transcribe uploads as soon as they are ready
+    EAGER_TRANSCRIPTION_MAX_CONCURRENCY: int = 1  # Eager jobs never take every worker
+    PROVIDER_CIRCUIT_OPEN_POLICY: str = "fail"  # "fail" (503) or "queue" while the provider circuit is open
+    
+    # Upload processing
+    STREAMING_EXTRACTION: bool = True  # Extract audio while streamable uploads are still arriving
+    UPLOAD_PART_SIZE: int = 64 * 1024 * 1024  # Default part size for resumable uploads
+    UPLOAD_EXPIRY_HOURS: int = 72  # Resumable uploads untouched this long are removed by reconciliation
+    LOCAL_INGEST_ROOTS: str = ""  # Comma-separated directories /sessions/ingest may import from ("" = disabled)
+    
+    # Object storage for content-addressed blobs
+    OBJECT_STORE_BACKEND: str = "local"  # "local" (storage/blobs/) or "s3" (S3-compatible, e.g. MinIO)
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""  # Key prefix inside the bucket
+    S3_ENDPOINT_URL: str = ""  # e.g. http://localhost:9000 for MinIO ("" = AWS)
+    S3_REGION: str = ""
+    S3_ACCESS_KEY_ID: str = ""  # "" = boto3's default credential chain
+    S3_SECRET_ACCESS_KEY: str = ""
+    
+    # Storage lifecycle for originals (local object store only)
+    LIFECYCLE_ENABLED: bool = False
+    LIFECYCLE_INTERVAL_SECONDS: int = 3600  # Time between lifecycle passes
+    LIFECYCLE_ORIGINAL_ACTION: str = "archive"  # "archive" (Opus audio-only), "cold" (move to COLD_STORAGE_DIR) or "delete"
+    LIFECYCLE_ORIGINAL_AFTER_DAYS: int = 7  # Days since an original was last uploaded/referenced
+    LIFECYCLE_ARCHIVE_BITRATE: str = "48k"  # Opus bitrate for archived originals
+    LIFECYCLE_BATCH_SIZE: int = 20  # Originals handled per pass
+    COLD_STORAGE_DIR: str = ""  # Cheaper volume for the "cold" action
+    
+    # Storage/database reconciliation (reconcile_storage.py)
+    RECONCILE_GRACE_HOURS: int = 24  # Leave anything newer alone (uploads/transcriptions in flight)
+    RECONCILE_BATCH_SIZE: int = 500  # Rows/documents/files checked per query
+    RECONCILE_BATCH_PAUSE_SECONDS: float = 0.05  # Pause between batches to limit database load
+    RECONCILE_MAX_DELETIONS: int = 1000  # Deletions per run (the rest is only reported)
+    RECONCILE_DELETIONS_PER_SECOND: float = 20.0  # 0 = unpaced
+    
+    # Database pool/query instrumentation (GET /metrics/database)
+    DB_METRICS_ENABLED: bool = True
+    DB_SLOW_QUERY_MS: int = 200  # Statements/commands at least this slow go to the slow-query log
+    DB_SLOW_QUERY_LOG_SIZE: int = 200  # Most recent slow queries kept
+    
+    # Session row cache (GET /metrics/session-cache)
+    SESSION_CACHE_ENABLED: bool = True
+    SESSION_CACHE_SIZE: int = 4096  # Sessions kept in memory per worker
+    SESSION_CACHE_TTL_SECONDS: float = 30.0  # Upper bound on staleness across workers without a notify channel
+    SESSION_CACHE_NOTIFY_CHANNEL: str = ""  # PostgreSQL LISTEN/NOTIFY channel for invalidation across workers ("" = off)
+    
+    # Media (FFmpeg/ffprobe) job executor
+    MEDIA_JOB_CONCURRENCY: int = 0  # 0 = auto (available cores, bounded by memory)
+    MEDIA_JOB_MEMORY_MB: int = 512  # Memory budget per media process for the auto limit
+    MEDIA_JOB_THREADS: int = 0  # FFmpeg -threads per job, 0 = auto (cores / concurrency)
+    MEDIA_JOB_NICE: int = 10  # Niceness for media processes (0 = unchanged)
+    
+    # Playback renditions
+    PLAYBACK_BITRATE: str = "32k"  # CBR MP3 bitrate (~14 MB per hour)
+    PLAYBACK_SAMPLE_RATE: int = 16000
+    PLAYBACK_ACCEL_REDIRECT_PREFIX: str = ""  # e.g. "/protected-audio/" to let nginx sendfile renditions from storage/audio/
+    
+    # Segment clip cache
+    CLIP_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # Disk budget for cached segment clips
+    
+    # Media metadata cache
+    MEDIA_METADATA_CACHE_SIZE: int = 1024  # In-memory entries (the SQLite cache is unbounded)
+    
     # App metadata
     APP_NAME: str = "Sonetto API"
     VERSION: str = "1.0.0"
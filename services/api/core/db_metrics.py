@@ -0,0 +1,469 @@
+"""
+Connection pool and query instrumentation for PostgreSQL and MongoDB.
+
+Evidence for pool sizing on a shared database:
+- Pool checkout wait (time spent waiting for a free connection), hold
+  time and peak utilization for the sync (psycopg2) and async (asyncpg)
+  SQLAlchemy pools and the MongoDB client pool
+- Per-statement latency, aggregated by normalized SQL (literals and bind
+  parameters replaced with ?) and by MongoDB command shape (field names
+  kept, values replaced with ?)
+- A bounded slow-query log (settings.DB_SLOW_QUERY_MS)
+
+Everything is tagged with the route that issued it. RouteTaggingMiddleware
+stores "<METHOD> <path template>" in a context variable, which follows the
+request into asyncio.to_thread workers; work outside a request (queue
+workers, lifecycle passes, scripts) is tagged "background".
+
+Hooks are attached in db/postgres/database.py and db/mongo/database.py
+when settings.DB_METRICS_ENABLED is set.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Deque, Dict
+
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.routing import Match
+
+from core.config import settings
+
+
+BACKGROUND_ROUTE = "background"
+
+# Route that issued the current database work
+current_route: ContextVar[str] = ContextVar("db_metrics_route", default=BACKGROUND_ROUTE)
+
+# Longest normalized statement / command shape kept
+_MAX_SHAPE_LENGTH = 500
+
+# Distinct statements/shapes tracked per pool (least recently used dropped first)
+_MAX_TRACKED_SHAPES = 500
+
+# Command fields that describe the session/transport, not the query
+_MONGO_IGNORED_FIELDS = {
+    "lsid", "txnNumber", "$db", "$clusterTime", "$readPreference",
+    "autocommit", "startTransaction", "readConcern", "writeConcern",
+}
+
+_lock = threading.Lock()
+
+
+def _new_timing() -> Dict[str, float]:
+    return {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+
+
+def _add_timing(stats: Dict[str, float], seconds: float, failed: bool = False) -> None:
+    stats["count"] += 1
+    stats["total_seconds"] += seconds
+    stats["max_seconds"] = max(stats["max_seconds"], seconds)
+    if failed:
+        stats["errors"] += 1
+
+
+def _timing_summary(stats: Dict[str, float]) -> dict:
+    return {
+        **stats,
+        "avg_seconds": stats["total_seconds"] / stats["count"] if stats["count"] else 0.0,
+    }
+
+
+class _PoolStats:
+    """Checkout wait, hold time and utilization of one connection pool."""
+
+    def __init__(self):
+        self.wait = _new_timing()
+        self.hold = _new_timing()
+        self.timeouts = 0
+        self.connects = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "checkout_wait": _timing_summary(self.wait),
+            "hold": _timing_summary(self.hold),
+            "checkout_timeouts": self.timeouts,
+            "connections_opened": self.connects,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+        }
+
+
+_pools: Dict[str, _PoolStats] = {}
+_pool_limits: Dict[str, int] = {}
+# Per source (pool name): shape -> timing; per route: source -> kind -> timing
+_shapes: Dict[str, Dict[str, Dict[str, float]]] = {}
+_routes: Dict[str, Dict[str, Dict[str, Dict[str, float]]]] = {}
+_slow_queries: Deque[dict] = deque(maxlen=max(1, settings.DB_SLOW_QUERY_LOG_SIZE))
+
+
+def _route_stats(route: str, source: str, kind: str) -> Dict[str, float]:
+    """Timing bucket of one route (lock held)."""
+    return _routes.setdefault(route, {}).setdefault(source, {}).setdefault(kind, _new_timing())
+
+
+def _pool(name: str) -> _PoolStats:
+    """Stats of one pool (lock held)."""
+    stats = _pools.get(name)
+    if stats is None:
+        stats = _pools[name] = _PoolStats()
+    return stats
+
+
+def record_checkout(pool: str, seconds: float, failed: bool = False) -> None:
+    """Record how long a caller waited for a pooled connection."""
+    route = current_route.get()
+    with _lock:
+        stats = _pool(pool)
+        _add_timing(stats.wait, seconds, failed)
+        if failed:
+            stats.timeouts += 1
+        else:
+            stats.in_use += 1
+            stats.peak_in_use = max(stats.peak_in_use, stats.in_use)
+        _add_timing(_route_stats(route, pool, "checkout_wait"), seconds, failed)
+
+
+def record_checkin(pool: str, held_seconds: float | None) -> None:
+    """Record a connection going back to its pool."""
+    with _lock:
+        stats = _pool(pool)
+        stats.in_use = max(0, stats.in_use - 1)
+        if held_seconds is not None:
+            _add_timing(stats.hold, held_seconds)
+
+
+def record_connect(pool: str) -> None:
+    """Record a new physical connection."""
+    with _lock:
+        _pool(pool).connects += 1
+
+
+def record_query(source: str, shape: str, seconds: float, failed: bool = False, route: str | None = None) -> None:
+    """
+    Record one statement or command.
+
+    Args:
+        source: Pool it ran on ("postgres", "postgres_async" or "mongo")
+        shape: Normalized SQL or MongoDB command shape
+        seconds: Execution time
+        failed: Whether it raised
+        route: Route that issued it (default: the current route)
+    """
+    route = route or current_route.get()
+    slow = seconds * 1000 >= settings.DB_SLOW_QUERY_MS
+    with _lock:
+        shapes = _shapes.setdefault(source, {})
+        stats = shapes.pop(shape, None) or _new_timing()
+        _add_timing(stats, seconds, failed)
+        # Re-inserted last, so the first key is the least recently used
+        shapes[shape] = stats
+        if len(shapes) > _MAX_TRACKED_SHAPES:
+            shapes.pop(next(iter(shapes)))
+        _add_timing(_route_stats(route, source, "queries"), seconds, failed)
+        if slow:
+            _slow_queries.append({
+                "at": datetime.utcnow().isoformat(),
+                "source": source,
+                "route": route,
+                "duration_ms": round(seconds * 1000, 2),
+                "failed": failed,
+                "statement": shape,
+            })
+    if slow:
+        print(f"🐢 Slow {source} query ({seconds * 1000:.0f} ms, {route}): {shape[:200]}")
+
+
+# --- Normalization -----------------------------------------------------
+
+_SQL_REPLACEMENTS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),                        # string literals
+    (re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+\b|%s"), "?"),       # bind parameters
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b"), "?"),           # numeric literals
+    (re.compile(r"\?(?:\s*,\s*\?)+"), "?, ..."),                 # expanded IN lists / VALUES
+    (re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+"), "(?, ...), ..."),  # multi-row VALUES
+    (re.compile(r"\s+"), " "),
+]
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """SQL with literals and bind parameters replaced by ?, whitespace collapsed."""
+    for pattern, replacement in _SQL_REPLACEMENTS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()[:_MAX_SHAPE_LENGTH]
+
+
+def _shape(value: Any, depth: int = 0) -> Any:
+    if isinstance(value, dict):
+        if depth >= 4:
+            return "{...}"
+        return {key: _shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shape(value[0], depth + 1)] if value else []
+    return "?"
+
+
+def mongo_command_shape(command_name: str, command: dict) -> str:
+    """
+    Shape of a MongoDB command: collection and field names, no values.
+
+    e.g. find transcriptions {"filter": {"session_id": "?"}, "projection": {"_id": "?"}}
+    """
+    collection = command.get(command_name)
+    body = {
+        key: _shape(value)
+        for key, value in command.items()
+        if key != command_name and key not in _MONGO_IGNORED_FIELDS
+    }
+    parts = [command_name]
+    if isinstance(collection, str):
+        parts.append(collection)
+    if body:
+        parts.append(repr(body).replace("'", '"'))
+    return " ".join(parts)[:_MAX_SHAPE_LENGTH]
+
+
+# --- SQLAlchemy hooks --------------------------------------------------
+
+class _TimedCheckout:
+    """Pool mixin timing how long a checkout waits for a connection."""
+
+    metrics_name = "postgres"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            record_checkout(self.metrics_name, time.perf_counter() - start, failed=True)
+            raise
+        record_checkout(self.metrics_name, time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool for the sync (psycopg2) engine, with checkout timing."""
+
+    metrics_name = "postgres"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool for the asyncpg engine, with checkout timing."""
+
+    metrics_name = "postgres_async"
+
+
+def instrument_engine(engine, pool_size: int, max_overflow: int) -> None:
+    """
+    Attach pool and statement hooks to a SQLAlchemy engine.
+
+    The engine must have been created with TimedQueuePool (or
+    TimedAsyncQueuePool) for checkout waits to be measured.
+
+    Args:
+        engine: Sync Engine (for an AsyncEngine pass async_engine.sync_engine)
+        pool_size: Configured pool_size
+        max_overflow: Configured max_overflow
+    """
+    name = getattr(engine.pool, "metrics_name", "postgres")
+    _pool_limits[name] = pool_size + max_overflow
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        record_connect(name)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["db_metrics_checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("db_metrics_checked_out_at", None)
+        record_checkin(name, time.perf_counter() - checked_out_at if checked_out_at is not None else None)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("db_metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("db_metrics_started")
+        if started:
+            record_query(name, normalize_sql(statement), time.perf_counter() - started.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        started = context.connection.info.get("db_metrics_started") if context.connection is not None else None
+        if started and context.statement:
+            record_query(name, normalize_sql(context.statement), time.perf_counter() - started.pop(), failed=True)
+
+
+# --- pymongo listeners -------------------------------------------------
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Per-command latency by command shape and route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # request_id -> (shape, route) between started and succeeded/failed
+        self._pending: Dict[int, tuple] = {}
+
+    def started(self, event):
+        shape = mongo_command_shape(event.command_name, event.command)
+        with self._lock:
+            self._pending[event.request_id] = (shape, current_route.get())
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            pending = self._pending.pop(event.request_id, None)
+        if pending is not None:
+            shape, route = pending
+            record_query("mongo", shape, event.duration_micros / 1_000_000, failed=failed, route=route)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Checkout wait and utilization of the MongoDB connection pool."""
+
+    def __init__(self):
+        self._checked_out_at: Dict[tuple, float] = {}
+
+    def connection_checked_out(self, event):
+        self._checked_out_at[(event.address, event.connection_id)] = time.perf_counter()
+        record_checkout("mongo", event.duration)
+
+    def connection_check_out_failed(self, event):
+        record_checkout("mongo", event.duration, failed=True)
+
+    def connection_checked_in(self, event):
+        checked_out_at = self._checked_out_at.pop((event.address, event.connection_id), None)
+        record_checkin("mongo", time.perf_counter() - checked_out_at if checked_out_at is not None else None)
+
+    def connection_created(self, event):
+        record_connect("mongo")
+
+    # Remaining pool events (abstract in ConnectionPoolListener)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+def mongo_event_listeners(max_pool_size: int) -> list:
+    """
+    pymongo event listeners for MongoClient(event_listeners=...).
+
+    Args:
+        max_pool_size: The client's maxPoolSize (for utilization)
+    """
+    _pool_limits["mongo"] = max_pool_size
+    return [MongoCommandListener(), MongoPoolListener()]
+
+
+# --- Route tagging -----------------------------------------------------
+
+class RouteTaggingMiddleware:
+    """ASGI middleware setting current_route for the duration of a request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_route.set(self._route_label(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
+
+    @staticmethod
+    def _route_label(scope) -> str:
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", []):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return f"{scope['method']} {route.path}"
+        return f"{scope['method']} (unmatched)"
+
+
+# --- Metrics -----------------------------------------------------------
+
+def get_database_metrics(top: int = 20) -> dict:
+    """
+    Snapshot of pool and query metrics.
+
+    Args:
+        top: Statements/command shapes to list per pool (by total time)
+
+    Returns:
+        Dict with per-pool checkout wait, hold time and utilization,
+        the slowest statement shapes, per-route totals and the slow-query log
+    """
+    with _lock:
+        pools = {}
+        for name, stats in _pools.items():
+            limit = _pool_limits.get(name)
+            pools[name] = {
+                **stats.snapshot(),
+                "limit": limit,
+                "peak_utilization": stats.peak_in_use / limit if limit else None,
+            }
+        queries = {
+            source: sorted(
+                ({"statement": shape, **_timing_summary(stats)} for shape, stats in shapes.items()),
+                key=lambda entry: entry["total_seconds"],
+                reverse=True
+            )[:top]
+            for source, shapes in _shapes.items()
+        }
+        routes = {
+            route: {
+                source: {kind: _timing_summary(stats) for kind, stats in kinds.items()}
+                for source, kinds in sources.items()
+            }
+            for route, sources in _routes.items()
+        }
+        slow_queries = list(_slow_queries)
+
+    return {
+        "enabled": settings.DB_METRICS_ENABLED,
+        "slow_query_ms": settings.DB_SLOW_QUERY_MS,
+        "pools": pools,
+        "queries": queries,
+        "routes": routes,
+        "slow_queries": slow_queries,
+    }
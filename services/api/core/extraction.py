@@ -0,0 +1,266 @@
+"""
+Background audio extraction stage for uploaded sessions.
+
+Upload routes return as soon as the original is stored (202, status
+"uploaded"); this stage then takes the session through "extracting" to
+"ready" or "failed", publishing progress through set_extraction_status
+(see GET /sessions/{id}/status and /extraction/status). HTTP request
+slots and load balancer timeouts no longer depend on FFmpeg run time,
+and an upload failure (4xx/5xx on the upload) is distinguishable from
+an extraction failure (status "failed" afterwards).
+
+Database and blob steps run in worker threads, each with its own
+short-lived session; no connection is held while FFmpeg runs. Sessions
+left in "uploaded"/"extracting" by a restart are picked up again on
+startup.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Set, Tuple
+from uuid import UUID
+
+from core.audio import StreamingAudioExtractor, extract_audio_async, get_audio_duration
+from core.blobs import (
+    BLOB_KIND_AUDIO, BlobMissingError, audio_blob_key, ensure_local_copy, find_blob, new_temp_path, reference_blob,
+    release_blob, store_blob
+)
+from core.status import set_extraction_status
+from core.storage import get_peaks_file_path
+from core.transcription_queue import enqueue_eager_transcription
+from core.waveform import schedule_peaks_build
+from db.postgres.database import SessionLocal
+from db.postgres.models import Session
+
+
+# Stages in flight (keeps task references alive)
+_pending_stages: Set[asyncio.Task] = set()
+
+
+def _session_exists(db, session_id: UUID) -> bool:
+    return db.query(Session.id).filter(Session.id == session_id).first() is not None
+
+
+# The database/blob steps below block (sync session, the blob store's
+# thread lock, file moves, object store calls); the stage runs each one
+# with asyncio.to_thread and its own short-lived session, and holds no
+# connection while FFmpeg runs. Session rows are locked while updated:
+# delete_session locks the row too, so it either sees the audio blob
+# set here or we see the row gone and drop our reference.
+
+def _lock_session(db, session_id: UUID) -> Session | None:
+    return db.get(Session, session_id, with_for_update=True)
+
+
+def _begin_extraction(session_id: UUID, audio_key: str) -> Tuple[bool, Path | None]:
+    """
+    Mark a session "extracting" and reference the WAV of identical content, if any.
+
+    Returns:
+        (session exists, path of the reused WAV or None)
+    """
+    with SessionLocal() as db:
+        db_session = _lock_session(db, session_id)
+        if db_session is None:
+            return False, None
+        db_session.status = "extracting"
+        db.commit()
+        known_audio = find_blob(db, audio_key)
+        if known_audio is None:
+            return True, None
+        try:
+            return True, reference_blob(db, known_audio)
+        except BlobMissingError:
+            # Released by its last session just now: extract again
+            return True, None
+
+
+def _store_audio(session_id: UUID, audio_key: str, temp_audio: Path, reused_audio: Path | None) -> Path | None:
+    """
+    Take the new (or reused) WAV into the blob store for a session.
+
+    Returns:
+        The WAV path, or None if the session was deleted meanwhile (no
+        reference is kept then)
+    """
+    with SessionLocal() as db:
+        if not _session_exists(db, session_id):
+            if reused_audio is not None:
+                release_blob(db, audio_key)
+            return None
+        if reused_audio is not None:
+            return reused_audio
+        return store_blob(db, audio_key, BLOB_KIND_AUDIO, temp_audio, ".wav")
+
+
+def _finish_session(session_id: UUID, audio_key: str | None, **fields) -> bool:
+    """
+    Set the extraction outcome on a session.
+
+    Args:
+        session_id: Session UUID
+        audio_key: Audio blob referenced for it (released if the session is gone)
+        **fields: Column values to set
+
+    Returns:
+        False if the session was deleted meanwhile
+    """
+    with SessionLocal() as db:
+        db_session = _lock_session(db, session_id)
+        if db_session is None:
+            if audio_key:
+                release_blob(db, audio_key)
+            return False
+        for key, value in fields.items():
+            setattr(db_session, key, value)
+        db.commit()
+        return True
+
+
+async def run_extraction_stage(
+    session_id: UUID,
+    content_key: str,
+    original_path: Path,
+    temp_audio: Path | None = None,
+    extractor: StreamingAudioExtractor | None = None
+) -> None:
+    """
+    Give a session whose original is stored its WAV, and mark it ready.
+
+    Reuses the WAV already extracted from identical content; otherwise
+    finishes the streaming extraction or runs FFmpeg on the stored
+    original, and stores the result as a blob. Failures mark the session
+    "failed"; nothing is raised.
+
+    Args:
+        session_id: Session with its original blob set
+        content_key: Original blob key
+        original_path: Original blob file
+        temp_audio: Temp path for a newly extracted WAV (the streaming
+            extractor's output path, if there is one)
+        extractor: Streaming extractor fed during the upload, if any
+    """
+    temp_audio = temp_audio or new_temp_path(".wav")
+    sid = str(session_id)
+    audio_key = audio_blob_key(content_key)
+
+    try:
+        exists, reused_audio = await asyncio.to_thread(_begin_extraction, session_id, audio_key)
+        if not exists:
+            # Deleted before extraction started
+            if extractor:
+                await extractor.abort()
+            return
+        set_extraction_status(sid, "extracting", "Extracting audio", 0)
+
+        # Audio extracted from this content before is reused as is
+        success = False
+        if reused_audio is not None:
+            if extractor:
+                await extractor.abort()
+            success, message, method = True, "identical upload already extracted", "reused"
+
+        # Extract audio (finish the streaming pass, or extract from the stored original)
+        if not success and extractor:
+            success, message = await extractor.finish()
+            method = "stream_transcode"
+            if not success:
+                print(f"⚠️ Streaming extraction failed for {sid}, retrying from saved file: {message}")
+        if not success:
+            # Another node may have stored the original in the object store
+            if not await ensure_local_copy(original_path):
+                raise FileNotFoundError(f"Original file not found: {original_path}")
+
+            def update_status(step: str, message: str, progress: int, eta_seconds: float | None):
+                set_extraction_status(sid, step, message, progress, eta_seconds)
+
+            success, message, method = await extract_audio_async(original_path, temp_audio, status_callback=update_status)
+
+        if not success:
+            # Audio extraction failed
+            await asyncio.to_thread(_finish_session, session_id, None, audio_extraction_method=method, status="failed")
+            set_extraction_status(sid, "failed", message, 0)
+            return
+
+        audio_path = await asyncio.to_thread(_store_audio, session_id, audio_key, temp_audio, reused_audio)
+        if audio_path is None:
+            # Deleted while extracting; keep nothing
+            print(f"🗑️ Session {sid} was deleted during audio extraction")
+            return
+        print(f"🎧 Audio extraction for {sid}: {method} ({message})")
+
+        # Get audio duration (may wait for an ffprobe slot)
+        fields = {
+            "audio_extraction_method": method,
+            "audio_blob_key": audio_key,
+            "audio_file_path": str(audio_path),
+            "status": "ready",
+        }
+        duration = await asyncio.to_thread(get_audio_duration, audio_path)
+        if duration:
+            fields["audio_duration_seconds"] = duration
+            fields["duration_seconds"] = duration  # Also populate main duration field
+
+        if not await asyncio.to_thread(_finish_session, session_id, audio_key, **fields):
+            print(f"🗑️ Session {sid} was deleted during audio extraction")
+            return
+        set_extraction_status(sid, "completed", "Audio extracted", 100)
+
+    except Exception as e:
+        print(f"❌ Audio extraction stage failed for {sid}: {e}")
+        if extractor:
+            await extractor.abort()
+        try:
+            await asyncio.to_thread(_finish_session, session_id, None, status="failed")
+        except Exception as db_error:
+            print(f"⚠️ Could not mark {sid} as failed: {db_error}")
+        set_extraction_status(sid, "failed", str(e), 0)
+        return
+
+    finally:
+        temp_audio.unlink(missing_ok=True)
+
+    # Precompute waveform peaks for the editor
+    schedule_peaks_build(sid, audio_path, get_peaks_file_path(sid))
+
+    # Start transcribing in the background (if enabled) so the
+    # transcript is usually ready by the time the session is opened
+    await enqueue_eager_transcription(session_id)
+
+
+def schedule_extraction(
+    session_id: UUID,
+    content_key: str,
+    original_path: Path,
+    temp_audio: Path | None = None,
+    extractor: StreamingAudioExtractor | None = None
+) -> None:
+    """
+    Run the extraction stage for a session in the background.
+
+    The stage takes ownership of temp_audio and the extractor.
+    """
+    set_extraction_status(str(session_id), "uploaded", "Upload complete, waiting to extract audio", 0)
+    task = asyncio.create_task(run_extraction_stage(session_id, content_key, original_path, temp_audio, extractor))
+    _pending_stages.add(task)
+    task.add_done_callback(_pending_stages.discard)
+
+
+def resume_pending_extractions() -> int:
+    """
+    Reschedule sessions whose extraction was interrupted by a restart.
+
+    Returns:
+        Number of sessions rescheduled
+    """
+    with SessionLocal() as db:
+        rows = db.query(Session.id, Session.original_blob_key, Session.original_file_path).filter(
+            Session.status.in_(("uploaded", "extracting")),
+            Session.original_blob_key.isnot(None),
+            Session.audio_file_path.is_(None)
+        ).all()
+    for row in rows:
+        schedule_extraction(row.id, row.original_blob_key, Path(row.original_file_path))
+    if rows:
+        print(f"🔁 Resumed audio extraction for {len(rows)} session(s)")
+    return len(rows)
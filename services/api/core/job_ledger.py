@@ -0,0 +1,338 @@
+"""
+Transcription job ledger.
+
+Records audio size, chunking, per-stage wall time, provider job ids,
+retries and outcome for every transcription run in Postgres
+(transcription_jobs / transcription_job_chunks), and aggregates them
+into percentiles for capacity planning.
+
+Ledger writes are best-effort: a failing write is logged and never
+fails the transcription itself.
+"""
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+from uuid import UUID
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session as DBSession
+
+from db.postgres.database import SessionLocal
+from db.postgres.models import TranscriptionJob, TranscriptionJobChunk
+
+
+# Percentiles reported by the aggregation endpoint
+LEDGER_PERCENTILES = (0.5, 0.9, 0.99)
+
+# Audio duration buckets (upper bound in minutes, label) for failure rates
+DURATION_BUCKETS = [
+    (10, "0-10m"),
+    (30, "10-30m"),
+    (60, "30-60m"),
+    (120, "1-2h"),
+    (240, "2-4h"),
+]
+DURATION_BUCKET_OVERFLOW = "4h+"
+# Jobs that failed before their audio duration was probed
+DURATION_BUCKET_UNKNOWN = "unknown"
+
+# Stages reported in aggregates (job-level stage_seconds keys)
+LEDGER_STAGES = ("probe", "extract", "create_job", "upload", "provider", "download", "transform", "persist")
+
+
+class StageTimer:
+    """Accumulates wall time per named stage (re-entering a stage adds to it)."""
+
+    def __init__(self):
+        self.stage_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._lap_stage: str | None = None
+        self._lap_started = 0.0
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def switch_stage(self, name: str | None) -> None:
+        """
+        End the current lap stage (if any) and start timing `name`.
+
+        For sequential code with many exit points, where wrapping each
+        stage in a `with` block is impractical. Pass None to stop timing.
+        """
+        now = time.perf_counter()
+        if self._lap_stage is not None:
+            self.add(self._lap_stage, now - self._lap_started)
+        self._lap_stage = name
+        self._lap_started = now
+
+
+class ChunkRecorder(StageTimer):
+    """Ledger entry for one provider batch job within a transcription run."""
+
+    def __init__(self, job: "TranscriptionJobRecorder", index: int, offset_seconds: float, duration_seconds: float | None):
+        super().__init__()
+        self.job = job
+        self.index = index
+        self.offset_seconds = offset_seconds
+        self.duration_seconds = duration_seconds
+        self.audio_bytes: int | None = None
+        self.provider_job_id: str | None = None
+        self.retries = 0
+        self.status = "running"
+        self.error: str | None = None
+
+    def record_retry(self, operation: str, attempt: int, error: Exception) -> None:
+        """on_retry hook for core.resilience.call_provider."""
+        self.retries += 1
+        self.job.retries += 1
+
+    def finish(self, success: bool, error: str | None = None) -> None:
+        self.switch_stage(None)
+        self.status = "completed" if success else "failed"
+        self.error = error
+        # Roll chunk stage times up into the job totals
+        for name, seconds in self.stage_seconds.items():
+            self.job.add(name, seconds)
+
+
+class TranscriptionJobRecorder(StageTimer):
+    """
+    Ledger entry for one transcription run.
+
+    Lifecycle:
+        recorder = TranscriptionJobRecorder(session_id)   # queued_at = now
+        recorder.start(audio_path)                        # inserts "running" row
+        chunk = recorder.chunk(0, offset, duration)       # per provider job
+        recorder.finish(success, segment_count, error)    # writes outcome + chunks
+    """
+
+    def __init__(self, session_id: UUID | str, trigger: str = "user", persist: bool = True):
+        super().__init__()
+        self.session_id = UUID(str(session_id))
+        self.trigger = trigger
+        self.persist = persist
+        self.job_id: UUID | None = None
+        self.queued_at = datetime.utcnow()
+        self.started_at: datetime | None = None
+        self.audio_duration_seconds: float | None = None
+        self.audio_bytes: int | None = None
+        self.chunk_count: int | None = None
+        self.retries = 0
+        self.chunks: List[ChunkRecorder] = []
+        self._started_perf: float | None = None
+        self._produce_seconds = 0.0
+
+    def start(self, audio_path: Path | None = None) -> None:
+        """Mark the job as started and insert its ledger row."""
+        self.started_at = datetime.utcnow()
+        self._started_perf = time.perf_counter()
+        if audio_path is not None and audio_path.exists():
+            self.audio_bytes = audio_path.stat().st_size
+
+        if not self.persist:
+            return
+        try:
+            with SessionLocal() as db:
+                job = TranscriptionJob(
+                    session_id=self.session_id,
+                    trigger=self.trigger,
+                    status="running",
+                    audio_bytes=self.audio_bytes,
+                    queued_at=self.queued_at,
+                    started_at=self.started_at,
+                    queue_wait_seconds=(self.started_at - self.queued_at).total_seconds(),
+                    stage_seconds={}
+                )
+                db.add(job)
+                db.commit()
+                self.job_id = job.id
+        except Exception as e:
+            print(f"⚠️ Job ledger: failed to record job start: {e}")
+
+    def chunk(self, index: int, offset_seconds: float, duration_seconds: float | None = None) -> ChunkRecorder:
+        chunk = ChunkRecorder(self, index, offset_seconds, duration_seconds)
+        self.chunks.append(chunk)
+        return chunk
+
+    def measure_producer(self, items: Iterable) -> Iterator:
+        """
+        Wrap an iterator, timing how long the upstream producer takes per item.
+
+        Splits a streaming pipeline's wall time between the producer
+        (transcription, whose stages are recorded per chunk) and the
+        consumer: the remainder is charged to "persist" on finish.
+        """
+        iterator = iter(items)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._produce_seconds += time.perf_counter() - started
+            yield item
+
+    def finish(self, success: bool, segment_count: int | None = None, error: str | None = None) -> None:
+        """Write the job outcome and its chunks to the ledger."""
+        finished_at = datetime.utcnow()
+        processing_seconds = time.perf_counter() - self._started_perf if self._started_perf else None
+        if processing_seconds is not None:
+            # Whatever the consumer spent outside the producer is persistence time
+            self.add("persist", max(0.0, processing_seconds - self._produce_seconds))
+
+        if not self.persist or self.job_id is None:
+            return
+        try:
+            with SessionLocal() as db:
+                job = db.get(TranscriptionJob, self.job_id)
+                if job is None:
+                    return
+                job.status = "completed" if success else "failed"
+                job.trigger = self.trigger
+                job.audio_duration_seconds = self.audio_duration_seconds
+                job.chunk_count = self.chunk_count
+                job.segment_count = segment_count
+                job.retries = self.retries
+                job.finished_at = finished_at
+                job.processing_seconds = processing_seconds
+                job.stage_seconds = dict(self.stage_seconds)
+                job.error = error
+
+                for chunk in self.chunks:
+                    db.add(TranscriptionJobChunk(
+                        job_id=self.job_id,
+                        chunk_index=chunk.index,
+                        offset_seconds=chunk.offset_seconds,
+                        duration_seconds=chunk.duration_seconds,
+                        audio_bytes=chunk.audio_bytes,
+                        provider_job_id=chunk.provider_job_id,
+                        status=chunk.status,
+                        retries=chunk.retries,
+                        stage_seconds=dict(chunk.stage_seconds),
+                        error=chunk.error
+                    ))
+                db.commit()
+        except Exception as e:
+            print(f"⚠️ Job ledger: failed to record job outcome: {e}")
+
+
+def record_stage(recorder: StageTimer | None, name: str):
+    """Time a stage on an optional recorder (no-op when recorder is None)."""
+    return recorder.stage(name) if recorder is not None else nullcontext()
+
+
+def switch_stage(recorder: StageTimer | None, name: str | None) -> None:
+    """Switch the lap stage on an optional recorder (no-op when recorder is None)."""
+    if recorder is not None:
+        recorder.switch_stage(name)
+
+
+def _percentiles(expr, prefix: str) -> list:
+    return [
+        func.percentile_cont(q).within_group(expr).label(f"{prefix}__p{int(q * 100)}")
+        for q in LEDGER_PERCENTILES
+    ]
+
+
+def _duration_bucket():
+    minutes = TranscriptionJob.audio_duration_seconds / 60.0
+    return case(
+        (TranscriptionJob.audio_duration_seconds.is_(None), DURATION_BUCKET_UNKNOWN),
+        *[(minutes < upper, label) for upper, label in DURATION_BUCKETS],
+        else_=DURATION_BUCKET_OVERFLOW
+    )
+
+
+def get_ledger_summary(db: DBSession, since: datetime | None = None, until: datetime | None = None) -> dict:
+    """
+    Aggregate the job ledger into percentiles and failure rates.
+
+    Args:
+        db: Database session
+        since: Only include jobs queued at or after this time
+        until: Only include jobs queued before this time
+
+    Returns:
+        Dict with job counts, timing percentiles for completed jobs
+        (overall, per stage and per audio minute) and failure rates by
+        audio duration bucket ("unknown" for jobs that failed before the
+        duration probe)
+    """
+    filters = []
+    if since is not None:
+        filters.append(TranscriptionJob.queued_at >= since)
+    if until is not None:
+        filters.append(TranscriptionJob.queued_at < until)
+
+    metrics = {
+        "processing_seconds_per_audio_minute": TranscriptionJob.processing_seconds
+        / func.nullif(TranscriptionJob.audio_duration_seconds / 60.0, 0),
+        "queue_wait_seconds": TranscriptionJob.queue_wait_seconds,
+        "processing_seconds": TranscriptionJob.processing_seconds,
+        "retries": TranscriptionJob.retries,
+    }
+    for stage in LEDGER_STAGES:
+        metrics[f"stage_{stage}_seconds"] = TranscriptionJob.stage_seconds[stage].as_float()
+
+    columns = [func.count().label("completed_jobs")]
+    for name, expr in metrics.items():
+        columns.extend(_percentiles(expr, name))
+
+    row = (
+        db.query(*columns)
+        .filter(TranscriptionJob.status == "completed", *filters)
+        .one()
+    )._mapping
+
+    percentiles = {
+        name: {
+            f"p{int(q * 100)}": row[f"{name}__p{int(q * 100)}"]
+            for q in LEDGER_PERCENTILES
+        }
+        for name in metrics
+    }
+
+    bucket = _duration_bucket().label("bucket")
+    bucket_rows = (
+        db.query(
+            bucket,
+            func.count().label("jobs"),
+            func.count().filter(TranscriptionJob.status == "failed").label("failed")
+        )
+        .filter(TranscriptionJob.status != "running", *filters)
+        .group_by(bucket)
+        .all()
+    )
+    failure_rates = {
+        r.bucket: {
+            "jobs": r.jobs,
+            "failed": r.failed,
+            "failure_rate": r.failed / r.jobs if r.jobs else 0.0
+        }
+        for r in bucket_rows
+    }
+
+    running = db.query(func.count()).select_from(TranscriptionJob).filter(
+        TranscriptionJob.status == "running", *filters
+    ).scalar()
+
+    return {
+        "completed_jobs": row["completed_jobs"],
+        "running_jobs": running,
+        "percentiles": percentiles,
+        "failure_rate_by_duration": failure_rates,
+    }
@@ -0,0 +1,267 @@
+"""
+Storage lifecycle for uploaded originals.
+
+An original is only read until its WAV is extracted; after that it sits
+on the hot volume mostly unread (re-extraction and downloads are rare).
+A periodic pass moves originals that have not been uploaded again for
+LIFECYCLE_ORIGINAL_AFTER_DAYS to a cheaper tier:
+
+- archive: transcode to audio-only Opus (a few percent of a video's
+  size) stored next to the hot blobs; the original video is dropped
+- cold: move the file unchanged under COLD_STORAGE_DIR
+- delete: drop the file; the extracted WAV is all the app needs
+
+Tiering is per blob, since identical uploads share one original. Every
+session referencing it gets its original_file_path and
+original_storage_tier updated (see core.blobs.retier_blob). Originals
+are only eligible once their audio blob exists and no referencing
+session is still waiting for extraction.
+
+With a remote object store, bucket lifecycle rules do this job and the
+pass is skipped.
+"""
+
+import asyncio
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import exists
+from sqlalchemy.orm import aliased
+
+from core.blobs import (
+    AUDIO_RECIPE, BLOB_KIND_ORIGINAL, blob_file_path, new_temp_path, retier_blob
+)
+from core.config import settings
+from core.media_jobs import media_executor
+from core.object_store import get_object_store
+from core.storage import get_blob_path
+from db.postgres.database import SessionLocal
+from db.postgres.models import Session, StorageBlob
+
+
+LIFECYCLE_ACTIONS = ("archive", "cold", "delete")
+
+# Tier each action moves an original to
+ACTION_TIERS = {"archive": "archived", "cold": "cold", "delete": "deleted"}
+
+ARCHIVE_EXTENSION = ".opus"
+
+# FFmpeg timeout for archiving one original (4-hour recordings encode in a few minutes)
+ARCHIVE_TIMEOUT = 1800
+
+
+class LifecycleError(Exception):
+    """Raised when an original cannot be moved to its new tier."""
+
+
+def _archive_command(source: Path, output_path: Path) -> list:
+    return [
+        "ffmpeg",
+        "-i", str(source),
+        "-vn",
+        "-c:a", "libopus",
+        "-b:a", settings.LIFECYCLE_ARCHIVE_BITRATE,
+        "-f", "ogg",
+        "-y",
+        str(output_path)
+    ]
+
+
+def get_cold_path(kind: str, key: str, extension: str = "") -> Path:
+    """Cold tier path of a blob: COLD_STORAGE_DIR/<kind>/<key[:2]>/<key><ext>."""
+    return Path(settings.COLD_STORAGE_DIR) / kind / key[:2] / f"{key}{extension}"
+
+
+def _copy_to(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_name(f".{destination.name}.tmp")
+    try:
+        shutil.copyfile(source, tmp_path)
+        tmp_path.replace(destination)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def select_eligible_originals(db, cutoff: datetime, limit: int) -> List[StorageBlob]:
+    """
+    Hot originals last referenced before cutoff whose audio is extracted.
+
+    Args:
+        db: Database session
+        cutoff: Only originals not referenced since
+        limit: Most rows to return (oldest first)
+    """
+    audio = aliased(StorageBlob)
+    return db.query(StorageBlob).filter(
+        StorageBlob.kind == BLOB_KIND_ORIGINAL,
+        StorageBlob.tier == "hot",
+        StorageBlob.last_referenced_at < cutoff,
+        exists().where(audio.key == StorageBlob.key + f".{AUDIO_RECIPE}"),
+        ~exists().where(
+            Session.original_blob_key == StorageBlob.key,
+            Session.status.in_(("uploaded", "extracting"))
+        )
+    ).order_by(StorageBlob.last_referenced_at).limit(limit).all()
+
+
+class LifecycleManager:
+    """
+    Periodic lifecycle pass over hot originals.
+
+    One pass handles at most LIFECYCLE_BATCH_SIZE originals, one at a
+    time, so archival transcodes never take more than one media slot.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._running = False
+        self._counters: Dict[str, int] = {
+            "passes": 0,
+            "archived": 0,
+            "cold": 0,
+            "deleted": 0,
+            "skipped": 0,
+            "failed": 0,
+            "bytes_freed": 0,
+        }
+        self._last_run_at: datetime | None = None
+        self._last_error: str | None = None
+
+    async def start(self) -> None:
+        """Start the periodic pass. Called from the application lifespan."""
+        if not settings.LIFECYCLE_ENABLED:
+            return
+        action = settings.LIFECYCLE_ORIGINAL_ACTION
+        if action not in LIFECYCLE_ACTIONS:
+            print(f"⚠️  Storage lifecycle disabled: unknown LIFECYCLE_ORIGINAL_ACTION '{action}'")
+            return
+        if action == "cold" and not settings.COLD_STORAGE_DIR:
+            print("⚠️  Storage lifecycle disabled: the cold action needs COLD_STORAGE_DIR")
+            return
+        if get_object_store().remote:
+            print("⚠️  Storage lifecycle disabled: use bucket lifecycle rules with a remote object store")
+            return
+
+        self._task = asyncio.create_task(self._loop(), name="storage-lifecycle")
+        print(f"✅ Storage lifecycle: {action} originals after {settings.LIFECYCLE_ORIGINAL_AFTER_DAYS} days")
+
+    async def stop(self) -> None:
+        """Cancel the periodic pass."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._last_error = str(e)
+                print(f"⚠️ Storage lifecycle pass failed: {e}")
+            await asyncio.sleep(settings.LIFECYCLE_INTERVAL_SECONDS)
+
+    async def run_once(self) -> int:
+        """
+        Run one lifecycle pass.
+
+        Returns:
+            Number of originals moved to a new tier
+        """
+        if self._running:
+            return 0
+        self._running = True
+        try:
+            action = settings.LIFECYCLE_ORIGINAL_ACTION
+            cutoff = datetime.utcnow() - timedelta(days=settings.LIFECYCLE_ORIGINAL_AFTER_DAYS)
+            with SessionLocal() as db:
+                blobs = await asyncio.to_thread(select_eligible_originals, db, cutoff, settings.LIFECYCLE_BATCH_SIZE)
+                db.expunge_all()
+
+            moved = 0
+            for blob in blobs:
+                try:
+                    if await self._apply(action, blob):
+                        moved += 1
+                    else:
+                        self._counters["skipped"] += 1
+                except Exception as e:
+                    self._counters["failed"] += 1
+                    self._last_error = f"{blob.key}: {e}"
+                    print(f"⚠️ Storage lifecycle: {action} failed for {blob.key}: {e}")
+
+            self._counters["passes"] += 1
+            self._last_run_at = datetime.utcnow()
+            if moved:
+                print(f"🧊 Storage lifecycle: moved {moved} original(s) to {ACTION_TIERS[action]}")
+            return moved
+        finally:
+            self._running = False
+
+    async def _apply(self, action: str, blob: StorageBlob) -> bool:
+        """Move one original to its new tier; False if it changed meanwhile."""
+        source = blob_file_path(blob)
+        if not source.exists():
+            return False
+        size_before = source.stat().st_size
+
+        new_path: Path | None = None
+        extension = None
+        if action == "archive" and blob.extension == ARCHIVE_EXTENSION:
+            # Uploaded as Opus already; nothing to transcode
+            new_path, extension = source, ARCHIVE_EXTENSION
+        elif action == "archive":
+            temp_path = new_temp_path(ARCHIVE_EXTENSION)
+            try:
+                result = await media_executor.run_async(
+                    "lifecycle_archive",
+                    _archive_command(source, temp_path),
+                    timeout=ARCHIVE_TIMEOUT
+                )
+                if result.returncode != 0:
+                    raise LifecycleError(f"FFmpeg failed: {result.stderr[-500:] if result.stderr else 'Unknown FFmpeg error'}")
+                new_path = get_blob_path(blob.kind, blob.key, ARCHIVE_EXTENSION)
+                temp_path.replace(new_path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+            extension = ARCHIVE_EXTENSION
+        elif action == "cold":
+            new_path = get_cold_path(blob.kind, blob.key, blob.extension)
+            await asyncio.to_thread(_copy_to, source, new_path)
+
+        def retier() -> bool:
+            with SessionLocal() as db:
+                return retier_blob(
+                    db, blob.key, ACTION_TIERS[action], new_path,
+                    extension=extension,
+                    last_referenced_at=blob.last_referenced_at
+                )
+
+        if not await asyncio.to_thread(retier):
+            return False
+
+        # Only archived files stay on the hot volume
+        size_after = new_path.stat().st_size if action == "archive" else 0
+        self._counters[ACTION_TIERS[action]] += 1
+        self._counters["bytes_freed"] += max(0, size_before - size_after)
+        print(f"🧊 Original {blob.key[:12]}: {ACTION_TIERS[action]} ({size_before} -> {size_after} bytes on the hot volume)")
+        return True
+
+    def snapshot(self) -> dict:
+        """Lifecycle state for the metrics endpoint."""
+        return {
+            "enabled": self._task is not None,
+            "action": settings.LIFECYCLE_ORIGINAL_ACTION,
+            "after_days": settings.LIFECYCLE_ORIGINAL_AFTER_DAYS,
+            "interval_seconds": settings.LIFECYCLE_INTERVAL_SECONDS,
+            "running": self._running,
+            "last_run_at": self._last_run_at.isoformat() if self._last_run_at else None,
+            "last_error": self._last_error,
+            **self._counters,
+        }
+
+
+# Global lifecycle manager (started in main.lifespan)
+lifecycle_manager = LifecycleManager()
@@ -0,0 +1,393 @@
+"""
+Media job executor for FFmpeg and ffprobe.
+
+Every FFmpeg/ffprobe invocation goes through media_executor, which:
+- Caps how many media processes run at once, based on the CPUs and
+  memory actually available to the container (cgroup limits included),
+  so concurrent uploads do not oversubscribe the machine
+- Queues the rest in FIFO order, with positions visible in snapshot()
+- Runs each process at a lower CPU priority (nice) with a bounded FFmpeg
+  thread count, so request handling stays responsive
+- Never blocks the event loop: async callers wait for a slot on the loop
+  and run the process in a worker thread
+"""
+
+import asyncio
+import itertools
+import os
+import subprocess
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List
+
+from core.config import settings
+
+
+class MediaJob:
+    """One FFmpeg/ffprobe invocation, queued or running."""
+
+    def __init__(self, job_id: int, name: str):
+        self.id = job_id
+        self.name = name
+        self.state = "queued"
+        self.enqueued_at = datetime.utcnow()
+        self.started_at: datetime | None = None
+        # Set when a slot is granted: threading.Event for sync waiters,
+        # (loop, future) for async waiters
+        self._event: threading.Event | None = None
+        self._future: tuple | None = None
+
+
+def _read_int(path: str) -> int | None:
+    try:
+        with open(path) as f:
+            value = f.read().split()[0]
+        return None if value == "max" else int(value)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def available_cpus() -> float:
+    """CPUs usable by this process: affinity mask capped by the cgroup CPU quota."""
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+
+    # cgroup v2: "<quota> <period>" / cgroup v1: separate files
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, int(quota) / int(period))
+    except (OSError, ValueError):
+        quota = _read_int("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = _read_int("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if quota and quota > 0 and period:
+            cpus = min(cpus, quota / period)
+
+    return max(1.0, cpus)
+
+
+def available_memory_bytes() -> int | None:
+    """Memory usable by this process: cgroup limit, else physical memory."""
+    limit = _read_int("/sys/fs/cgroup/memory.max") or _read_int("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    try:
+        physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        physical = None
+    if limit and physical:
+        # cgroup v1 reports an enormous number when unlimited
+        return min(limit, physical)
+    return limit or physical
+
+
+def default_concurrency() -> int:
+    """One media process per available core, fewer if memory is tight."""
+    concurrency = int(available_cpus())
+    memory = available_memory_bytes()
+    if memory:
+        concurrency = min(concurrency, memory // (settings.MEDIA_JOB_MEMORY_MB * 1024 * 1024))
+    return max(1, concurrency)
+
+
+class MediaJobExecutor:
+    """
+    Bounded, FIFO executor for media subprocesses.
+
+    Thread-safe: sync callers (worker threads) and async callers (request
+    handlers) share the same slots and queue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._queue: Deque[MediaJob] = deque()
+        self._running: Dict[int, MediaJob] = {}
+        self._concurrency: int | None = None
+        self._threads: int | None = None
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._total_wait_seconds = 0.0
+
+    @property
+    def concurrency(self) -> int:
+        if self._concurrency is None:
+            self._concurrency = settings.MEDIA_JOB_CONCURRENCY or default_concurrency()
+        return self._concurrency
+
+    @property
+    def threads_per_job(self) -> int:
+        """FFmpeg -threads value: available cores shared between concurrent jobs."""
+        if self._threads is None:
+            self._threads = settings.MEDIA_JOB_THREADS or max(1, int(available_cpus()) // self.concurrency)
+        return self._threads
+
+    # --- Slots ---------------------------------------------------------
+
+    def _grant(self, job: MediaJob) -> None:
+        """Mark a job running and wake its waiter (lock held)."""
+        job.state = "running"
+        job.started_at = datetime.utcnow()
+        self._running[job.id] = job
+        self._total_wait_seconds += (job.started_at - job.enqueued_at).total_seconds()
+        if job._event is not None:
+            job._event.set()
+        else:
+            loop, future = job._future
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    def _enqueue(self, job: MediaJob) -> bool:
+        """Grant immediately if a slot is free, else queue. Returns True if granted (lock held)."""
+        if not self._queue and len(self._running) < self.concurrency:
+            self._grant(job)
+            return True
+        self._queue.append(job)
+        return False
+
+    def _release(self, job: MediaJob) -> None:
+        with self._lock:
+            self._running.pop(job.id, None)
+            while self._queue and len(self._running) < self.concurrency:
+                self._grant(self._queue.popleft())
+
+    def acquire(self, name: str) -> MediaJob:
+        """Wait (blocking) for a slot. Only call from worker threads."""
+        job = MediaJob(next(self._ids), name)
+        job._event = threading.Event()
+        with self._lock:
+            self._enqueue(job)
+        job._event.wait()
+        return job
+
+    async def acquire_async(self, name: str) -> MediaJob:
+        """Wait for a slot without blocking the event loop."""
+        job = MediaJob(next(self._ids), name)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job._future = (loop, future)
+        with self._lock:
+            self._enqueue(job)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = job in self._queue
+                if queued:
+                    self._queue.remove(job)
+            if not queued:
+                # The slot was granted while we were being cancelled
+                self._release(job)
+            raise
+        return job
+
+    def try_acquire(self, name: str) -> MediaJob | None:
+        """Take a slot only if one is free right now (never queues)."""
+        job = MediaJob(next(self._ids), name)
+        job._event = threading.Event()
+        with self._lock:
+            if self._queue or len(self._running) >= self.concurrency:
+                return None
+            self._grant(job)
+        return job
+
+    def release(self, job: MediaJob, failed: bool = False) -> None:
+        """Give a slot back (for callers that manage their own process)."""
+        with self._lock:
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+        self._release(job)
+
+    # --- Processes -----------------------------------------------------
+
+    def prepare_command(self, command: List[str]) -> List[str]:
+        """Apply the per-job FFmpeg thread limit."""
+        if command and command[0] == "ffmpeg" and "-threads" not in command:
+            return [command[0], "-threads", str(self.threads_per_job), *command[1:]]
+        return command
+
+    def lower_priority(self, pid: int) -> None:
+        """Renice a media process so request handling wins CPU contention."""
+        if settings.MEDIA_JOB_NICE <= 0:
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, pid, settings.MEDIA_JOB_NICE)
+        except (OSError, AttributeError):
+            pass
+
+    def _execute(self, command: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """Run a process to completion, like subprocess.run(capture_output=True, text=True)."""
+        with subprocess.Popen(
+            self.prepare_command(command),
+            stdin=subprocess.DEVNULL,  # FFmpeg otherwise reads interactive keys from the server's stdin
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        ) as process:
+            self.lower_priority(process.pid)
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                with self._lock:
+                    self._timed_out += 1
+                raise
+            return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    def _execute_with_progress(
+        self,
+        command: List[str],
+        timeout: float,
+        on_progress: Callable[[Dict[str, str]], None]
+    ) -> subprocess.CompletedProcess:
+        """
+        Run FFmpeg with machine-readable progress on stdout.
+
+        FFmpeg writes key=value lines to pipe:1 and ends each block with
+        progress=continue|end; on_progress receives every completed block.
+        stderr is drained on a helper thread so neither pipe can fill up.
+        """
+        command = [command[0], "-progress", "pipe:1", "-nostats", *command[1:]]
+        with subprocess.Popen(
+            self.prepare_command(command),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        ) as process:
+            self.lower_priority(process.pid)
+
+            stderr_lines: List[str] = []
+            stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+            stderr_reader.start()
+
+            timed_out = threading.Event()
+
+            def kill_on_timeout():
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(timeout, kill_on_timeout)
+            timer.start()
+            try:
+                block: Dict[str, str] = {}
+                for line in process.stdout:
+                    key, sep, value = line.strip().partition("=")
+                    if not sep:
+                        continue
+                    block[key] = value
+                    if key == "progress":
+                        try:
+                            on_progress(block)
+                        except Exception as e:
+                            print(f"⚠️ Media progress callback failed: {e}")
+                        block = {}
+                process.wait()
+            finally:
+                timer.cancel()
+            stderr_reader.join()
+
+            stderr = "".join(stderr_lines)
+            if timed_out.is_set():
+                with self._lock:
+                    self._timed_out += 1
+                raise subprocess.TimeoutExpired(command, timeout, stderr=stderr)
+            return subprocess.CompletedProcess(command, process.returncode, "", stderr)
+
+    def _run_with_slot(
+        self,
+        job: MediaJob,
+        command: List[str],
+        timeout: float,
+        on_progress: Callable[[Dict[str, str]], None] | None = None
+    ) -> subprocess.CompletedProcess:
+        failed = True
+        try:
+            if on_progress is not None:
+                result = self._execute_with_progress(command, timeout, on_progress)
+            else:
+                result = self._execute(command, timeout)
+            failed = result.returncode != 0
+            return result
+        finally:
+            self.release(job, failed=failed)
+
+    def run(
+        self,
+        name: str,
+        command: List[str],
+        timeout: float,
+        on_progress: Callable[[Dict[str, str]], None] | None = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a media command, waiting for a slot first.
+
+        Blocking - call from worker threads only.
+
+        Args:
+            name: Job label shown in the queue snapshot
+            command: FFmpeg/ffprobe argument list
+            timeout: Seconds the process may run (queue time not included)
+            on_progress: FFmpeg only - called (from a worker thread) with each
+                -progress block, e.g. {"out_time_us": "...", "speed": "12.1x", "progress": "continue"}
+
+        Returns:
+            CompletedProcess with text stdout/stderr (stdout is empty with on_progress)
+
+        Raises:
+            subprocess.TimeoutExpired: The process was killed after timeout
+            FileNotFoundError: The binary is not installed
+        """
+        job = self.acquire(name)
+        return self._run_with_slot(job, command, timeout, on_progress)
+
+    async def run_async(
+        self,
+        name: str,
+        command: List[str],
+        timeout: float,
+        on_progress: Callable[[Dict[str, str]], None] | None = None
+    ) -> subprocess.CompletedProcess:
+        """Async variant of run(): queues on the event loop, runs in a worker thread."""
+        job = await self.acquire_async(name)
+        return await asyncio.to_thread(self._run_with_slot, job, command, timeout, on_progress)
+
+    def snapshot(self) -> dict:
+        """Executor state for the metrics endpoint."""
+        now = datetime.utcnow()
+        with self._lock:
+            started = self._completed + self._failed + len(self._running)
+            return {
+                "concurrency": self.concurrency,
+                "threads_per_job": self.threads_per_job,
+                "nice": settings.MEDIA_JOB_NICE,
+                "available_cpus": available_cpus(),
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+                "avg_wait_seconds": self._total_wait_seconds / started if started else 0.0,
+                "running": [
+                    {
+                        "name": job.name,
+                        "running_seconds": (now - job.started_at).total_seconds()
+                    }
+                    for job in self._running.values()
+                ],
+                "queued": [
+                    {
+                        "position": position,
+                        "name": job.name,
+                        "waiting_seconds": (now - job.enqueued_at).total_seconds()
+                    }
+                    for position, job in enumerate(self._queue, start=1)
+                ],
+            }
+
+
+# Global executor shared by all media commands
+media_executor = MediaJobExecutor()
@@ -0,0 +1,364 @@
+"""
+Media metadata probing with a persistent cache.
+
+Answers "how long is this file, and what is in it" without starting a
+subprocess whenever possible:
+- Canonical PCM WAV files (everything extract_audio produces) are parsed
+  natively from the RIFF header - a few hundred bytes, microseconds
+- Other containers fall back to a single ffprobe call that collects
+  duration, codecs, channels and sample rate at once
+
+Results are cached by (path, size, mtime): in memory (LRU) for the hot
+paths, and in a small SQLite database under storage/ so they survive
+restarts. A rewritten file changes size or mtime and is simply probed
+again.
+"""
+
+import io
+import json
+import sqlite3
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Tuple
+
+from core.config import settings
+from core.media_jobs import media_executor
+from core.storage import STORAGE_DIR
+
+
+# Persistent cache location
+METADATA_CACHE_PATH = STORAGE_DIR / "metadata.sqlite3"
+
+# WAV format tags -> ffprobe-style codec names
+_WAV_FORMAT_PCM = 0x0001
+_WAV_FORMAT_FLOAT = 0x0003
+_WAV_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Largest RIFF chunk we read into memory while walking the header
+_MAX_HEADER_CHUNK = 64 * 1024
+
+# Data chunk size written by encoders that could not seek back to patch it
+_UNKNOWN_DATA_SIZE = 0xFFFFFFFF
+
+
+class MediaInfo:
+    """Facts about a media file, from one probe."""
+
+    def __init__(
+        self,
+        duration: float | None,
+        format_name: str | None = None,
+        audio_codec: str | None = None,
+        channels: int | None = None,
+        sample_rate: int | None = None,
+        bits_per_sample: int | None = None,
+        bit_rate: int | None = None,
+        has_video: bool = False,
+        source: str = "ffprobe",
+        data_offset: int | None = None
+    ):
+        self.duration = duration
+        self.format_name = format_name
+        self.audio_codec = audio_codec
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+        self.bit_rate = bit_rate
+        self.has_video = has_video
+        self.source = source
+        # WAV only: byte offset of the PCM samples (for memory-mapping)
+        self.data_offset = data_offset
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MediaInfo":
+        return cls(**data)
+
+
+# In-memory LRU: (path, size, mtime_ns) -> MediaInfo
+_cache: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+_cache_lock = threading.Lock()
+_db_lock = threading.Lock()
+_db_ready = False
+
+# Counters for the metrics endpoint
+_stats = {"memory_hits": 0, "disk_hits": 0, "wav_probes": 0, "ffprobe_probes": 0, "failures": 0}
+
+
+def _wav_codec(format_tag: int, bits: int) -> str | None:
+    if format_tag == _WAV_FORMAT_PCM:
+        return "pcm_u8" if bits == 8 else f"pcm_s{bits}le"
+    if format_tag == _WAV_FORMAT_FLOAT:
+        return f"pcm_f{bits}le"
+    return None
+
+
+def _parse_wav(f: BinaryIO, file_size: int) -> MediaInfo | None:
+    """Walk RIFF chunks from the start of f up to the data chunk."""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[0:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id, chunk_size = header[0:4], struct.unpack("<I", header[4:8])[0]
+
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or chunk_size > _MAX_HEADER_CHUNK:
+                return None
+            body = f.read(chunk_size)
+            if len(body) < 16:
+                return None
+            format_tag, channels, sample_rate, byte_rate, _block_align, bits = struct.unpack("<HHIIHH", body[:16])
+            if format_tag == _WAV_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # First two bytes of the sub-format GUID carry the real format tag
+                format_tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (format_tag, channels, sample_rate, byte_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            format_tag, channels, sample_rate, byte_rate, bits = fmt
+            codec = _wav_codec(format_tag, bits)
+            if codec is None or byte_rate == 0:
+                return None
+            data_offset = f.tell()
+            available = max(0, file_size - data_offset)
+            data_size = available if chunk_size == _UNKNOWN_DATA_SIZE else min(chunk_size, available)
+            return MediaInfo(
+                duration=data_size / byte_rate,
+                format_name="wav",
+                audio_codec=codec,
+                channels=channels,
+                sample_rate=sample_rate,
+                bits_per_sample=bits,
+                bit_rate=byte_rate * 8,
+                has_video=False,
+                source="wav_header",
+                data_offset=data_offset
+            )
+        else:
+            # Chunks are word-aligned
+            f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def probe_wav(file_path: Path) -> MediaInfo | None:
+    """
+    Read duration and format from a RIFF/WAVE header.
+
+    Walks the chunk list up to the data chunk, so files with LIST/fact
+    chunks before the audio are handled. Returns None for anything that
+    is not plain PCM/float WAV (compressed WAV, RF64, truncated headers),
+    letting the caller fall back to ffprobe.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        MediaInfo or None if the file is not a WAV we can parse
+    """
+    try:
+        file_size = file_path.stat().st_size
+        with open(file_path, "rb") as f:
+            return _parse_wav(f, file_size)
+    except (OSError, struct.error):
+        return None
+
+
+def probe_wav_head(head: bytes) -> MediaInfo | None:
+    """
+    Parse the format of a WAV from its first bytes (e.g. an upload's first chunk).
+
+    The duration only covers the bytes given.
+    """
+    try:
+        return _parse_wav(io.BytesIO(head), len(head))
+    except struct.error:
+        return None
+
+
+def probe_ffprobe(file_path: Path) -> MediaInfo | None:
+    """
+    Probe any container with a single ffprobe call.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        MediaInfo or None if ffprobe failed
+    """
+    try:
+        command = [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", "format=duration,format_name,bit_rate:stream=codec_type,codec_name,channels,sample_rate,bits_per_sample,duration",
+            "-of", "json",
+            str(file_path)
+        ]
+
+        result = media_executor.run("ffprobe", command, timeout=30)
+
+        if result.returncode != 0:
+            return None
+
+        data = json.loads(result.stdout)
+        fmt = data.get("format", {})
+        streams = data.get("streams", [])
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+        duration = fmt.get("duration") or audio.get("duration")
+        bit_rate = fmt.get("bit_rate")
+        return MediaInfo(
+            duration=float(duration) if duration else None,
+            format_name=fmt.get("format_name"),
+            audio_codec=audio.get("codec_name"),
+            channels=audio.get("channels"),
+            sample_rate=int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+            bits_per_sample=audio.get("bits_per_sample") or None,
+            bit_rate=int(bit_rate) if bit_rate else None,
+            has_video=any(s.get("codec_type") == "video" for s in streams),
+            source="ffprobe"
+        )
+
+    except Exception:
+        return None
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the persistent cache (creating it on first use)."""
+    global _db_ready
+
+    conn = sqlite3.connect(METADATA_CACHE_PATH, timeout=5)
+    if not _db_ready:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS media_metadata ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, info TEXT NOT NULL)"
+        )
+        _db_ready = True
+    return conn
+
+
+def _load_persisted(key: Tuple[str, int, int]) -> MediaInfo | None:
+    try:
+        with _db_lock:
+            conn = _connect()
+            try:
+                row = conn.execute(
+                    "SELECT info FROM media_metadata WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    key
+                ).fetchone()
+            finally:
+                conn.close()
+        return MediaInfo.from_dict(json.loads(row[0])) if row else None
+    except (sqlite3.Error, ValueError, TypeError) as e:
+        print(f"⚠️ Metadata cache: read failed: {e}")
+        return None
+
+
+def _persist(key: Tuple[str, int, int], info: MediaInfo) -> None:
+    try:
+        with _db_lock:
+            conn = _connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO media_metadata (path, size, mtime_ns, info) VALUES (?, ?, ?, ?)",
+                        (*key, json.dumps(info.to_dict()))
+                    )
+            finally:
+                conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Metadata cache: write failed: {e}")
+
+
+def _count(name: str) -> None:
+    with _cache_lock:
+        _stats[name] += 1
+
+
+def _remember(key: Tuple[str, int, int], info: MediaInfo) -> None:
+    with _cache_lock:
+        _cache[key] = info
+        _cache.move_to_end(key)
+        while len(_cache) > settings.MEDIA_METADATA_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def probe_media(file_path: Path) -> MediaInfo | None:
+    """
+    Get metadata for a media file, using the cache when it is still valid.
+
+    Args:
+        file_path: Path to the media file
+
+    Returns:
+        MediaInfo or None if the file is missing or cannot be probed
+    """
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+
+    key = (str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+    with _cache_lock:
+        info = _cache.get(key)
+        if info is not None:
+            _cache.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return info
+
+    info = _load_persisted(key)
+    if info is not None:
+        _count("disk_hits")
+        _remember(key, info)
+        return info
+
+    info = probe_wav(file_path)
+    if info is not None:
+        _count("wav_probes")
+    else:
+        info = probe_ffprobe(file_path)
+        if info is None:
+            _count("failures")
+            return None
+        _count("ffprobe_probes")
+
+    _remember(key, info)
+    _persist(key, info)
+    return info
+
+
+def forget_media(file_path: Path) -> None:
+    """Drop cached metadata for a file that is being deleted."""
+    path = str(file_path.resolve())
+    with _cache_lock:
+        for key in [k for k in _cache if k[0] == path]:
+            del _cache[key]
+    try:
+        with _db_lock:
+            conn = _connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM media_metadata WHERE path = ?", (path,))
+            finally:
+                conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Metadata cache: delete failed: {e}")
+
+
+def get_metadata_metrics() -> dict:
+    """
+    Snapshot of metadata cache metrics.
+
+    Returns:
+        Dict with cache size and hit/probe counters
+    """
+    with _cache_lock:
+        return {"cached_entries": len(_cache), **_stats}
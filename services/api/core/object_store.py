@@ -0,0 +1,279 @@
+"""
+Object storage backends for content-addressed blobs.
+
+ObjectStore is the interface: put (from a file, or streamed from a
+file object with multipart transfers), ranged get, download, delete,
+exists and presign. Two implementations:
+
+- LocalObjectStore: files under storage/blobs/, sharded by the first
+  two characters of the object name (<kind>/<ab>/<name>) so no
+  directory grows unbounded. This is the default and what a
+  single-node install uses.
+- S3ObjectStore: any S3-compatible service (AWS S3, MinIO for local
+  testing). Needs boto3, which is only imported when selected.
+
+With a remote backend, storage/blobs/ becomes a node-local cache: new
+blobs are uploaded in the background, and a node that lacks a file
+downloads it on first use (see core/blobs.py). API and worker nodes can
+then run without a shared volume.
+
+Object keys look like "original/<sha256>.mp4" or "audio/<key>.wav".
+"""
+
+import os
+import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO
+
+from core.config import settings
+from core.storage import BLOBS_DIR, link_or_copy
+
+
+# S3 multipart transfer tuning (parts are uploaded/downloaded concurrently)
+S3_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+S3_MULTIPART_CHUNK_SIZE = 64 * 1024 * 1024
+S3_MAX_CONCURRENCY = 8
+
+_COPY_CHUNK = 8 * 1024 * 1024
+
+
+class ObjectNotFoundError(Exception):
+    """Raised when an object does not exist in the store."""
+
+
+class ObjectStore(ABC):
+    """Interface for blob storage backends."""
+
+    # True when objects live off this machine (local files are then a cache)
+    remote = False
+
+    @abstractmethod
+    def put_file(self, key: str, path: Path) -> None:
+        """Store a local file under key (replacing any existing object)."""
+
+    @abstractmethod
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        """Store everything read from a file object under key."""
+
+    @abstractmethod
+    def get_range(self, key: str, start: int, end: int | None = None) -> bytes:
+        """Read bytes [start, end) of an object (to the end if end is None)."""
+
+    @abstractmethod
+    def download(self, key: str, path: Path) -> None:
+        """Write an object to a local file (atomically replaced)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete an object; missing objects are ignored."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether an object exists."""
+
+    @abstractmethod
+    def presign(self, key: str, expires_seconds: int = 3600) -> str | None:
+        """Time-limited URL clients can GET directly, or None if the backend has none."""
+
+
+class LocalObjectStore(ObjectStore):
+    """Sharded directory tree on the local filesystem."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path_for(self, key: str) -> Path:
+        """<root>/<kind>/<name[:2]>/<name> (matches core.storage.get_blob_path)."""
+        kind, _, name = key.rpartition("/")
+        return self.root / kind / name[:2] / name
+
+    def _temp_for(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+    def put_file(self, key: str, path: Path) -> None:
+        destination = self.path_for(key)
+        if destination.exists() and os.path.samefile(destination, path):
+            return
+        tmp_path = self._temp_for(destination)
+        try:
+            link_or_copy(path, tmp_path)
+            os.replace(tmp_path, destination)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        destination = self.path_for(key)
+        tmp_path = self._temp_for(destination)
+        try:
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(stream, f, _COPY_CHUNK)
+            os.replace(tmp_path, destination)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def get_range(self, key: str, start: int, end: int | None = None) -> bytes:
+        try:
+            with open(self.path_for(key), "rb") as f:
+                f.seek(start)
+                return f.read() if end is None else f.read(max(0, end - start))
+        except FileNotFoundError:
+            raise ObjectNotFoundError(key)
+
+    def download(self, key: str, path: Path) -> None:
+        source = self.path_for(key)
+        if not source.exists():
+            raise ObjectNotFoundError(key)
+        if path.exists() and os.path.samefile(source, path):
+            return
+        tmp_path = self._temp_for(path)
+        try:
+            link_or_copy(source, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def delete(self, key: str) -> None:
+        self.path_for(key).unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self.path_for(key).exists()
+
+    def presign(self, key: str, expires_seconds: int = 3600) -> str | None:
+        # Local files are served by the API itself
+        return None
+
+
+class S3ObjectStore(ObjectStore):
+    """S3-compatible bucket (AWS S3, MinIO, ...), via boto3."""
+
+    remote = True
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None
+    ):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("OBJECT_STORE_BACKEND=s3 requires boto3 (pip install boto3)")
+
+        if not bucket:
+            raise RuntimeError("OBJECT_STORE_BACKEND=s3 requires S3_BUCKET")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client_error = ClientError
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None
+        )
+        self._transfer = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=S3_MAX_CONCURRENCY
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _is_missing(self, error) -> bool:
+        code = error.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def put_file(self, key: str, path: Path) -> None:
+        self._client.upload_file(str(path), self.bucket, self._key(key), Config=self._transfer)
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        self._client.upload_fileobj(stream, self.bucket, self._key(key), Config=self._transfer)
+
+    def get_range(self, key: str, start: int, end: int | None = None) -> bytes:
+        byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end - 1}"
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=self._key(key), Range=byte_range)
+        except self._client_error as e:
+            if self._is_missing(e):
+                raise ObjectNotFoundError(key)
+            raise
+        return response["Body"].read()
+
+    def download(self, key: str, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._client.download_file(self.bucket, self._key(key), str(tmp_path), Config=self._transfer)
+            os.replace(tmp_path, path)
+        except self._client_error as e:
+            if self._is_missing(e):
+                raise ObjectNotFoundError(key)
+            raise
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._client_error as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+    def presign(self, key: str, expires_seconds: int = 3600) -> str | None:
+        return self._client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key)},
+            ExpiresIn=expires_seconds
+        )
+
+
+# Lazy global (boto3 is only imported when the S3 backend is selected)
+_store: ObjectStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_object_store() -> ObjectStore:
+    """
+    The configured object store (settings.OBJECT_STORE_BACKEND).
+
+    Returns:
+        LocalObjectStore over storage/blobs/, or S3ObjectStore
+
+    Raises:
+        RuntimeError: Unknown backend, or S3 selected without boto3/bucket
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = settings.OBJECT_STORE_BACKEND.lower()
+            if backend == "local":
+                _store = LocalObjectStore(BLOBS_DIR)
+            elif backend == "s3":
+                _store = S3ObjectStore(
+                    bucket=settings.S3_BUCKET,
+                    prefix=settings.S3_PREFIX,
+                    endpoint_url=settings.S3_ENDPOINT_URL,
+                    region=settings.S3_REGION,
+                    access_key_id=settings.S3_ACCESS_KEY_ID,
+                    secret_access_key=settings.S3_SECRET_ACCESS_KEY
+                )
+                print(f"🪣 Object store: s3://{settings.S3_BUCKET}/{settings.S3_PREFIX} ({settings.S3_ENDPOINT_URL or 'AWS'})")
+            else:
+                raise RuntimeError(f"Unknown OBJECT_STORE_BACKEND: {settings.OBJECT_STORE_BACKEND}")
+        return _store
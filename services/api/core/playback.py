@@ -0,0 +1,98 @@
+"""
+Compact playback renditions of session audio.
+
+The stored WAV (~115 MB per hour) is what transcription needs, not what
+a listener should download. On first playback a low-bitrate mono MP3 is
+generated from it and cached next to the WAV (see
+get_playback_file_path); later requests are served straight from disk.
+
+Constant bitrate is used on purpose: byte offset is proportional to
+time, so a player can seek to any transcript timestamp with a single
+HTTP Range request.
+"""
+
+import asyncio
+import os
+import uuid
+from pathlib import Path
+from typing import Dict
+
+from core.config import settings
+from core.media_jobs import media_executor
+
+
+# FFmpeg timeout for generating a rendition (4-hour recordings encode in a few minutes)
+RENDITION_TIMEOUT = 1800
+
+PLAYBACK_MEDIA_TYPE = "audio/mpeg"
+
+# Renditions being generated, keyed by output path (single flight per session)
+_pending: Dict[str, asyncio.Task] = {}
+
+
+class RenditionError(Exception):
+    """Raised when a playback rendition cannot be generated."""
+
+
+def _rendition_command(audio_path: Path, output_path: Path) -> list:
+    return [
+        "ffmpeg",
+        "-i", str(audio_path),
+        "-vn",
+        "-ac", "1",
+        "-ar", str(settings.PLAYBACK_SAMPLE_RATE),
+        "-codec:a", "libmp3lame",
+        "-b:a", settings.PLAYBACK_BITRATE,      # CBR: byte offset ~ time for Range seeks
+        "-f", "mp3",
+        "-y",
+        str(output_path)
+    ]
+
+
+async def _generate(audio_path: Path, output_path: Path) -> None:
+    tmp_path = output_path.with_name(f"{output_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        result = await media_executor.run_async(
+            "playback_rendition",
+            _rendition_command(audio_path, tmp_path),
+            timeout=RENDITION_TIMEOUT
+        )
+        if result.returncode != 0:
+            raise RenditionError(f"FFmpeg failed: {result.stderr[-500:] if result.stderr else 'Unknown FFmpeg error'}")
+        os.replace(tmp_path, output_path)
+    except FileNotFoundError:
+        raise RenditionError("FFmpeg not installed or not in PATH")
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+async def ensure_playback_rendition(audio_path: Path, output_path: Path) -> Path:
+    """
+    Return the playback rendition for a WAV, generating it on first use.
+
+    Concurrent requests for the same session share one FFmpeg run. A
+    rendition older than its WAV (e.g. after re-extraction) is rebuilt.
+
+    Args:
+        audio_path: Session WAV
+        output_path: Rendition path (get_playback_file_path)
+
+    Returns:
+        output_path, once it exists
+
+    Raises:
+        RenditionError: If FFmpeg failed
+    """
+    if output_path.exists() and output_path.stat().st_mtime >= audio_path.stat().st_mtime:
+        return output_path
+
+    key = str(output_path)
+    task = _pending.get(key)
+    if task is None:
+        task = asyncio.create_task(_generate(audio_path, output_path))
+        _pending[key] = task
+        task.add_done_callback(lambda _: _pending.pop(key, None))
+
+    # Shield: a listener closing the tab must not kill a shared encode
+    await asyncio.shield(task)
+    return output_path
@@ -0,0 +1,278 @@
+"""
+Process pool for CPU-bound transcript post-processing.
+
+Transforming provider output, merging overlapping chunks and rendering
+segments for API responses are pure-Python loops over thousands of
+segments. Running them inside request handlers holds the GIL and stalls
+the event loop, so they are shipped to a small pool of worker processes.
+
+Segment batches cross the process boundary in a packed columnar form
+(see pack_segments) instead of as lists of dicts, which keeps the
+pickled payload small: speaker labels are interned into a lookup table
+and timestamps travel as raw double arrays.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Tuple
+
+from core.config import settings
+
+
+# Packed segment batch: (speaker table, speaker indexes, texts, starts, ends)
+PackedSegments = Tuple[Tuple[str, ...], array, List[str], array, array]
+
+# Process pool (lazily created on first use)
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+# Execution metrics, keyed by task name
+_metrics_lock = threading.Lock()
+_pending_tasks = 0
+_task_metrics: Dict[str, Dict[str, float]] = {}
+
+
+def pack_segments(segments: List[Dict], speaker_key: str = "speaker") -> PackedSegments:
+    """
+    Pack a list of segment dicts into a compact columnar tuple.
+
+    Only speaker, text, start and end are kept - ids and formatted
+    timestamps are derived data and are rebuilt on the other side.
+
+    Args:
+        segments: Segment dicts
+        speaker_key: Key holding the speaker label ("speaker" or "speaker_id")
+
+    Returns:
+        Packed segment batch
+    """
+    speaker_table: Dict[str, int] = {}
+    speaker_idx = array("H")
+    texts = []
+    starts = array("d")
+    ends = array("d")
+
+    for seg in segments:
+        speaker = seg.get(speaker_key, "Speaker_1")
+        idx = speaker_table.get(speaker)
+        if idx is None:
+            idx = speaker_table[speaker] = len(speaker_table)
+        speaker_idx.append(idx)
+        texts.append(seg.get("text", ""))
+        starts.append(float(seg.get("start", 0.0)))
+        ends.append(float(seg.get("end", 0.0)))
+
+    return tuple(speaker_table), speaker_idx, texts, starts, ends
+
+
+def iter_packed_segments(packed: PackedSegments):
+    """
+    Iterate a packed batch as (speaker, text, start, end) tuples.
+    """
+    speakers, speaker_idx, texts, starts, ends = packed
+    for i in range(len(texts)):
+        yield speakers[speaker_idx[i]], texts[i], starts[i], ends[i]
+
+
+def _timed_call(func: Callable, args: tuple) -> Tuple[Any, float]:
+    """
+    Run a task inside a worker process and measure its execution time.
+
+    Returning the worker-side duration lets the parent separate time
+    spent waiting in the pool queue from time spent computing.
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool.
+    Creates it on first call (lazy initialization).
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.PROCESS_POOL_WORKERS or min(2, os.cpu_count() or 1)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            print(f"✅ Process pool: started {workers} workers")
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    """
+    Shuts down the process pool.
+    Should be called on application shutdown.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            print("✅ Process pool: shut down")
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a pool whose worker died so the next call starts a fresh one."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _record(name: str, wall: float, exec_time: float | None, inline: bool, failed: bool) -> None:
+    """Update per-task metrics after a call finishes."""
+    with _metrics_lock:
+        stats = _task_metrics.setdefault(name, {
+            "calls": 0,
+            "inline_calls": 0,
+            "pooled_calls": 0,
+            "errors": 0,
+            "total_exec_seconds": 0.0,
+            "max_exec_seconds": 0.0,
+            "total_wait_seconds": 0.0,
+        })
+        stats["calls"] += 1
+        if inline:
+            stats["inline_calls"] += 1
+        elif not failed:
+            stats["pooled_calls"] += 1
+        if failed:
+            stats["errors"] += 1
+        if exec_time is not None:
+            stats["total_exec_seconds"] += exec_time
+            stats["max_exec_seconds"] = max(stats["max_exec_seconds"], exec_time)
+            stats["total_wait_seconds"] += max(0.0, wall - exec_time)
+
+
+def _should_inline(size_hint: int | None) -> bool:
+    """Small batches are cheaper to process in place than to ship to a worker."""
+    return size_hint is not None and size_hint < settings.PROCESS_POOL_INLINE_THRESHOLD
+
+
+def run_cpu_bound(name: str, func: Callable, *args, size_hint: int | None = None) -> Any:
+    """
+    Run a CPU-bound function in the process pool and wait for the result.
+
+    Blocks the calling thread, so call it from worker threads (e.g. code
+    already running via asyncio.to_thread), never from the event loop.
+
+    Args:
+        name: Task name used for metrics
+        func: Module-level (picklable) function to run
+        *args: Picklable arguments
+        size_hint: Number of segments involved; small batches run inline
+
+    Returns:
+        Whatever func returns
+    """
+    global _pending_tasks
+
+    started = time.perf_counter()
+
+    if _should_inline(size_hint):
+        try:
+            result, exec_time = _timed_call(func, args)
+        except Exception:
+            _record(name, time.perf_counter() - started, None, inline=True, failed=True)
+            raise
+        _record(name, time.perf_counter() - started, exec_time, inline=True, failed=False)
+        return result
+
+    pool = get_process_pool()
+    with _metrics_lock:
+        _pending_tasks += 1
+    try:
+        result, exec_time = pool.submit(_timed_call, func, args).result()
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        _record(name, time.perf_counter() - started, None, inline=False, failed=True)
+        raise
+    except Exception:
+        _record(name, time.perf_counter() - started, None, inline=False, failed=True)
+        raise
+    finally:
+        with _metrics_lock:
+            _pending_tasks -= 1
+
+    _record(name, time.perf_counter() - started, exec_time, inline=False, failed=False)
+    return result
+
+
+async def run_cpu_bound_async(name: str, func: Callable, *args, size_hint: int | None = None) -> Any:
+    """
+    Async variant of run_cpu_bound for use inside request handlers.
+
+    The event loop stays free while the worker process computes.
+    """
+    global _pending_tasks
+
+    started = time.perf_counter()
+
+    if _should_inline(size_hint):
+        try:
+            result, exec_time = _timed_call(func, args)
+        except Exception:
+            _record(name, time.perf_counter() - started, None, inline=True, failed=True)
+            raise
+        _record(name, time.perf_counter() - started, exec_time, inline=True, failed=False)
+        return result
+
+    pool = get_process_pool()
+    loop = asyncio.get_running_loop()
+    with _metrics_lock:
+        _pending_tasks += 1
+    try:
+        result, exec_time = await loop.run_in_executor(pool, _timed_call, func, args)
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        _record(name, time.perf_counter() - started, None, inline=False, failed=True)
+        raise
+    except Exception:
+        _record(name, time.perf_counter() - started, None, inline=False, failed=True)
+        raise
+    finally:
+        with _metrics_lock:
+            _pending_tasks -= 1
+
+    _record(name, time.perf_counter() - started, exec_time, inline=False, failed=False)
+    return result
+
+
+def get_processing_metrics() -> dict:
+    """
+    Snapshot of process pool metrics.
+
+    Returns:
+        Dict with worker count, queue depth and per-task timings
+    """
+    with _pool_lock:
+        workers = _pool._max_workers if _pool is not None else 0
+
+    with _metrics_lock:
+        pending = _pending_tasks
+        tasks = {}
+        for name, stats in _task_metrics.items():
+            pooled_calls = stats["pooled_calls"]
+            completed = stats["calls"] - stats["errors"]
+            tasks[name] = {
+                **stats,
+                "avg_exec_seconds": stats["total_exec_seconds"] / completed if completed else 0.0,
+                "avg_wait_seconds": stats["total_wait_seconds"] / pooled_calls if pooled_calls else 0.0,
+            }
+
+    return {
+        "workers": workers,
+        "pending_tasks": pending,
+        "queue_depth": max(0, pending - workers),
+        "tasks": tasks,
+    }
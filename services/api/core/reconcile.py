@@ -0,0 +1,479 @@
+"""
+Reconciliation of Postgres, MongoDB and the storage directories.
+
+Several failure paths leave resources behind: a crash mid-transcription
+leaves a *_chunks directory, an interrupted upload leaves a session with
+no files (or a temp file with no session), a deleted session could leave
+its Mongo transcription, a crash while a transcription is rewritten
+leaves the old one next to the new one, and a crash between deleting a session and
+releasing its blobs leaves a ref count too high.
+
+Reconciler cross-checks the three stores and reports what it finds;
+with apply=True it also deletes the orphans. It is built to run against
+production:
+
+- Everything is scanned in batches (settings.RECONCILE_BATCH_SIZE):
+  Postgres with keyset pagination, Mongo with a projected cursor, the
+  directories with os.scandir, so memory stays bounded.
+- Anything newer than RECONCILE_GRACE_HOURS is left alone, so work in
+  flight (uploads, extraction, transcription) is never mistaken for
+  garbage.
+- Deletions are capped per run (RECONCILE_MAX_DELETIONS) and paced
+  (RECONCILE_DELETIONS_PER_SECOND); batches are separated by
+  RECONCILE_BATCH_PAUSE_SECONDS.
+
+Run it with reconcile_storage.py.
+"""
+
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+
+from core.blobs import (
+    BLOB_KIND_AUDIO, BLOB_KIND_ORIGINAL, audio_blob_key, blob_file_path, reset_blob_references
+)
+from core.config import settings
+from core.metadata import forget_media
+from core.object_store import get_object_store
+from core.storage import AUDIO_DIR, BLOB_TMP_DIR, BLOBS_DIR, CLIPS_DIR, ORIGINAL_DIR
+from db.mongo.database import get_mongo_database
+from db.postgres.database import SessionLocal
+from db.postgres.models import Session, StorageBlob, UploadSession
+
+
+# Example items kept per check in the report
+MAX_SAMPLES = 20
+
+# Suffix of the per-transcription chunk directories (core/transcription.py)
+CHUNKS_DIR_SUFFIX = "_chunks"
+
+
+class DeletionBudget:
+    """Caps the number of deletions in a run and paces them."""
+
+    def __init__(self, max_deletions: int, per_second: float):
+        self.max_deletions = max_deletions
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self.used = 0
+        self.exhausted = False
+        self._next_at = 0.0
+
+    def take(self) -> bool:
+        """Wait for the next deletion slot; False once the cap is reached."""
+        if self.used >= self.max_deletions:
+            self.exhausted = True
+            return False
+        if self.interval:
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_at = time.monotonic() + self.interval
+        self.used += 1
+        return True
+
+
+def _parse_uuid(value) -> UUID | None:
+    try:
+        return UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _mtime(path: Path) -> datetime:
+    return datetime.utcfromtimestamp(path.stat().st_mtime)
+
+
+def _size(path: Path) -> int:
+    """Size of a file, or of everything under a directory."""
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return path.stat().st_size
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        forget_media(path)
+        path.unlink(missing_ok=True)
+
+
+def _scan_files(directory: Path, sharded: bool = False) -> Iterator[Path]:
+    """Entries of a directory, or of its shard subdirectories if sharded."""
+    if not directory.is_dir():
+        return
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if sharded and entry.is_dir():
+                yield from _scan_files(Path(entry.path))
+            elif not sharded:
+                yield Path(entry.path)
+
+
+def _batches(items, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Reconciler:
+    """
+    One reconciliation run.
+
+    Usage:
+        report = Reconciler(apply=False).run()
+
+    The report has one entry per check with how many items were scanned,
+    how many are orphans (and their size), how many were deleted or
+    repaired, and a few samples.
+    """
+
+    def __init__(
+        self,
+        apply: bool = False,
+        grace_hours: int | None = None,
+        batch_size: int | None = None,
+        max_deletions: int | None = None,
+        deletions_per_second: float | None = None
+    ):
+        self.apply = apply
+        self.cutoff = datetime.utcnow() - timedelta(
+            hours=settings.RECONCILE_GRACE_HOURS if grace_hours is None else grace_hours
+        )
+        self.batch_size = batch_size or settings.RECONCILE_BATCH_SIZE
+        self.budget = DeletionBudget(
+            settings.RECONCILE_MAX_DELETIONS if max_deletions is None else max_deletions,
+            settings.RECONCILE_DELETIONS_PER_SECOND if deletions_per_second is None else deletions_per_second
+        )
+        self.checks: Dict[str, dict] = {}
+        self.errors: Dict[str, str] = {}
+
+    def _check(self, name: str) -> dict:
+        return self.checks.setdefault(name, {"scanned": 0, "orphans": 0, "bytes": 0, "fixed": 0, "samples": []})
+
+    def _orphan(self, name: str, item: str, size: int = 0) -> bool:
+        """Record an orphan; True if it should be deleted now."""
+        check = self._check(name)
+        check["orphans"] += 1
+        check["bytes"] += size
+        if len(check["samples"]) < MAX_SAMPLES:
+            check["samples"].append(item)
+        return self.apply and self.budget.take()
+
+    def _fixed(self, name: str) -> None:
+        self._check(name)["fixed"] += 1
+
+    def _pause(self) -> None:
+        if settings.RECONCILE_BATCH_PAUSE_SECONDS > 0:
+            time.sleep(settings.RECONCILE_BATCH_PAUSE_SECONDS)
+
+    def _existing_sessions(self, db, ids: List[UUID]) -> set:
+        if not ids:
+            return set()
+        return {row.id for row in db.query(Session.id).filter(Session.id.in_(ids))}
+
+    def run(self) -> dict:
+        """
+        Run every check.
+
+        A check that fails (e.g. Mongo unreachable) is reported under
+        "errors"; the others still run.
+
+        Returns:
+            Reconciliation report
+        """
+        started_at = datetime.utcnow()
+        steps: List[Tuple[str, Callable]] = [
+            ("transcriptions", self.check_transcriptions),
+            ("sessions", self.check_sessions),
+            ("blob_references", self.check_blob_references),
+            ("blob_files", self.check_blob_files),
+            ("uploads", self.check_uploads),
+            ("temp_files", self.check_temp_files),
+            ("session_files", self.check_session_files),
+        ]
+        with SessionLocal() as db:
+            for name, step in steps:
+                try:
+                    step(db)
+                except Exception as e:
+                    db.rollback()
+                    self.errors[name] = str(e)
+                    print(f"⚠️ Reconciliation check '{name}' failed: {e}")
+
+        return {
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.utcnow().isoformat(),
+            "applied": self.apply,
+            "grace_cutoff": self.cutoff.isoformat(),
+            "deletions": self.budget.used,
+            "deletion_limit_reached": self.budget.exhausted,
+            "orphans": sum(check["orphans"] for check in self.checks.values()),
+            "orphan_bytes": sum(check["bytes"] for check in self.checks.values()),
+            "checks": self.checks,
+            "errors": self.errors,
+        }
+
+    def check_transcriptions(self, db) -> None:
+        """
+        Mongo transcriptions whose session is gone, stale staging documents,
+        and completed transcriptions superseded by a newer one (a rewrite
+        that crashed before removing the old document).
+        """
+        collection = get_mongo_database().transcriptions
+        cursor = collection.find({}, {"session_id": 1, "complete": 1, "created_at": 1}).batch_size(self.batch_size)
+        check = self._check("transcriptions")
+
+        for docs in _batches(cursor, self.batch_size):
+            check["scanned"] += len(docs)
+            existing = self._existing_sessions(db, [sid for sid in (_parse_uuid(d.get("session_id")) for d in docs) if sid])
+            latest = self._latest_transcriptions(collection, [d.get("session_id") for d in docs if d.get("complete") is not False])
+            orphan_ids = []
+            for doc in docs:
+                session_id = _parse_uuid(doc.get("session_id"))
+                # A staging document older than the grace period belongs to a crashed write
+                stale = doc.get("complete") is False and (doc.get("created_at") or datetime.min) < self.cutoff
+                superseded = doc.get("complete") is not False and doc["_id"] < latest.get(doc.get("session_id"), doc["_id"])
+                if session_id not in existing or stale or superseded:
+                    if self._orphan("transcriptions", f"{doc.get('session_id')} ({doc['_id']})"):
+                        orphan_ids.append(doc["_id"])
+            if orphan_ids:
+                result = collection.delete_many({"_id": {"$in": orphan_ids}})
+                check["fixed"] += result.deleted_count
+            self._pause()
+
+    @staticmethod
+    def _latest_transcriptions(collection, session_ids: List[str]) -> Dict[str, object]:
+        """Newest completed transcription _id per session (see LATEST_TRANSCRIPTION_SORT)."""
+        if not session_ids:
+            return {}
+        rows = collection.aggregate([
+            {"$match": {"session_id": {"$in": list(set(session_ids))}, "complete": {"$ne": False}}},
+            {"$group": {"_id": "$session_id", "latest": {"$max": "$_id"}}},
+        ])
+        return {row["_id"]: row["latest"] for row in rows}
+
+    def check_sessions(self, db) -> None:
+        """
+        Sessions that never got a file (interrupted uploads) are deleted;
+        ready sessions whose files are missing are only reported.
+        """
+        check_missing = not get_object_store().remote
+        last_id = None
+        while True:
+            query = db.query(
+                Session.id, Session.status, Session.created_at, Session.original_file_path,
+                Session.audio_file_path, Session.original_blob_key, Session.original_storage_tier
+            ).order_by(Session.id).limit(self.batch_size)
+            if last_id is not None:
+                query = query.filter(Session.id > last_id)
+            rows = query.all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            self._check("sessions_without_files")["scanned"] += len(rows)
+
+            for row in rows:
+                if (
+                    row.original_file_path is None
+                    and row.audio_file_path is None
+                    and row.original_blob_key is None
+                    and row.created_at is not None
+                    and row.created_at < self.cutoff
+                ):
+                    if self._orphan("sessions_without_files", f"{row.id} ({row.status})"):
+                        db.query(Session).filter(Session.id == row.id).delete(synchronize_session=False)
+                        db.commit()
+                        get_mongo_database().transcriptions.delete_many({"session_id": str(row.id)})
+                        self._fixed("sessions_without_files")
+                    continue
+
+                if check_missing and row.status == "ready":
+                    missing = []
+                    if row.audio_file_path and not Path(row.audio_file_path).exists():
+                        missing.append("audio")
+                    if (
+                        row.original_file_path
+                        and row.original_storage_tier != "deleted"
+                        and not Path(row.original_file_path).exists()
+                    ):
+                        missing.append("original")
+                    if missing:
+                        # Needs a re-upload; never deleted automatically
+                        check = self._check("sessions_missing_files")
+                        check["orphans"] += 1
+                        if len(check["samples"]) < MAX_SAMPLES:
+                            check["samples"].append(f"{row.id} (missing {', '.join(missing)})")
+            self._pause()
+
+    def check_blob_references(self, db) -> None:
+        """Blob ref counts that disagree with the sessions pointing at the blob."""
+        last_key = None
+        while True:
+            query = db.query(StorageBlob).order_by(StorageBlob.key).limit(self.batch_size)
+            if last_key is not None:
+                query = query.filter(StorageBlob.key > last_key)
+            blobs = query.all()
+            if not blobs:
+                return
+            last_key = blobs[-1].key
+            self._check("blob_references")["scanned"] += len(blobs)
+
+            keys = [blob.key for blob in blobs]
+            references: Dict[str, int] = {}
+            for column in (Session.original_blob_key, Session.audio_blob_key):
+                for key, count in db.query(column, func.count()).filter(column.in_(keys)).group_by(column):
+                    references[key] = references.get(key, 0) + count
+
+            for blob in blobs:
+                actual = references.get(blob.key, 0)
+                # Recently referenced blobs may belong to an upload still linking its session
+                if blob.ref_count == actual or blob.last_referenced_at >= self.cutoff:
+                    continue
+                item = f"{blob.key} (ref_count {blob.ref_count}, referenced by {actual})"
+                if self._orphan("blob_references", item, blob.size_bytes if actual == 0 else 0):
+                    reset_blob_references(db, blob.key, actual)
+                    self._fixed("blob_references")
+            db.expunge_all()
+            self._pause()
+
+    def _blob_roots(self) -> List[Tuple[str, Path]]:
+        roots = [(kind, BLOBS_DIR / kind) for kind in (BLOB_KIND_ORIGINAL, BLOB_KIND_AUDIO)]
+        if settings.COLD_STORAGE_DIR:
+            roots.append((BLOB_KIND_ORIGINAL, Path(settings.COLD_STORAGE_DIR) / BLOB_KIND_ORIGINAL))
+        return roots
+
+    def check_blob_files(self, db) -> None:
+        """Files in the blob store (and cold storage) that no blob row points at."""
+        for kind, root in self._blob_roots():
+            for paths in _batches(_scan_files(root, sharded=True), self.batch_size):
+                self._check("blob_files")["scanned"] += len(paths)
+                keys = set()
+                for path in paths:
+                    base = path.name.split(".")[0]
+                    keys.add(base if kind == BLOB_KIND_ORIGINAL else audio_blob_key(base))
+                expected = {
+                    blob_file_path(blob)
+                    for blob in db.query(StorageBlob).filter(StorageBlob.key.in_(keys))
+                }
+                db.expunge_all()
+
+                for path in paths:
+                    # Leftover temp files of interrupted writes (".<name>.<hex>.tmp") match no row either
+                    if path in expected or _mtime(path) >= self.cutoff:
+                        continue
+                    if path.is_dir():
+                        if not path.name.endswith(CHUNKS_DIR_SUFFIX):
+                            continue
+                        check = "chunk_dirs"
+                    else:
+                        check = "blob_files"
+                    if self._orphan(check, str(path), _size(path)):
+                        _remove(path)
+                        self._fixed(check)
+                self._pause()
+
+    def check_uploads(self, db) -> None:
+        """Resumable uploads untouched for UPLOAD_EXPIRY_HOURS, with their temp files."""
+        expiry = datetime.utcnow() - timedelta(hours=settings.UPLOAD_EXPIRY_HOURS)
+        last_id = None
+        while True:
+            query = db.query(UploadSession).filter(UploadSession.updated_at < expiry).order_by(UploadSession.id).limit(self.batch_size)
+            if last_id is not None:
+                query = query.filter(UploadSession.id > last_id)
+            uploads = query.all()
+            if not uploads:
+                return
+            last_id = uploads[-1].id
+            self._check("uploads")["scanned"] += len(uploads)
+
+            for upload in uploads:
+                temp_path = Path(upload.temp_path)
+                holds_file = upload.status != "completed" and temp_path.exists()
+                size = temp_path.stat().st_size if holds_file else 0
+                if self._orphan("uploads", f"{upload.id} ({upload.status})", size):
+                    if holds_file:
+                        temp_path.unlink(missing_ok=True)
+                    db.delete(upload)
+                    db.commit()
+                    self._fixed("uploads")
+            db.expunge_all()
+            self._pause()
+
+    def check_temp_files(self, db) -> None:
+        """Temp files of uploads that died before they were stored."""
+        active = {
+            Path(row.temp_path)
+            for row in db.query(UploadSession.temp_path).filter(UploadSession.status.in_(("open", "completing")))
+        }
+        for paths in _batches(_scan_files(BLOB_TMP_DIR), self.batch_size):
+            self._check("temp_files")["scanned"] += len(paths)
+            for path in paths:
+                if path in active or _mtime(path) >= self.cutoff:
+                    continue
+                if self._orphan("temp_files", str(path), _size(path)):
+                    _remove(path)
+                    self._fixed("temp_files")
+            self._pause()
+
+    def check_session_files(self, db) -> None:
+        """
+        Per-session files (legacy originals/WAVs, peaks, playback
+        renditions, clips) whose session is gone, crashed transcriptions'
+        chunk directories and leftover .tmp files.
+        """
+        sources = [
+            (ORIGINAL_DIR, lambda name: name.split(".")[0]),
+            (AUDIO_DIR, lambda name: name.split(".")[0]),
+            (CLIPS_DIR, lambda name: name.split("_")[0]),
+        ]
+        for directory, session_part in sources:
+            for paths in _batches(_scan_files(directory), self.batch_size):
+                self._check("session_files")["scanned"] += len(paths)
+                owners = {path: _parse_uuid(session_part(path.name)) for path in paths}
+                existing = self._existing_sessions(db, [sid for sid in owners.values() if sid])
+
+                for path, session_id in owners.items():
+                    if _mtime(path) >= self.cutoff:
+                        continue
+                    if path.is_dir() and path.name.endswith(CHUNKS_DIR_SUFFIX):
+                        check = "chunk_dirs"
+                    elif path.suffix == ".tmp":
+                        check = "temp_files"
+                    elif session_id is not None and session_id not in existing:
+                        check = "session_files"
+                    else:
+                        continue
+                    if self._orphan(check, str(path), _size(path)):
+                        _remove(path)
+                        self._fixed(check)
+                self._pause()
+
+
+def run_reconciliation(apply: bool = False, **options) -> dict:
+    """
+    Run a reconciliation pass (see Reconciler for options).
+
+    Args:
+        apply: Delete orphans and repair ref counts; otherwise only report
+
+    Returns:
+        Reconciliation report
+    """
+    report = Reconciler(apply=apply, **options).run()
+    if apply:
+        print(f"🧹 Reconciliation: {report['orphans']} orphan(s) ({report['orphan_bytes']} bytes), {report['deletions']} deleted or repaired")
+    else:
+        print(f"🧹 Reconciliation (report only): {report['orphans']} orphan(s) ({report['orphan_bytes']} bytes)")
+    return report
@@ -0,0 +1,295 @@
+"""
+Retry policies and circuit breaker for transcription provider calls.
+
+Every call to the Sarvam AI SDK goes through call_provider(), which:
+- Retries only errors that can succeed on a second try (network failures,
+  timeouts, 408/429/5xx responses) with capped exponential backoff
+- Uses a per-operation policy (uploads and polls tolerate more attempts
+  than job creation). Calls that create or start a provider job are not
+  idempotent: they are retried only when the connection could not be
+  made, so a timed-out request never creates or starts a second job
+- Reports retryable failures to a shared circuit breaker, so a provider
+  brownout stops new work quickly instead of piling up doomed jobs.
+  Calls about a job the provider already accepted (status polls, result
+  downloads) are never rejected by the breaker: that work is still valid
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict
+
+import httpx
+import requests
+
+
+# HTTP status codes worth retrying
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# The SDK reports failed presigned uploads/downloads as RuntimeError("... failed for X: 503")
+_SDK_STATUS_PATTERN = re.compile(r"(?:Upload|Download) failed for .*: (\d{3})$")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider call is rejected because the circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"{name} circuit is open, retry in {retry_after:.0f}s")
+
+
+class RetryPolicy:
+    """
+    Exponential backoff policy for one provider operation.
+
+    Delay before attempt n (n >= 2) is base_delay * multiplier**(n-2),
+    capped at max_delay, with +/-50% jitter to avoid synchronized retries.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        connect_errors_only: bool = False
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        # Non-idempotent calls: retry only if the request never reached the provider
+        self.connect_errors_only = connect_errors_only
+
+    def delay_for(self, attempt: int) -> float:
+        """Seconds to wait after the given (1-based) failed attempt."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(delay * 0.5, delay * 1.5)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker shared by all calls to one provider.
+
+    States:
+    - closed: calls flow normally; consecutive retryable failures are counted
+    - open: calls fail fast with CircuitOpenError until recovery_timeout passes
+    - half_open: a limited number of trial calls are let through; one success
+      closes the circuit, one failure opens it again
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 60.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._times_opened = 0
+        self._rejected_calls = 0
+
+    def _refresh(self) -> None:
+        """Move open -> half_open once the recovery timeout has passed (lock held)."""
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = "half_open"
+            self._half_open_calls = 0
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a trial call through (0 if not open)."""
+        with self._lock:
+            self._refresh()
+            if self._state != "open":
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def is_open(self) -> bool:
+        """True while new work should not be started."""
+        return self.retry_after() > 0
+
+    def is_half_open(self) -> bool:
+        """True while trial calls decide whether the circuit closes again."""
+        with self._lock:
+            self._refresh()
+            return self._state == "half_open"
+
+    def before_call(self) -> None:
+        """
+        Admit or reject a call.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or the half-open trial slots are taken
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == "open":
+                self._rejected_calls += 1
+                remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                raise CircuitOpenError(self.name, max(0.0, remaining))
+            if self._state == "half_open":
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self._rejected_calls += 1
+                    raise CircuitOpenError(self.name, 1.0)
+                self._half_open_calls += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == "half_open":
+                print(f"✅ Circuit '{self.name}' closed (provider recovered)")
+            self._state = "closed"
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._times_opened += 1
+                    print(f"⚠️ Circuit '{self.name}' opened after {self._failures} failures")
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected_calls,
+            }
+
+
+# Per-operation retry policies for the Sarvam batch API
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    "create_job": RetryPolicy(max_attempts=3, base_delay=2.0, connect_errors_only=True),
+    "upload_files": RetryPolicy(max_attempts=4, base_delay=5.0, max_delay=60.0),
+    "start": RetryPolicy(max_attempts=3, base_delay=2.0, connect_errors_only=True),
+    "get_status": RetryPolicy(max_attempts=5, base_delay=2.0, max_delay=20.0),
+    "get_file_results": RetryPolicy(max_attempts=4, base_delay=2.0),
+    "download_outputs": RetryPolicy(max_attempts=4, base_delay=3.0),
+}
+DEFAULT_RETRY_POLICY = RetryPolicy(max_attempts=3)
+
+# Operations on a job the provider already accepted; the breaker never rejects them
+BREAKER_EXEMPT_OPERATIONS = {"get_status", "get_file_results", "download_outputs"}
+
+# Shared breaker for all Sarvam AI calls
+sarvam_breaker = CircuitBreaker("sarvam", failure_threshold=5, recovery_timeout=60.0)
+
+# Retry counters, keyed by operation
+_retry_counts: Dict[str, int] = {}
+_retry_counts_lock = threading.Lock()
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Decide whether a failed provider call is worth retrying.
+
+    Network-level failures and 408/425/429/5xx responses are transient;
+    authentication, validation and other 4xx errors are not.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (httpx.TransportError, requests.ConnectionError, requests.Timeout, TimeoutError, ConnectionError)):
+        return True
+
+    status_code = getattr(error, "status_code", None)
+    if status_code is None and isinstance(error, requests.HTTPError) and error.response is not None:
+        status_code = error.response.status_code
+    if status_code is None and isinstance(error, RuntimeError):
+        match = _SDK_STATUS_PATTERN.search(str(error))
+        if match:
+            status_code = int(match.group(1))
+
+    return status_code in RETRYABLE_STATUS_CODES
+
+
+def is_connect_error(error: Exception) -> bool:
+    """True if the request failed before it was sent (connection refused, DNS, connect timeout)."""
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, requests.ConnectTimeout, ConnectionRefusedError))
+
+
+def call_provider(
+    operation: str,
+    func: Callable,
+    *args,
+    breaker: CircuitBreaker = sarvam_breaker,
+    on_retry: Callable[[str, int, Exception], None] | None = None,
+    **kwargs
+) -> Any:
+    """
+    Call a provider SDK function with retries and circuit breaking.
+
+    Blocking (sleeps between attempts), so only call it from worker threads.
+
+    Args:
+        operation: Operation name, selects the retry policy (see RETRY_POLICIES)
+        func: SDK function to call
+        *args: Positional arguments for func
+        breaker: Circuit breaker guarding the provider
+        on_retry: Optional callback (operation, attempt, error) before each retry
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+
+    Raises:
+        CircuitOpenError: If the breaker rejects the call (never for
+            BREAKER_EXEMPT_OPERATIONS)
+        Exception: The last error once retries are exhausted or on a non-retryable error
+    """
+    policy = RETRY_POLICIES.get(operation, DEFAULT_RETRY_POLICY)
+    attempt = 0
+
+    while True:
+        attempt += 1
+        if operation not in BREAKER_EXEMPT_OPERATIONS:
+            breaker.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable_error(e):
+                # The provider answered - a client error says nothing about its health
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if policy.connect_errors_only and not is_connect_error(e):
+                # The request may have been processed; a retry could duplicate it
+                print(f"❌ {operation} failed and is not safe to retry: {e}")
+                raise
+            if attempt >= policy.max_attempts:
+                print(f"❌ {operation} failed after {attempt} attempts: {e}")
+                raise
+            delay = policy.delay_for(attempt)
+            print(f"⚠️ {operation} attempt {attempt}/{policy.max_attempts} failed ({e}), retrying in {delay:.1f}s")
+            with _retry_counts_lock:
+                _retry_counts[operation] = _retry_counts.get(operation, 0) + 1
+            if on_retry:
+                on_retry(operation, attempt, e)
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
+
+
+def get_provider_metrics() -> dict:
+    """
+    Snapshot of provider resilience metrics.
+
+    Returns:
+        Dict with circuit breaker state and retry counts per operation
+    """
+    with _retry_counts_lock:
+        retries = dict(_retry_counts)
+    return {
+        "sarvam": {
+            "circuit": sarvam_breaker.snapshot(),
+            "retries": retries,
+        }
+    }
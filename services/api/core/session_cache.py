@@ -0,0 +1,357 @@
+"""
+Read-through cache of session rows.
+
+Status polling, SSE streams and the media routes look a session up by
+primary key on every request, while the row itself changes a handful
+of times in its life. get_cached_session() serves those lookups from an
+in-process LRU with a TTL (SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS).
+A cache hit never checks out a database connection.
+
+Invalidation is write-through and does not depend on the caller:
+ORM hooks on every SQLAlchemy session (sync and async) record the ids of
+sessions rows flushed, and drop them from the cache once the transaction
+commits. Bulk UPDATE/DELETE statements on sessions (blob retiering,
+reconciliation) clear the whole cache. Routes, background stages and
+scripts all go through these hooks.
+
+Several API workers: set SESSION_CACHE_NOTIFY_CHANNEL. Flushes then also
+send a PostgreSQL NOTIFY (delivered only if the transaction commits),
+and each worker LISTENs on a dedicated connection and drops the ids it
+receives. If that connection is lost the cache is cleared, since
+notifications may have been missed. Without the channel, other workers
+see a change after at most the TTL.
+"""
+
+import re
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as ORMSession
+
+from core.config import settings
+from db.postgres.database import engine
+from db.postgres.models import Session
+
+
+# Payload meaning "drop everything" (bulk statements)
+_CLEAR_ALL = "*"
+
+# Ids per NOTIFY (payloads are limited to 8000 bytes)
+_IDS_PER_NOTIFY = 200
+
+# Seconds before the listener reconnects after losing its connection
+_RECONNECT_SECONDS = 5
+
+# Keys in ORMSession.info holding invalidations until commit
+_PENDING_IDS = "session_cache_ids"
+_PENDING_CLEAR = "session_cache_clear"
+
+_SESSION_COLUMNS = [attr.key for attr in Session.__mapper__.column_attrs]
+
+
+class SessionCache:
+    """
+    Thread-safe LRU of session column values, with a TTL.
+
+    Values are stored as plain dicts and handed out as new transient
+    Session objects, so no caller shares an instance with another.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[UUID, Tuple[float, Dict]]" = OrderedDict()
+        # Bumped on every invalidation; a load that started before one
+        # must not store what it read
+        self._generation = 0
+        self._counters: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stores": 0,
+            "stale_loads_dropped": 0,
+            "invalidations": 0,
+            "clears": 0,
+            "evictions": 0,
+            "notifications_received": 0,
+        }
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, session_id: UUID) -> Dict | None:
+        """Cached column values of a session, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            expires_at, values = entry
+            if expires_at <= now:
+                del self._entries[session_id]
+                self._counters["misses"] += 1
+                self._counters["expired"] += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self._counters["hits"] += 1
+            return values
+
+    def put(self, session_id: UUID, values: Dict, generation: int) -> None:
+        """
+        Store a loaded row.
+
+        Args:
+            session_id: Session UUID
+            values: Column values
+            generation: self.generation read before the row was loaded
+        """
+        with self._lock:
+            if generation != self._generation:
+                # Written (and invalidated) while we were reading it
+                self._counters["stale_loads_dropped"] += 1
+                return
+            self._entries[session_id] = (time.monotonic() + settings.SESSION_CACHE_TTL_SECONDS, values)
+            self._entries.move_to_end(session_id)
+            self._counters["stores"] += 1
+            while len(self._entries) > settings.SESSION_CACHE_SIZE:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, session_ids: Iterable[UUID]) -> None:
+        """Drop sessions from the cache."""
+        with self._lock:
+            self._generation += 1
+            for session_id in session_ids:
+                self._entries.pop(session_id, None)
+                self._counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        """Drop every session from the cache."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._counters["clears"] += 1
+
+    def count_notification(self) -> None:
+        with self._lock:
+            self._counters["notifications_received"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": settings.SESSION_CACHE_ENABLED,
+            "entries": size,
+            "max_entries": settings.SESSION_CACHE_SIZE,
+            "ttl_seconds": settings.SESSION_CACHE_TTL_SECONDS,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            **counters,
+        }
+
+
+# Global session cache
+session_cache = SessionCache()
+
+
+def _row_values(row: Session) -> Dict:
+    return {key: getattr(row, key) for key in _SESSION_COLUMNS}
+
+
+async def get_cached_session(db: AsyncSession, session_id: UUID) -> Session | None:
+    """
+    Look a session up through the cache.
+
+    For read-only use: on a hit the result is a transient Session that is
+    not attached to db, so changes to it are never saved. Routes that
+    modify a session load it with db.get() instead.
+
+    Args:
+        db: Async database session (only used on a miss)
+        session_id: Session UUID
+
+    Returns:
+        The session, or None if it does not exist
+    """
+    if not settings.SESSION_CACHE_ENABLED:
+        return await db.get(Session, session_id)
+
+    values = session_cache.get(session_id)
+    if values is not None:
+        return Session(**values)
+
+    generation = session_cache.generation
+    row = await db.get(Session, session_id)
+    if row is not None:
+        session_cache.put(session_id, _row_values(row), generation)
+    return row
+
+
+# --- Write-through invalidation ------------------------------------------
+
+def _notify(db: ORMSession, payloads: Iterable[str]) -> None:
+    """Queue NOTIFYs in the flushing transaction (sent on commit only)."""
+    connection = db.connection()
+    for payload in payloads:
+        connection.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": settings.SESSION_CACHE_NOTIFY_CHANNEL, "payload": payload}
+        )
+
+
+@event.listens_for(ORMSession, "after_flush")
+def _collect_flushed_sessions(db: ORMSession, flush_context) -> None:
+    ids = {
+        obj.id
+        for obj in (*db.new, *db.dirty, *db.deleted)
+        if isinstance(obj, Session) and obj.id is not None
+    }
+    if not ids:
+        return
+    db.info.setdefault(_PENDING_IDS, set()).update(ids)
+    if settings.SESSION_CACHE_NOTIFY_CHANNEL:
+        ids = [str(session_id) for session_id in ids]
+        _notify(db, (
+            ",".join(ids[start:start + _IDS_PER_NOTIFY])
+            for start in range(0, len(ids), _IDS_PER_NOTIFY)
+        ))
+
+
+@event.listens_for(ORMSession, "do_orm_execute")
+def _collect_bulk_statements(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if not any(mapper.class_ is Session for mapper in orm_execute_state.all_mappers):
+        return
+    db = orm_execute_state.session
+    db.info[_PENDING_CLEAR] = True
+    if settings.SESSION_CACHE_NOTIFY_CHANNEL:
+        _notify(db, [_CLEAR_ALL])
+
+
+@event.listens_for(ORMSession, "after_commit")
+def _invalidate_committed_sessions(db: ORMSession) -> None:
+    ids = db.info.pop(_PENDING_IDS, None)
+    if db.info.pop(_PENDING_CLEAR, False):
+        session_cache.clear()
+    elif ids:
+        session_cache.invalidate(ids)
+
+
+@event.listens_for(ORMSession, "after_rollback")
+def _discard_rolled_back_sessions(db: ORMSession) -> None:
+    db.info.pop(_PENDING_IDS, None)
+    db.info.pop(_PENDING_CLEAR, None)
+
+
+# --- Cross-process invalidation -------------------------------------------
+
+class InvalidationListener:
+    """
+    LISTENs on SESSION_CACHE_NOTIFY_CHANNEL and applies other workers'
+    invalidations. Runs on its own thread and connection, outside the pool.
+    """
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.connected = False
+        self.last_error: str | None = None
+
+    def start(self) -> None:
+        """Start listening. Called from the application lifespan."""
+        channel = settings.SESSION_CACHE_NOTIFY_CHANNEL
+        if not settings.SESSION_CACHE_ENABLED or not channel:
+            return
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", channel):
+            print(f"⚠️  Session cache invalidation channel disabled: invalid channel name '{channel}'")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-cache-listener", daemon=True)
+        self._thread.start()
+        print(f"✅ Session cache: listening for invalidations on '{channel}'")
+
+    def stop(self) -> None:
+        """Stop listening."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=_RECONNECT_SECONDS)
+            self._thread = None
+
+    def _run(self) -> None:
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = engine.dialect.connect(*cargs, **cparams)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {settings.SESSION_CACHE_NOTIFY_CHANNEL}")
+                # Anything changed before LISTEN took effect was not announced to us
+                session_cache.clear()
+                self.connected = True
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._apply(connection.notifies.pop(0).payload)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Session cache listener disconnected: {e}")
+                session_cache.clear()
+                self._stop.wait(_RECONNECT_SECONDS)
+            finally:
+                self.connected = False
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def _apply(payload: str) -> None:
+        session_cache.count_notification()
+        if payload == _CLEAR_ALL:
+            session_cache.clear()
+            return
+        ids = []
+        for value in payload.split(","):
+            try:
+                ids.append(UUID(value))
+            except ValueError:
+                continue
+        session_cache.invalidate(ids)
+
+    def snapshot(self) -> dict:
+        return {
+            "channel": settings.SESSION_CACHE_NOTIFY_CHANNEL or None,
+            "connected": self.connected,
+            "last_error": self.last_error,
+        }
+
+
+# Global invalidation listener (started in main.lifespan)
+invalidation_listener = InvalidationListener()
+
+
+def get_session_cache_metrics() -> dict:
+    """
+    Snapshot of session cache metrics.
+
+    Returns:
+        Dict with cache size, hit/miss counters, invalidations and the
+        state of the cross-process invalidation channel
+    """
+    return {
+        **session_cache.snapshot(),
+        "invalidation_channel": invalidation_listener.snapshot(),
+    }
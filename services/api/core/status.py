@@ -0,0 +1,72 @@
+"""
+In-process status channel for long-running session jobs.
+
+Background work (audio extraction and transcription) publishes progress
+here; the SSE and status endpoints in api/routes/sessions.py serve it
+to clients.
+"""
+
+from typing import Dict
+
+
+# Latest transcription status per session id:
+# {"step": "processing", "message": "...", "progress": 45}
+transcription_status: Dict[str, dict] = {}
+
+# Latest audio extraction status per session id:
+# {"step": "extracting", "message": "...", "progress": 45, "eta_seconds": 120, "poll_after_seconds": 12}
+extraction_status: Dict[str, dict] = {}
+
+# Bounds for the suggested polling interval
+MIN_POLL_SECONDS = 1
+MAX_POLL_SECONDS = 30
+DEFAULT_POLL_SECONDS = 2
+
+
+def poll_interval(eta_seconds: float | None) -> int:
+    """
+    Suggest how long a polling client should wait before asking again.
+    
+    Roughly a tenth of the remaining time, so long jobs are polled rarely
+    and short ones stay responsive.
+    """
+    if eta_seconds is None:
+        return DEFAULT_POLL_SECONDS
+    return int(min(MAX_POLL_SECONDS, max(MIN_POLL_SECONDS, eta_seconds / 10)))
+
+
+def set_transcription_status(session_id: str, step: str, message: str, progress: int) -> None:
+    """
+    Publish a transcription status update for a session.
+    
+    Args:
+        session_id: Session UUID (as string)
+        step: Machine-readable step name ("queued", "processing", "completed", "failed", ...)
+        message: Human-readable message
+        progress: Percentage (0-100)
+    """
+    transcription_status[session_id] = {
+        "step": step,
+        "message": message,
+        "progress": progress
+    }
+
+
+def set_extraction_status(session_id: str, step: str, message: str, progress: int, eta_seconds: float | None = None) -> None:
+    """
+    Publish an audio extraction status update for a session.
+    
+    Args:
+        session_id: Session UUID (as string)
+        step: Machine-readable step name ("uploading", "queued", "extracting", "completed", "failed")
+        message: Human-readable message
+        progress: Percentage (0-100)
+        eta_seconds: Estimated seconds until extraction finishes, if known
+    """
+    extraction_status[session_id] = {
+        "step": step,
+        "message": message,
+        "progress": progress,
+        "eta_seconds": round(eta_seconds) if eta_seconds is not None else None,
+        "poll_after_seconds": poll_interval(eta_seconds) if step not in ("completed", "failed") else None
+    }
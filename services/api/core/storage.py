@@ -5,15 +5,28 @@ Handles directory creation and file path management
 for uploaded and processed files.
 """
 
+import os
+import shutil
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
 
 # Base storage directory
 STORAGE_DIR = Path(__file__).parent.parent / "storage"
 
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/XFS/overlayfs-on-XFS)
+FICLONE = 0x40049409
+
 # Subdirectories
 ORIGINAL_DIR = STORAGE_DIR / "original"
 AUDIO_DIR = STORAGE_DIR / "audio"
+CLIPS_DIR = STORAGE_DIR / "clips"
+BLOBS_DIR = STORAGE_DIR / "blobs"
+BLOB_TMP_DIR = BLOBS_DIR / "tmp"
 
 
 def ensure_storage_directories() -> None:
@@ -25,9 +38,13 @@ def ensure_storage_directories() -> None:
     """
     ORIGINAL_DIR.mkdir(parents=True, exist_ok=True)
     AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+    CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+    BLOB_TMP_DIR.mkdir(parents=True, exist_ok=True)
     print(f"✅ Storage directories ready:")
     print(f"   - Original files: {ORIGINAL_DIR}")
     print(f"   - Audio files: {AUDIO_DIR}")
+    print(f"   - Segment clips: {CLIPS_DIR}")
+    print(f"   - Content-addressed blobs: {BLOBS_DIR}")
 
 
 def get_original_file_path(session_id: str, extension: str) -> Path:
@@ -55,3 +72,98 @@ def get_audio_file_path(session_id: str) -> Path:
         Path object for the audio WAV file
     """
     return AUDIO_DIR / f"{session_id}.wav"
+
+
+def get_peaks_file_path(session_id: str) -> Path:
+    """
+    Get the path for a session's waveform peaks file (stored next to the WAV).
+    
+    Args:
+        session_id: UUID of the session
+    
+    Returns:
+        Path object for the .peaks file
+    """
+    return AUDIO_DIR / f"{session_id}.peaks"
+
+
+def get_playback_file_path(session_id: str) -> Path:
+    """
+    Get the path for a session's compressed playback rendition (next to the WAV).
+    
+    Args:
+        session_id: UUID of the session
+    
+    Returns:
+        Path object for the .mp3 rendition
+    """
+    return AUDIO_DIR / f"{session_id}.playback.mp3"
+
+
+def get_blob_path(kind: str, key: str, extension: str) -> Path:
+    """
+    Get the path of a content-addressed blob.
+    
+    Blobs are sharded by the first two characters of their key so no
+    single directory grows unbounded.
+    
+    Args:
+        kind: Blob kind ("original" or "audio")
+        key: Content key (see core/blobs.py)
+        extension: File extension (e.g., ".mp4", ".wav")
+    
+    Returns:
+        Path object for the blob file
+    """
+    return BLOBS_DIR / kind / key[:2] / f"{key}{extension}"
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    """Copy-on-write clone (btrfs/XFS); False if the filesystem cannot."""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        destination.unlink(missing_ok=True)
+        return False
+
+
+def _hardlink(source: Path, destination: Path) -> bool:
+    try:
+        os.link(source, destination)
+        return True
+    except OSError:
+        return False
+
+
+def link_or_copy(source: Path, destination: Path, prefer_clone: bool = False) -> str:
+    """
+    Materialize `source` at `destination` as cheaply as the filesystem allows.
+    
+    Tries, in order: a hard link (no data copied), a reflink clone
+    (copy-on-write, no data copied), then a regular copy (which
+    shutil does with copy_file_range/sendfile in the kernel).
+    
+    Args:
+        source: Existing file
+        destination: Path to create (replaced if it exists)
+        prefer_clone: Never hard link - for files we do not own, where a
+            hard link would share later in-place edits (and a
+            content-addressed blob would stop matching its key).
+            Only a reflink or a copy is made.
+    
+    Returns:
+        Method used: "hardlink", "reflink" or "copy"
+    """
+    destination.unlink(missing_ok=True)
+    
+    attempts = [("reflink", _reflink)] if prefer_clone else [("hardlink", _hardlink), ("reflink", _reflink)]
+    for method, attempt in attempts:
+        if attempt(source, destination):
+            return method
+    
+    shutil.copyfile(source, destination)
+    return "copy"
@@ -8,18 +8,26 @@ Features:
 - Batch API for files up to 1 hour with speaker diarization
 - Automatic chunking only for audio > 1 hour (55-minute chunks)
 - Seamless stitching of chunk results with proper timestamps
+- Streaming generator pipeline (transform -> dedupe -> coalesce) in bounded memory
 - Live status updates via callbacks
 """
 
+import json
 import requests
 import subprocess
 import time
+import uuid
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Callable
+from collections import deque
+from typing import List, Dict, Optional, Tuple, Callable, Iterable, Iterator
 from sarvamai import SarvamAI
 
 from core.config import settings
 from core.audio import get_audio_duration
+from core.media_jobs import media_executor
+from core.processing import PackedSegments, pack_segments, iter_packed_segments, run_cpu_bound
+from core.resilience import call_provider, is_retryable_error
+from core.job_ledger import TranscriptionJobRecorder, ChunkRecorder, record_stage, switch_stage
 
 
 # Sarvam AI Batch API limits and chunking configuration
@@ -46,11 +54,16 @@ def get_sarvam_api_key() -> str:
     return settings.SARVAM_API_KEY
 
 
+class TranscriptionError(Exception):
+    """Raised by the streaming pipeline when a transcription step fails."""
+
+
 def transcribe_audio(audio_file_path: Path, status_callback=None) -> Tuple[bool, str, Optional[List[Dict]]]:
     """
     Transcribe audio file using Sarvam AI Batch API with diarization.
     
-    Only chunks audio files longer than 1 hour. Batch API can handle up to 55 minutes per job.
+    Materializing wrapper around transcribe_audio_stream for callers that
+    want the whole transcript as a list.
     
     Args:
         audio_file_path: Path to the WAV audio file
@@ -71,50 +84,109 @@ def transcribe_audio(audio_file_path: Path, status_callback=None) -> Tuple[bool,
         ]
     """
     try:
-        api_key = get_sarvam_api_key()
+        segments = list(transcribe_audio_stream(audio_file_path, status_callback=status_callback))
+        return True, f"Transcription successful: {len(segments)} segments", segments
+    except TranscriptionError as e:
+        return False, str(e), None
+    except Exception as e:
+        return False, f"Transcription failed: {str(e)}", None
+
+
+def transcribe_audio_stream(
+    audio_file_path: Path,
+    status_callback=None,
+    job_recorder: TranscriptionJobRecorder | None = None
+) -> Iterator[Dict]:
+    """
+    Transcribe audio file and yield final transcript segments as they are produced.
+    
+    Only chunks audio files longer than 1 hour. Batch API can handle up to 55 minutes per job.
+    Long recordings flow through transform -> dedupe -> same-speaker coalesce one
+    chunk at a time, so memory stays bounded by a single chunk's results.
+    
+    Args:
+        audio_file_path: Path to the WAV audio file
+        status_callback: Optional callback function for status updates (step, message, progress)
+        job_recorder: Optional job ledger entry for stage timings and chunk stats
         
-        # Validate file exists
-        if not audio_file_path.exists():
-            return False, f"Audio file not found: {audio_file_path}", None
+    Yields:
+        Transcript segments in the format documented on transcribe_audio
         
-        # Get audio duration
+    Raises:
+        TranscriptionError: If any step of the transcription fails
+    """
+    api_key = get_sarvam_api_key()
+    
+    # Validate file exists
+    if not audio_file_path.exists():
+        raise TranscriptionError(f"Audio file not found: {audio_file_path}")
+    
+    # Get audio duration
+    with record_stage(job_recorder, "probe"):
         duration = get_audio_duration(audio_file_path)
-        if duration is None:
-            return False, "Failed to get audio duration", None
-        
+    if duration is None:
+        raise TranscriptionError("Failed to get audio duration")
+    
+    if job_recorder:
+        job_recorder.audio_duration_seconds = duration
+    
+    if status_callback:
+        status_callback("analyzing", f"Audio duration: {duration/60:.1f} minutes", 5)
+    
+    # Decide if we need chunking (only for audio > 1 hour)
+    if duration <= CHUNKING_THRESHOLD:
+        # Audio is under 1 hour - process as single batch job
         if status_callback:
-            status_callback("analyzing", f"Audio duration: {duration/60:.1f} minutes", 5)
-        
-        # Decide if we need chunking (only for audio > 1 hour)
-        if duration <= CHUNKING_THRESHOLD:
-            # Audio is under 1 hour - process as single batch job
-            if status_callback:
-                status_callback("uploading", "Submitting to Sarvam Batch API...", 10)
-            return transcribe_audio_batch(audio_file_path, api_key, offset=0, status_callback=status_callback)
-        else:
-            # Audio is over 1 hour - chunk it into 55-minute segments
-            if status_callback:
-                status_callback("chunking", f"Audio is {duration/60:.1f} minutes, chunking required", 5)
-            return transcribe_audio_chunked(audio_file_path, api_key, duration, status_callback=status_callback)
-                
-    except Exception as e:
-        return False, f"Transcription failed: {str(e)}", None
+            status_callback("uploading", "Submitting to Sarvam Batch API...", 10)
+        chunk_recorder = None
+        if job_recorder:
+            job_recorder.chunk_count = 1
+            chunk_recorder = job_recorder.chunk(0, 0, duration)
+            chunk_recorder.audio_bytes = job_recorder.audio_bytes
+        success, message, segments = transcribe_audio_batch(
+            audio_file_path, api_key, offset=0, status_callback=status_callback, job_recorder=chunk_recorder
+        )
+        if not success:
+            raise TranscriptionError(message)
+        yield from segments
+    else:
+        # Audio is over 1 hour - chunk it into 55-minute segments
+        if status_callback:
+            status_callback("chunking", f"Audio is {duration/60:.1f} minutes, chunking required", 5)
+        chunk_batches = iter_chunk_segments(
+            audio_file_path, api_key, duration, status_callback=status_callback, job_recorder=job_recorder
+        )
+        yield from coalesce_speakers(dedupe_overlaps(chunk_batches))
 
 
-def transcribe_audio_chunked(audio_file_path: Path, api_key: str, total_duration: float, status_callback=None) -> Tuple[bool, str, Optional[List[Dict]]]:
+def iter_chunk_segments(
+    audio_file_path: Path,
+    api_key: str,
+    total_duration: float,
+    status_callback=None,
+    job_recorder: TranscriptionJobRecorder | None = None
+) -> Iterator[List[Dict]]:
     """
-    Transcribe long audio (>1 hour) by splitting into 55-minute chunks using Batch API.
+    Transcribe long audio (>1 hour) in 55-minute chunks, yielding each chunk's segments.
+    
+    Each chunk WAV is deleted as soon as it has been transcribed, and the
+    chunk directory is removed when the generator finishes or is closed.
     
     Args:
         audio_file_path: Path to audio file
         api_key: Sarvam API key
         total_duration: Total audio duration in seconds
         status_callback: Optional callback for status updates
+        job_recorder: Optional job ledger entry; one chunk entry is recorded per chunk
         
-    Returns:
-        Tuple of (success, message, segments)
+    Yields:
+        Non-empty segment lists, one per chunk, with absolute timestamps
+        
+    Raises:
+        TranscriptionError: If a chunk fails or no chunk produced segments
     """
-    chunks_dir = audio_file_path.parent / f"{audio_file_path.stem}_chunks"
+    # Unique per run: sessions sharing a content-addressed WAV may transcribe concurrently
+    chunks_dir = audio_file_path.parent / f"{audio_file_path.stem}_{uuid.uuid4().hex[:8]}_chunks"
     chunks_dir.mkdir(exist_ok=True)
     
     try:
@@ -127,22 +199,33 @@ def transcribe_audio_chunked(audio_file_path: Path, api_key: str, total_duration
         
         print(f"📊 Chunking {total_duration/60:.1f}min audio into {num_chunks} chunks (~55min each, {CHUNK_OVERLAP}s overlap)")
         
-        all_chunk_segments = []  # Collect segments from all chunks
+        if job_recorder:
+            job_recorder.chunk_count = num_chunks
+        
+        produced_any = False
         
         for i in range(num_chunks):
             chunk_start = i * (chunk_duration - CHUNK_OVERLAP)
             
+            chunk_recorder = job_recorder.chunk(i, chunk_start, chunk_duration + CHUNK_OVERLAP) if job_recorder else None
+            
             # Extract chunk with overlap
             chunk_path = chunks_dir / f"chunk_{i:04d}.wav"
-            success, chunk_error = extract_audio_chunk(
-                audio_file_path, 
-                chunk_path, 
-                chunk_start, 
-                chunk_duration + CHUNK_OVERLAP
-            )
+            with record_stage(chunk_recorder, "extract"):
+                success, chunk_error = extract_audio_chunk(
+                    audio_file_path, 
+                    chunk_path, 
+                    chunk_start, 
+                    chunk_duration + CHUNK_OVERLAP
+                )
             
             if not success:
-                return False, f"Failed to extract chunk {i}: {chunk_error}", None
+                if chunk_recorder:
+                    chunk_recorder.finish(False, chunk_error)
+                raise TranscriptionError(f"Failed to extract chunk {i}: {chunk_error}")
+            
+            if chunk_recorder:
+                chunk_recorder.audio_bytes = chunk_path.stat().st_size
             
             # Transcribe this chunk using batch API
             chunk_progress = 10 + int((i / num_chunks) * 80)
@@ -151,47 +234,33 @@ def transcribe_audio_chunked(audio_file_path: Path, api_key: str, total_duration
             
             print(f"   📝 Batch transcribing chunk {i+1}/{num_chunks} (offset: {format_timestamp(chunk_start)})")
             success, msg, segments = transcribe_audio_batch(
-                chunk_path, api_key, offset=chunk_start, status_callback=status_callback
+                chunk_path, api_key, offset=chunk_start, status_callback=status_callback, job_recorder=chunk_recorder
             )
+            chunk_path.unlink(missing_ok=True)
             
             if not success:
-                return False, f"Failed to transcribe chunk {i}: {msg}", None
+                raise TranscriptionError(f"Failed to transcribe chunk {i}: {msg}")
             
             if segments:
-                all_chunk_segments.append(segments)
+                produced_any = True
+                yield segments
             
             # Small delay between chunks
             if i < num_chunks - 1:
                 time.sleep(1)
         
-        # Cleanup chunks
-        for chunk_file in chunks_dir.glob("*.wav"):
-            chunk_file.unlink()
-        chunks_dir.rmdir()
-        
-        if not all_chunk_segments:
-            return False, "No segments generated from chunked transcription", None
+        if not produced_any:
+            raise TranscriptionError("No segments generated from chunked transcription")
         
-        # Merge overlapping chunks with deduplication
         if status_callback:
-            status_callback("finalizing", f"Merging {len(all_chunk_segments)} chunks...", 90)
-        
-        print(f"🔗 Merging {len(all_chunk_segments)} chunks with overlap deduplication...")
-        merged_segments = merge_overlapping_chunks(all_chunk_segments)
+            status_callback("finalizing", f"Merged {num_chunks} chunks", 90)
         
-        if status_callback:
-            status_callback("completed", f"Completed: {len(merged_segments)} segments", 100)
-        
-        message = f"Transcribed {num_chunks} chunks successfully ({total_duration/60:.1f}min total, {len(merged_segments)} final segments)"
-        return True, message, merged_segments
-        
-    except Exception as e:
-        # Cleanup on error
+    finally:
+        # Cleanup chunks (also runs if the consumer stops early)
         if chunks_dir.exists():
             for chunk_file in chunks_dir.glob("*.wav"):
                 chunk_file.unlink()
             chunks_dir.rmdir()
-        raise e
 
 
 def extract_audio_chunk(input_path: Path, output_path: Path, start_seconds: float, duration_seconds: float) -> Tuple[bool, str]:
@@ -220,10 +289,9 @@ def extract_audio_chunk(input_path: Path, output_path: Path, start_seconds: floa
             str(output_path)
         ]
         
-        result = subprocess.run(
+        result = media_executor.run(
+            "extract_chunk",
             command,
-            capture_output=True,
-            text=True,
             timeout=60  # 1 minute timeout for chunk extraction
         )
         
@@ -238,7 +306,13 @@ def extract_audio_chunk(input_path: Path, output_path: Path, start_seconds: floa
         return False, str(e)
 
 
-def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float = 0, status_callback=None) -> Tuple[bool, str, Optional[List[Dict]]]:
+def transcribe_audio_batch(
+    audio_file_path: Path,
+    api_key: str,
+    offset: float = 0,
+    status_callback=None,
+    job_recorder: ChunkRecorder | None = None
+) -> Tuple[bool, str, Optional[List[Dict]]]:
     """
     Transcribe audio using Sarvam AI Batch API with diarization and translation.
     
@@ -254,10 +328,27 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
         api_key: Sarvam API key
         offset: Time offset in seconds (for chunk stitching)
         status_callback: Optional callback for status updates
+        job_recorder: Optional chunk ledger entry (stage timings, provider job id, retries)
         
     Returns:
         Tuple of (success, message, segments)
     """
+    success, message, segments = _run_batch_job(audio_file_path, api_key, offset, status_callback, job_recorder)
+    if job_recorder:
+        job_recorder.finish(success, None if success else message)
+    return success, message, segments
+
+
+def _run_batch_job(
+    audio_file_path: Path,
+    api_key: str,
+    offset: float,
+    status_callback,
+    job_recorder: ChunkRecorder | None
+) -> Tuple[bool, str, Optional[List[Dict]]]:
+    """Body of transcribe_audio_batch (the wrapper records the outcome)."""
+    on_retry = job_recorder.record_retry if job_recorder else None
+    
     try:
         print(f"🎤 Starting batch transcription for {audio_file_path.name}")
         
@@ -273,19 +364,26 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
             status_callback("uploading", "Creating batch job...", 10)
         
         print(f"🔧 Creating batch job with diarization...")
-        job = client.speech_to_text_translate_job.create_job(
+        switch_stage(job_recorder, "create_job")
+        job = call_provider(
+            "create_job",
+            client.speech_to_text_translate_job.create_job,
             model="saaras:v2.5",
             with_diarization=True,
             num_speakers=2,  # Auto-detect up to 2 speakers
+            on_retry=on_retry,
         )
         print(f"✅ Job created: {job}")
+        if job_recorder:
+            job_recorder.provider_job_id = job.job_id
         
         # Upload audio file
         if status_callback:
             status_callback("uploading", f"Uploading {audio_file_path.name}...", 20)
         
         print(f"📤 Uploading file: {audio_file_path}")
-        job.upload_files(file_paths=[str(audio_file_path)])
+        switch_stage(job_recorder, "upload")
+        call_provider("upload_files", job.upload_files, file_paths=[str(audio_file_path)], on_retry=on_retry)
         print(f"✅ File uploaded successfully")
         
         # Start processing
@@ -293,7 +391,8 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
             status_callback("processing", "Starting transcription...", 30)
         
         print(f"🚀 Starting batch job...")
-        job.start()
+        switch_stage(job_recorder, "provider")
+        call_provider("start", job.start, on_retry=on_retry)
         print(f"✅ Job started, polling for completion...")
         
         # Poll for completion with progress updates
@@ -314,21 +413,28 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
                 print(f"❌ {error_msg}")
                 return False, error_msg, None
             
-            # Check job status
+            # Check job status (transient errors are retried with backoff by call_provider).
+            # The job is already accepted, so a brownout that outlasts the retries
+            # only delays it: keep polling until max_wait.
             try:
-                job_status_obj = job.get_status()
-                # Extract the job_state from the status object
-                if hasattr(job_status_obj, 'job_state'):
-                    job_state = job_status_obj.job_state
-                else:
-                    job_state = str(job_status_obj)
-                
-                print(f"📊 Poll #{poll_count} ({elapsed:.0f}s): Status = {job_state}")
+                job_status_obj = call_provider("get_status", job.get_status, on_retry=on_retry)
             except Exception as status_error:
-                print(f"⚠️ Error getting job status: {status_error}")
+                if not is_retryable_error(status_error):
+                    error_msg = f"Failed to get job status: {status_error}"
+                    print(f"❌ {error_msg}")
+                    return False, error_msg, None
+                print(f"⚠️ Job status unavailable ({status_error}), still polling...")
                 time.sleep(poll_interval)
                 continue
             
+            # Extract the job_state from the status object
+            if hasattr(job_status_obj, 'job_state'):
+                job_state = job_status_obj.job_state
+            else:
+                job_state = str(job_status_obj)
+            
+            print(f"📊 Poll #{poll_count} ({elapsed:.0f}s): Status = {job_state}")
+            
             # Check if job is completed (case-insensitive)
             if job_state.upper() == "COMPLETED":
                 print(f"✅ Job completed after {elapsed:.0f}s ({poll_count} polls)")
@@ -350,7 +456,7 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
                 time.sleep(poll_interval)
         
         # Job completed - verify status one more time before downloading
-        final_status = job.get_status()
+        final_status = call_provider("get_status", job.get_status, on_retry=on_retry)
         final_state = final_status.job_state if hasattr(final_status, 'job_state') else str(final_status)
         print(f"📋 Final job state before download: {final_state}")
         
@@ -358,7 +464,7 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
             # Wait a bit more if not fully completed
             print(f"⏳ Job not fully completed yet, waiting...")
             time.sleep(5)
-            final_status = job.get_status()
+            final_status = call_provider("get_status", job.get_status, on_retry=on_retry)
             final_state = final_status.job_state if hasattr(final_status, 'job_state') else str(final_status)
             print(f"📋 Status after wait: {final_state}")
             
@@ -369,8 +475,9 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
             status_callback("finalizing", "Extracting transcription results...", 85)
         
         print(f"📥 Extracting results from job...")
+        switch_stage(job_recorder, "download")
         try:
-            file_results = job.get_file_results()
+            file_results = call_provider("get_file_results", job.get_file_results, on_retry=on_retry)
             print(f"📊 File results type: {type(file_results)}")
             print(f"📊 File results keys: {file_results.keys() if isinstance(file_results, dict) else 'NOT A DICT'}")
             
@@ -404,19 +511,11 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
                         print(f"⬇️  Downloading outputs from job...")
                         import tempfile
                         import os
-                        import json
                         
                         with tempfile.TemporaryDirectory() as temp_dir:
                             # download_outputs saves files to the specified directory
-                            try:
-                                job.download_outputs(output_dir=temp_dir)
-                                print(f"✅ Downloaded outputs to {temp_dir}")
-                            except Exception as download_err:
-                                print(f"⚠️ Initial download failed: {download_err}")
-                                print(f"⏳ Waiting 3 seconds and retrying...")
-                                time.sleep(3)
-                                job.download_outputs(output_dir=temp_dir)
-                                print(f"✅ Downloaded outputs to {temp_dir} (retry succeeded)")
+                            call_provider("download_outputs", job.download_outputs, output_dir=temp_dir, on_retry=on_retry)
+                            print(f"✅ Downloaded outputs to {temp_dir}")
                             
                             # List all files in the directory
                             downloaded_files = os.listdir(temp_dir)
@@ -433,10 +532,8 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
                                     file_content = f.read()
                                 print(f"✅ Read output file, length: {len(file_content)}")
                                 
-                                # Parse the JSON content
-                                result = json.loads(file_content)
-                                print(f"✅ Parsed downloaded file as JSON")
-                                print(f"📄 Parsed keys: {result.keys() if isinstance(result, dict) else 'NOT A DICT'}")
+                                # Keep the raw JSON - it is parsed inside the worker process
+                                result = file_content
                             else:
                                 print(f"⚠️  No JSON files found in download")
                                 print(f"⚠️  Falling back to using result dict directly")
@@ -461,8 +558,12 @@ def transcribe_audio_batch(audio_file_path: Path, api_key: str, offset: float =
             status_callback("finalizing", "Processing speaker diarization...", 90)
         
         print(f"🔄 Transforming SDK response...")
+        switch_stage(job_recorder, "transform")
         try:
-            segments = transform_sarvam_sdk_response(result, offset)
+            # Rough entry count so tiny transcripts skip the process hop
+            size_hint = result.count('"transcript"') if isinstance(result, str) else None
+            packed = run_cpu_bound("transform_sarvam_sdk_response", _transform_task, result, offset, size_hint=size_hint)
+            segments = unpack_transcript_segments(packed)
             print(f"✅ Extracted {len(segments)} segments")
         except Exception as transform_error:
             error_msg = f"Failed to transform response: {str(transform_error)}"
@@ -574,6 +675,37 @@ def transform_sarvam_sdk_response(sdk_result: Dict, offset: float = 0) -> List[D
     return segments
 
 
+def _transform_task(sdk_result: Dict | str, offset: float) -> PackedSegments:
+    """
+    Process-pool task: parse (if needed) and transform one SDK result.
+    
+    Accepts the raw downloaded JSON so parsing also happens off the
+    calling process.
+    """
+    if isinstance(sdk_result, str):
+        sdk_result = json.loads(sdk_result)
+    return pack_segments(transform_sarvam_sdk_response(sdk_result, offset))
+
+
+def unpack_transcript_segments(packed: PackedSegments) -> List[Dict]:
+    """
+    Rebuild transcript segment dicts from a packed batch.
+    
+    Ids are assigned sequentially and timestamps are re-derived from start.
+    """
+    return [
+        {
+            "id": str(idx),
+            "speaker": speaker,
+            "timestamp": format_timestamp(start),
+            "text": text,
+            "start": start,
+            "end": end
+        }
+        for idx, (speaker, text, start, end) in enumerate(iter_packed_segments(packed), start=1)
+    ]
+
+
 def transform_sarvam_diarization_response(sarvam_result: Dict, offset: float = 0) -> List[Dict]:
     """
     Transform Sarvam AI diarization response into clean transcript segments.
@@ -672,13 +804,8 @@ def merge_overlapping_chunks(all_chunk_segments: List[List[Dict]]) -> List[Dict]
     """
     Merge segments from overlapping chunks, removing duplicates and ensuring continuity.
     
-    Critical for hiding chunk boundaries from the frontend.
-    
-    Logic:
-    1. Detect duplicate text in overlap regions
-    2. Remove duplicates by comparing timestamps and text similarity
-    3. Merge consecutive segments from the same speaker
-    4. Ensure speaker transitions are clean
+    Critical for hiding chunk boundaries from the frontend. List-based
+    wrapper around the dedupe_overlaps -> coalesce_speakers generators.
     
     Args:
         all_chunk_segments: List of segment lists from each chunk
@@ -692,78 +819,110 @@ def merge_overlapping_chunks(all_chunk_segments: List[List[Dict]]) -> List[Dict]
     if len(all_chunk_segments) == 1:
         return all_chunk_segments[0]
     
-    merged = []
+    return list(coalesce_speakers(dedupe_overlaps(all_chunk_segments)))
+
+
+def dedupe_overlaps(chunk_batches: Iterable[List[Dict]]) -> Iterator[Dict]:
+    """
+    Stream segments from consecutive chunks, dropping duplicates in overlap regions.
+    
+    Logic:
+    1. Detect duplicate text in overlap regions
+    2. Remove duplicates by comparing timestamps and text similarity
+    
+    Only the last 3 emitted segments are kept for comparison, so memory
+    does not grow with the length of the recording.
+    
+    Args:
+        chunk_batches: Segment lists, one per chunk, in time order
+        
+    Yields:
+        Segments with overlap duplicates removed
+    """
+    recent = deque(maxlen=3)
     
-    for chunk_idx, chunk_segments in enumerate(all_chunk_segments):
+    for chunk_idx, chunk_segments in enumerate(chunk_batches):
         if chunk_idx == 0:
-            # First chunk: add all segments
-            merged.extend(chunk_segments)
-        else:
-            # Subsequent chunks: handle overlap
-            prev_chunk_end_time = merged[-1]["end"] if merged else 0
-            overlap_start = prev_chunk_end_time - CHUNK_OVERLAP
-            
+            # First chunk: pass all segments through
             for seg in chunk_segments:
-                # Skip segments in overlap region if similar to previous
-                if seg["start"] < overlap_start + 1:  # 1s buffer
-                    # Check for duplicate by comparing text similarity
-                    is_duplicate = False
-                    for prev_seg in reversed(merged[-3:]):  # Check last 3 segments
-                        if _text_similarity(seg["text"], prev_seg["text"]) > 0.8:
-                            is_duplicate = True
-                            break
-                    
-                    if is_duplicate:
-                        continue
-                
-                merged.append(seg)
+                recent.append(seg)
+                yield seg
+            continue
+        
+        # Subsequent chunks: handle overlap
+        prev_chunk_end_time = recent[-1]["end"] if recent else 0
+        overlap_start = prev_chunk_end_time - CHUNK_OVERLAP
+        
+        for seg in chunk_segments:
+            # Skip segments in overlap region if similar to previous
+            if seg["start"] < overlap_start + 1:  # 1s buffer
+                # Check for duplicate by comparing text similarity
+                is_duplicate = any(
+                    _text_similarity(seg["text"], prev_seg["text"]) > 0.8
+                    for prev_seg in reversed(recent)
+                )
+                if is_duplicate:
+                    continue
+            
+            recent.append(seg)
+            yield seg
+
+
+def coalesce_speakers(segments: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Merge consecutive segments from the same speaker.
     
-    # Final pass: merge consecutive segments from same speaker
-    final_segments = []
+    Keeps speaker transitions clean and numbers output segments
+    sequentially. Holds at most one in-progress speaker turn.
+    
+    Args:
+        segments: Segments in time order
+        
+    Yields:
+        One segment per speaker turn
+    """
     current_speaker = None
     current_texts = []
     current_start = None
     current_end = None
+    next_id = 1
     
-    for seg in merged:
+    for seg in segments:
         if seg["speaker"] == current_speaker:
             # Same speaker: merge text
             current_texts.append(seg["text"])
             current_end = seg["end"]
-        else:
-            # Speaker changed: save previous segment
-            if current_speaker:
-                final_segments.append({
-                    "id": str(len(final_segments) + 1),
-                    "speaker": current_speaker,
-                    "timestamp": format_timestamp(current_start),
-                    "text": " ".join(current_texts),
-                    "start": current_start,
-                    "end": current_end
-                })
-            
-            # Start new segment
-            current_speaker = seg["speaker"]
-            current_texts = [seg["text"]]
-            current_start = seg["start"]
-            current_end = seg["end"]
+            continue
+        
+        # Speaker changed: emit previous turn
+        if current_speaker:
+            yield {
+                "id": str(next_id),
+                "speaker": current_speaker,
+                "timestamp": format_timestamp(current_start),
+                "text": " ".join(current_texts),
+                "start": current_start,
+                "end": current_end
+            }
+            next_id += 1
+        
+        # Start new turn
+        current_speaker = seg["speaker"]
+        current_texts = [seg["text"]]
+        current_start = seg["start"]
+        current_end = seg["end"]
     
-    # Add final segment
+    # Emit final turn
     if current_speaker:
-        final_segments.append({
-            "id": str(len(final_segments) + 1),
+        yield {
+            "id": str(next_id),
             "speaker": current_speaker,
             "timestamp": format_timestamp(current_start),
             "text": " ".join(current_texts),
             "start": current_start,
             "end": current_end
-        })
-    
-    # Re-number segments sequentially
-    for idx, seg in enumerate(final_segments, start=1):
-        seg["id"] = str(idx)
-    
-    return final_segments
+        }
+
 
 def _text_similarity(text1: str, text2: str) -> float:
     """
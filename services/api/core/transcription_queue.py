@@ -0,0 +1,339 @@
+"""
+Priority queue and worker pool for transcription jobs.
+
+Every transcription runs through this queue:
+- User-triggered jobs (POST /sessions/{id}/transcribe) get PRIORITY_USER
+- Eager jobs, enqueued automatically when an upload becomes ready
+  (settings.EAGER_TRANSCRIPTION), get PRIORITY_EAGER and are limited to
+  settings.EAGER_TRANSCRIPTION_MAX_CONCURRENCY running at once, so a
+  worker is always left for someone who is actively waiting
+
+Only one job per session is ever queued or running. Submitting a session
+that is already queued returns the same future, promoting it to the
+higher priority if needed, so opening a session whose eager job is still
+waiting jumps it to the front of the queue.
+
+While the provider circuit breaker is open, workers hold queued jobs
+instead of starting doomed ones. Once it half-opens, a single job is
+released as the trial; the rest wait until it closes. A job the breaker
+rejects anyway (it opened again mid-job) goes back into the queue
+rather than failing.
+"""
+
+import asyncio
+import itertools
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+from uuid import UUID
+
+from core.blobs import fetch_local_copy
+from core.config import settings
+from core.job_ledger import TranscriptionJobRecorder
+from core.resilience import CircuitOpenError, sarvam_breaker
+from core.status import set_transcription_status
+from core.transcription import transcribe_audio_stream
+from db.mongo.database import get_mongo_database
+from db.mongo.models import LATEST_TRANSCRIPTION_SORT, completed_transcription_filter, write_transcription_stream
+from db.postgres.database import SessionLocal
+from db.postgres.models import Session
+
+
+# Lower number = higher priority
+PRIORITY_USER = 0
+PRIORITY_EAGER = 10
+
+# How often held workers re-check a half-open breaker (its state
+# changes in provider threads, which do not wake the queue)
+HALF_OPEN_POLL_SECONDS = 1.0
+
+
+class QueuedTranscription:
+    """A queued or running transcription for one session."""
+
+    def __init__(self, session_id: str, priority: int, trigger: str, seq: int):
+        self.session_id = session_id
+        self.priority = priority
+        self.trigger = trigger
+        self.seq = seq
+        self.state = "queued"
+        self.enqueued_at = datetime.utcnow()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.recorder = TranscriptionJobRecorder(session_id, trigger=trigger)
+
+    @property
+    def is_eager(self) -> bool:
+        return self.priority >= PRIORITY_EAGER
+
+
+class SessionNotTranscribable(Exception):
+    """Raised when a queued session has no usable audio file."""
+
+
+def run_transcription_pipeline(session_id: str, job_recorder: TranscriptionJobRecorder, skip_if_cached: bool = False) -> int:
+    """
+    Transcribe a session's audio and stream the result into MongoDB.
+
+    Blocking - runs in a worker thread. Provider polling and uploads block,
+    and the CPU-bound post-processing inside is handed to the process pool.
+    Segments are written to MongoDB in batches as they are produced.
+
+    Args:
+        session_id: Session UUID (as string)
+        job_recorder: Ledger entry for this run
+        skip_if_cached: Return early if a completed transcription already exists
+
+    Returns:
+        Number of segments stored (or already stored, when skipped)
+
+    Raises:
+        SessionNotTranscribable: Session is missing or has no audio file
+        TranscriptionError: Provider-side failure
+        PyMongoError: Failed to save to MongoDB
+        TranscriptionStagingLost: The staging document was removed by another writer
+    """
+    transcriptions = get_mongo_database().transcriptions
+
+    if skip_if_cached:
+        existing = transcriptions.find_one(
+            completed_transcription_filter(session_id),
+            projection={"total_segments": 1},
+            sort=LATEST_TRANSCRIPTION_SORT
+        )
+        if existing:
+            return existing.get("total_segments", 0)
+
+    with SessionLocal() as db:
+        db_session = db.query(Session).filter(Session.id == UUID(session_id)).first()
+        if not db_session or not db_session.audio_file_path:
+            raise SessionNotTranscribable(f"Session {session_id} has no audio file")
+        audio_path = Path(db_session.audio_file_path)
+        title = db_session.title
+        total_duration = float(db_session.audio_duration_seconds or 0)
+
+    if not fetch_local_copy(audio_path):
+        raise SessionNotTranscribable(f"Audio file not found at: {audio_path}")
+
+    def update_status(step: str, message: str, progress: int):
+        set_transcription_status(session_id, step, message, progress)
+        print(f"📊 [{session_id}] {step}: {message} ({progress}%)")
+
+    update_status("starting", "Initializing transcription...", 0)
+
+    job_recorder.start(audio_path)
+    try:
+        segments = transcribe_audio_stream(audio_path, status_callback=update_status, job_recorder=job_recorder)
+        total = write_transcription_stream(
+            transcriptions,
+            session_id=session_id,
+            title=title,
+            segments=job_recorder.measure_producer(segments),
+            total_duration=total_duration
+        )
+    except Exception as e:
+        job_recorder.finish(False, error=str(e))
+        raise
+    job_recorder.finish(True, segment_count=total)
+    return total
+
+
+class TranscriptionQueue:
+    """
+    Priority queue of transcription jobs served by a fixed set of workers.
+
+    All state is touched only from the event loop; the blocking pipeline
+    runs via asyncio.to_thread.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, QueuedTranscription] = {}
+        self._seq = itertools.count()
+        self._cond: asyncio.Condition | None = None
+        self._workers: List[asyncio.Task] = []
+        self._eager_running = 0
+        # Job released while the breaker was half-open, until it finishes
+        self._trial_job: QueuedTranscription | None = None
+
+    async def start(self, workers: int) -> None:
+        """Start the worker tasks. Called from the application lifespan."""
+        self._cond = asyncio.Condition()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"transcription-worker-{i}")
+            for i in range(workers)
+        ]
+        print(f"✅ Transcription queue: started {workers} workers")
+
+    async def stop(self) -> None:
+        """Cancel the workers. Queued jobs are dropped."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self._jobs.values():
+            if not job.future.done():
+                job.future.cancel()
+        self._jobs.clear()
+
+    async def submit(self, session_id: UUID | str, priority: int = PRIORITY_USER, trigger: str = "user") -> asyncio.Future:
+        """
+        Enqueue a transcription, or join the one already queued/running.
+
+        Args:
+            session_id: Session UUID
+            priority: PRIORITY_USER or PRIORITY_EAGER
+            trigger: Ledger label for what caused the job ("user", "eager")
+
+        Returns:
+            Future resolving to the number of stored segments. Await it
+            through asyncio.shield() so a disconnecting client does not
+            cancel a job other requests may be waiting on.
+        """
+        session_id = str(session_id)
+
+        async with self._cond:
+            job = self._jobs.get(session_id)
+            if job is not None:
+                if priority < job.priority and job.state == "queued":
+                    print(f"⏫ Promoting queued transcription for {session_id} ({job.trigger} -> {trigger})")
+                    job.priority = priority
+                    job.trigger = trigger
+                    job.recorder.trigger = trigger
+                    self._cond.notify_all()
+                return job.future
+
+            job = QueuedTranscription(session_id, priority, trigger, next(self._seq))
+            self._jobs[session_id] = job
+            self._publish_positions()
+            self._cond.notify_all()
+            return job.future
+
+    def _queued(self) -> List[QueuedTranscription]:
+        """Queued jobs in the order workers will take them."""
+        return sorted(
+            (job for job in self._jobs.values() if job.state == "queued"),
+            key=lambda job: (job.priority, job.seq)
+        )
+
+    def _next_runnable(self) -> QueuedTranscription | None:
+        for job in self._queued():
+            if job.is_eager and self._eager_running >= settings.EAGER_TRANSCRIPTION_MAX_CONCURRENCY:
+                continue
+            return job
+        return None
+
+    def _publish_positions(self) -> None:
+        """Expose each queued job's position through the status channel."""
+        for position, job in enumerate(self._queued(), start=1):
+            set_transcription_status(job.session_id, "queued", f"Waiting for a transcription worker (position {position})", 0)
+
+    async def _take(self) -> QueuedTranscription:
+        """Wait for a runnable job while the provider circuit is closed."""
+        async with self._cond:
+            while True:
+                retry_after = sarvam_breaker.retry_after()
+                if retry_after > 0:
+                    # Provider brownout - hold queued jobs until the breaker half-opens
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=retry_after)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                half_open = sarvam_breaker.is_half_open()
+                if half_open and self._trial_job is not None:
+                    # The breaker admits one trial call; wait for its outcome
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=HALF_OPEN_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                job = self._next_runnable()
+                if job is not None:
+                    job.state = "running"
+                    if job.is_eager:
+                        self._eager_running += 1
+                    if half_open:
+                        self._trial_job = job
+                    self._publish_positions()
+                    return job
+
+                await self._cond.wait()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._take()
+            print(f"🎬 Worker {index}: transcribing {job.session_id} ({job.trigger})")
+
+            try:
+                total = await asyncio.to_thread(
+                    run_transcription_pipeline,
+                    job.session_id,
+                    job.recorder,
+                    skip_if_cached=job.is_eager
+                )
+            except CircuitOpenError as e:
+                # The breaker opened again before the provider took the job: wait for it in the queue
+                print(f"⏸️ Re-queueing transcription for {job.session_id}: {e}")
+                job.state = "queued"
+                job.recorder = TranscriptionJobRecorder(job.session_id, trigger=job.trigger)
+            except Exception as e:
+                set_transcription_status(job.session_id, "failed", str(e), 0)
+                print(f"⚠️ Transcription failed for {job.session_id} ({job.trigger}): {e}")
+                if not job.future.done():
+                    job.future.set_exception(e)
+                    # Eager jobs may have no waiter - mark the exception retrieved
+                    job.future.exception()
+            else:
+                set_transcription_status(job.session_id, "completed", f"Transcription complete: {total} segments", 100)
+                if not job.future.done():
+                    job.future.set_result(total)
+            finally:
+                async with self._cond:
+                    if job.is_eager:
+                        self._eager_running -= 1
+                    if self._trial_job is job:
+                        self._trial_job = None
+                    if job.state == "queued":
+                        self._publish_positions()
+                    else:
+                        self._jobs.pop(job.session_id, None)
+                    self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        """Queue contents for the metrics endpoint."""
+        queued = self._queued()
+        running = [job for job in self._jobs.values() if job.state == "running"]
+        return {
+            "workers": len(self._workers),
+            "eager_running": self._eager_running,
+            "running": [
+                {"session_id": job.session_id, "trigger": job.trigger}
+                for job in running
+            ],
+            "queued": [
+                {
+                    "position": position,
+                    "session_id": job.session_id,
+                    "trigger": job.trigger,
+                    "enqueued_at": job.enqueued_at.isoformat()
+                }
+                for position, job in enumerate(queued, start=1)
+            ],
+        }
+
+
+# Global queue instance (workers started in main.lifespan)
+transcription_queue = TranscriptionQueue()
+
+
+async def enqueue_eager_transcription(session_id: UUID | str) -> None:
+    """
+    Queue a background transcription for a freshly ready session.
+
+    No-op unless settings.EAGER_TRANSCRIPTION is enabled.
+    """
+    if not settings.EAGER_TRANSCRIPTION:
+        return
+    await transcription_queue.submit(session_id, priority=PRIORITY_EAGER, trigger="eager")
+    print(f"🕒 Queued eager transcription for {session_id}")
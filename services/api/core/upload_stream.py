@@ -0,0 +1,153 @@
+"""
+Streaming multipart/form-data parsing for uploads.
+
+Declaring an UploadFile parameter makes Starlette spool the whole body
+to a temporary file before the route runs; the route then reads it back
+and writes it again. Parsing the request stream here instead lets the
+route write file bytes straight to their destination as they arrive -
+one disk write per upload instead of two.
+
+Only one file field is handled; small text fields (title, hashes) are
+collected alongside it. Fields sent before the file are available when
+the file starts.
+"""
+
+from typing import AsyncIterator, Dict, List, Tuple
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+# Events yielded by StreamingUploadParser.parse()
+FILE_START = "file_start"   # payload: file name
+FILE_DATA = "file_data"     # payload: bytes (batched)
+FILE_END = "file_end"       # payload: None
+
+# Largest text field we keep in memory
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class UploadParseError(Exception):
+    """Raised for a body that is not a usable multipart/form-data upload."""
+
+
+class StreamingUploadParser:
+    """
+    Incremental parser for a multipart upload with one file field.
+
+    Usage:
+        parser = StreamingUploadParser(request.headers.get("content-type"))
+        async for event, payload in parser.parse(request.stream()):
+            ...  # FILE_START / FILE_DATA / FILE_END
+        title = parser.fields.get("title")
+
+    File bytes are yielded in batches of at least batch_size (except the
+    last), so consumers can hand large writes to a thread.
+    """
+
+    def __init__(self, content_type: str | None, file_field: str = "file", batch_size: int = 10 * 1024 * 1024):
+        media_type, options = parse_options_header(content_type or "")
+        boundary = options.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise UploadParseError("Expected a multipart/form-data body")
+
+        self.file_field = file_field
+        self.batch_size = batch_size
+        self.fields: Dict[str, str] = {}
+        self.file_name: str | None = None
+        self.file_content_type: str | None = None
+
+        self._events: List[Tuple[str, object]] = []
+        self._buffer = bytearray()
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: Dict[bytes, bytes] = {}
+        self._part: str | None = None       # "file", "field" or "skip"
+        self._field_name = ""
+        self._field_value = bytearray()
+        self._file_seen = False
+
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._part = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode(errors="replace")
+        if name == self.file_field and not self._file_seen:
+            self._part = "file"
+            self._file_seen = True
+            self.file_name = options.get(b"filename", b"").decode(errors="replace")
+            content_type = self._headers.get(b"content-type")
+            self.file_content_type = content_type.decode(errors="replace") if content_type else None
+            self._events.append((FILE_START, self.file_name))
+        elif b"filename" in options:
+            self._part = "skip"     # Extra files are ignored
+        else:
+            self._part = "field"
+            self._field_name = name
+            self._field_value.clear()
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part == "file":
+            self._buffer += data[start:end]
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+        elif self._part == "field":
+            self._field_value += data[start:end]
+            if len(self._field_value) > MAX_FIELD_SIZE:
+                raise UploadParseError(f"Form field '{self._field_name}' is too large")
+
+    def _on_part_end(self) -> None:
+        if self._part == "file":
+            self._flush()
+            self._events.append((FILE_END, None))
+        elif self._part == "field":
+            self.fields[self._field_name] = self._field_value.decode(errors="replace")
+        self._part = None
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._events.append((FILE_DATA, bytes(self._buffer)))
+            self._buffer.clear()
+
+    async def parse(self, stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Feed the request stream through the parser, yielding file events.
+
+        Raises:
+            UploadParseError: If the body is malformed
+        """
+        async for chunk in stream:
+            try:
+                self._parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadParseError(f"Malformed multipart body: {e}")
+            events, self._events = self._events, []
+            for event in events:
+                yield event
+        self._parser.finalize()
+        for event in self._events:
+            yield event
+        self._events = []
@@ -0,0 +1,181 @@
+"""
+Resumable multi-part uploads.
+
+A client creates an upload with the file size, PUTs numbered parts (in
+any order, several at once), then completes it. Every part is written
+with pwrite() straight to its offset in one preallocated temp file in
+the blob store, so completing an upload is a rename - the parts are
+never concatenated or copied.
+
+Each part carries its own sha256. A part is recorded in Postgres
+(upload_parts) only once it was fully received and matched, so a client
+whose connection dropped asks which parts are confirmed and re-sends
+only the rest. No transaction is held while a part's body arrives;
+completion instead re-hashes every part (hash_upload_file) and refuses
+an upload whose bytes no longer match what was recorded.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterator, List, Tuple
+
+from core.blobs import new_hasher
+from core.config import settings
+
+
+# Same limit as /sessions/upload (4-hour 1080p video)
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024 * 1024
+
+# Bounds for a client-chosen part size
+MIN_PART_SIZE = 1024 * 1024
+MAX_PART_SIZE = 1024 * 1024 * 1024
+
+# Most parts a single upload may have
+MAX_PART_COUNT = 10000
+
+# Body bytes collected before one write+hash in a worker thread
+WRITE_BATCH_SIZE = 8 * 1024 * 1024
+
+# Read size when re-hashing an upload on completion
+_HASH_CHUNK = 8 * 1024 * 1024
+
+
+class UploadError(Exception):
+    """Raised when a part is rejected (wrong size or checksum)."""
+
+
+def choose_part_size(file_size: int, requested: int | None = None) -> int:
+    """
+    Part size for an upload: the client's choice or settings.UPLOAD_PART_SIZE,
+    clamped to the allowed range and raised if the file would need more
+    than MAX_PART_COUNT parts.
+    """
+    part_size = min(max(requested or settings.UPLOAD_PART_SIZE, MIN_PART_SIZE), MAX_PART_SIZE)
+    return max(part_size, -(-file_size // MAX_PART_COUNT))
+
+
+def part_count_for(file_size: int, part_size: int) -> int:
+    return max(1, -(-file_size // part_size))
+
+
+def part_range(file_size: int, part_size: int, part_number: int) -> Tuple[int, int]:
+    """
+    Byte range of a 1-based part.
+
+    Returns:
+        Tuple of (offset, size)
+    """
+    offset = (part_number - 1) * part_size
+    return offset, max(0, min(part_size, file_size - offset))
+
+
+def allocate_upload_file(path: Path, file_size: int) -> None:
+    """
+    Create the file parts are written into, at its final size.
+
+    Disk space is reserved up front where the filesystem supports it, so
+    a full disk fails the create call instead of part 300 of 320.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if file_size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, file_size)
+                return
+            except OSError:
+                pass
+        os.ftruncate(fd, file_size)
+    finally:
+        os.close(fd)
+
+
+def _write_batch(path: Path, offset: int, data: bytes, hasher) -> None:
+    """
+    Hash and pwrite() one batch of part bytes (runs off the event loop).
+
+    The file is opened per batch, so a part still arriving after its
+    upload was completed (file moved) or aborted (file deleted) fails
+    with FileNotFoundError instead of writing into the moved file.
+    """
+    hasher.update(data)
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        view = memoryview(data)
+        while view:
+            count = os.pwrite(fd, view, offset)
+            view = view[count:]
+            offset += count
+    finally:
+        os.close(fd)
+
+
+async def write_part(path: Path, offset: int, expected_size: int, chunks: AsyncIterator[bytes]) -> Tuple[int, str]:
+    """
+    Write a part's body at its offset, hashing it in the same pass.
+
+    Args:
+        path: Upload file (from allocate_upload_file)
+        offset: Byte offset of the part
+        expected_size: Exact size the part must have
+        chunks: Request body chunks
+
+    Returns:
+        Tuple of (bytes written, hex sha256)
+
+    Raises:
+        UploadError: If the body is longer or shorter than expected_size
+        FileNotFoundError: The upload file is gone (completed or aborted)
+    """
+    hasher = new_hasher()
+    written = 0
+    batch: List[bytes] = []
+    batch_size = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if written + batch_size + len(chunk) > expected_size:
+            raise UploadError(f"Part is larger than {expected_size} bytes")
+        batch.append(chunk)
+        batch_size += len(chunk)
+        if batch_size >= WRITE_BATCH_SIZE:
+            await asyncio.to_thread(_write_batch, path, offset + written, b"".join(batch), hasher)
+            written += batch_size
+            batch, batch_size = [], 0
+    if batch:
+        await asyncio.to_thread(_write_batch, path, offset + written, b"".join(batch), hasher)
+        written += batch_size
+
+    if written != expected_size:
+        raise UploadError(f"Part has {written} bytes, expected {expected_size}")
+    return written, hasher.hexdigest()
+
+
+def hash_upload_file(path: Path, file_size: int, part_size: int) -> Tuple[str, List[str]]:
+    """
+    Hash a finished upload file, whole and per part, in one read
+    (blocking; run it in a thread).
+
+    Args:
+        path: Upload file
+        file_size: Upload size
+        part_size: Upload part size
+
+    Returns:
+        Tuple of (hex sha256 of the file, hex sha256 of each part in order)
+    """
+    file_hasher = new_hasher()
+    part_digests = []
+    with open(path, "rb") as f:
+        for part_number in range(1, part_count_for(file_size, part_size) + 1):
+            remaining = part_range(file_size, part_size, part_number)[1]
+            part_hasher = new_hasher()
+            while remaining:
+                chunk = f.read(min(_HASH_CHUNK, remaining))
+                if not chunk:
+                    raise UploadError(f"Upload file is shorter than {file_size} bytes")
+                file_hasher.update(chunk)
+                part_hasher.update(chunk)
+                remaining -= len(chunk)
+            part_digests.append(part_hasher.hexdigest())
+    return file_hasher.hexdigest(), part_digests
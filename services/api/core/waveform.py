@@ -0,0 +1,165 @@
+"""
+Waveform peak pyramids for the transcript editor.
+
+After audio extraction, the 16kHz mono WAV is memory-mapped and reduced
+to min/max peaks at several zoom levels, stored as one compact binary
+file next to the WAV (see get_peaks_file_path). The editor fetches the
+header plus the level it needs with HTTP Range requests, so a 4-hour
+timeline costs kilobytes instead of the ~460 MB WAV.
+
+File layout (all little-endian):
+
+    header   magic "SPKS" | version u16 | level_count u16 |
+             sample_rate u32 | total_samples u64              (20 bytes)
+    levels   level_count x (samples_per_peak u32 | peak_count u32 |
+             data_offset u64)                                  (16 bytes each)
+    data     per level: peak_count x (min i16 | max i16)
+
+Level 0 has BASE_SAMPLES_PER_PEAK samples per peak; each following
+level is LEVEL_FACTOR times coarser.
+"""
+
+import asyncio
+import os
+import struct
+import uuid
+from pathlib import Path
+from typing import List, Set
+
+import numpy as np
+
+from core.metadata import probe_wav
+from core.processing import run_cpu_bound_async
+
+
+PEAKS_MAGIC = b"SPKS"
+PEAKS_VERSION = 1
+
+# 256 samples per peak at 16kHz = 62.5 peaks per second at the finest level
+BASE_SAMPLES_PER_PEAK = 256
+LEVEL_FACTOR = 4
+MAX_LEVELS = 8
+
+# Stop adding levels once a level is this small (whole timeline in one screen)
+MIN_PEAKS_PER_LEVEL = 1024
+
+# Samples per memory-mapped window when computing the base level (32 MB of int16)
+WINDOW_SAMPLES = BASE_SAMPLES_PER_PEAK * 65536
+
+_HEADER = struct.Struct("<4sHHIQ")
+_LEVEL = struct.Struct("<IIQ")
+
+# Background peak builds in flight (keeps task references alive)
+_pending_builds: Set[asyncio.Task] = set()
+
+
+def _base_level(samples: np.ndarray) -> np.ndarray:
+    """Min/max pairs per BASE_SAMPLES_PER_PEAK samples, one window at a time."""
+    peak_count = -(-len(samples) // BASE_SAMPLES_PER_PEAK)
+    peaks = np.empty((peak_count, 2), dtype="<i2")
+
+    for start in range(0, len(samples), WINDOW_SAMPLES):
+        window = np.asarray(samples[start:start + WINDOW_SAMPLES])
+        full = len(window) // BASE_SAMPLES_PER_PEAK * BASE_SAMPLES_PER_PEAK
+        first = start // BASE_SAMPLES_PER_PEAK
+
+        if full:
+            blocks = window[:full].reshape(-1, BASE_SAMPLES_PER_PEAK)
+            peaks[first:first + len(blocks), 0] = blocks.min(axis=1)
+            peaks[first:first + len(blocks), 1] = blocks.max(axis=1)
+        if full < len(window):
+            tail = window[full:]
+            peaks[first + full // BASE_SAMPLES_PER_PEAK] = (tail.min(), tail.max())
+
+    return peaks
+
+
+def _coarser_level(peaks: np.ndarray) -> np.ndarray:
+    """Merge every LEVEL_FACTOR peaks into one (min of mins, max of maxes)."""
+    remainder = len(peaks) % LEVEL_FACTOR
+    if remainder:
+        # Pad with neutral values that never win min/max
+        padding = np.empty((LEVEL_FACTOR - remainder, 2), dtype=peaks.dtype)
+        padding[:, 0] = np.iinfo(np.int16).max
+        padding[:, 1] = np.iinfo(np.int16).min
+        peaks = np.concatenate([peaks, padding])
+    groups = peaks.reshape(-1, LEVEL_FACTOR, 2)
+    return np.stack([groups[:, :, 0].min(axis=1), groups[:, :, 1].max(axis=1)], axis=1)
+
+
+def build_peaks_file(audio_path: str, peaks_path: str) -> int:
+    """
+    Compute the peak pyramid for a 16-bit mono WAV and write the peaks file.
+
+    CPU-bound; runs in the process pool (module-level and picklable).
+    The PCM data is memory-mapped, so memory stays bounded by one window
+    regardless of recording length.
+
+    Args:
+        audio_path: Path to the extracted WAV
+        peaks_path: Destination .peaks file
+
+    Returns:
+        Size of the written file in bytes
+
+    Raises:
+        ValueError: The WAV is not 16-bit mono PCM
+    """
+    info = probe_wav(Path(audio_path))
+    if info is None or info.audio_codec != "pcm_s16le" or info.channels != 1:
+        raise ValueError(f"Waveform peaks need a 16-bit mono PCM WAV: {audio_path}")
+
+    data_bytes = int(round(info.duration * info.bit_rate / 8))
+    total_samples = data_bytes // 2
+    if total_samples:
+        samples = np.memmap(audio_path, dtype="<i2", mode="r", offset=info.data_offset, shape=(total_samples,))
+        levels: List[np.ndarray] = [_base_level(samples)]
+        del samples
+    else:
+        levels = [np.zeros((0, 2), dtype="<i2")]
+
+    while len(levels) < MAX_LEVELS and len(levels[-1]) > MIN_PEAKS_PER_LEVEL:
+        levels.append(_coarser_level(levels[-1]))
+
+    # Write to a temp file and rename, so readers never see a partial file
+    tmp_path = f"{peaks_path}.{uuid.uuid4().hex}.tmp"
+    offset = _HEADER.size + _LEVEL.size * len(levels)
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(PEAKS_MAGIC, PEAKS_VERSION, len(levels), info.sample_rate, total_samples))
+        for index, peaks in enumerate(levels):
+            f.write(_LEVEL.pack(BASE_SAMPLES_PER_PEAK * LEVEL_FACTOR ** index, len(peaks), offset))
+            offset += peaks.nbytes
+        for peaks in levels:
+            f.write(peaks.astype("<i2", copy=False).tobytes())
+    os.replace(tmp_path, peaks_path)
+    return offset
+
+
+async def ensure_peaks_file(audio_path: Path, peaks_path: Path) -> Path:
+    """
+    Return the peaks file for a WAV, building it first if needed.
+
+    A peaks file older than its WAV (e.g. after re-extraction) is rebuilt.
+    """
+    if peaks_path.exists() and peaks_path.stat().st_mtime >= audio_path.stat().st_mtime:
+        return peaks_path
+    await run_cpu_bound_async("waveform_peaks", build_peaks_file, str(audio_path), str(peaks_path))
+    return peaks_path
+
+
+def schedule_peaks_build(session_id: str, audio_path: Path, peaks_path: Path) -> None:
+    """
+    Build a session's peaks file in the background after extraction.
+
+    Failures are logged; the waveform endpoint retries on demand.
+    """
+    async def build():
+        try:
+            await ensure_peaks_file(audio_path, peaks_path)
+            print(f"🌊 Waveform peaks ready for {session_id}")
+        except Exception as e:
+            print(f"⚠️ Waveform peaks failed for {session_id}: {e}")
+
+    task = asyncio.create_task(build())
+    _pending_builds.add(task)
+    task.add_done_callback(_pending_builds.discard)
@@ -8,6 +8,11 @@ from pymongo import MongoClient
 from pymongo.database import Database
 
 from core.config import settings
+from core.db_metrics import mongo_event_listeners
+
+
+# Connections per server (pymongo's default, stated for utilization metrics)
+MONGO_MAX_POOL_SIZE = 100
 
 
 # MongoDB client (lazily connected on first use)
@@ -23,7 +28,12 @@ def get_mongo_client() -> MongoClient:
     global mongo_client
     
     if mongo_client is None:
-        mongo_client = MongoClient(settings.MONGO_URL, serverSelectionTimeoutMS=5000)
+        mongo_client = MongoClient(
+            settings.MONGO_URL,
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            event_listeners=mongo_event_listeners(MONGO_MAX_POOL_SIZE) if settings.DB_METRICS_ENABLED else None
+        )
         
         # Test connection
         try:
@@ -5,9 +5,18 @@ This module defines the data structures for storing transcriptions in MongoDB.
 Each transcription is linked to a session via session_id.
 """
 
-from typing import List, Dict
-from datetime import datetime
+import json
+from typing import List, Dict, Iterable, Tuple
+from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
+from pymongo.collection import Collection
+
+from core.config import settings
+from core.processing import PackedSegments, iter_packed_segments
+
+
+class TranscriptionStagingLost(Exception):
+    """Raised when a transcription's staging document disappears while it is being written."""
 
 
 class TranscriptSegmentMongo(BaseModel):
@@ -60,6 +69,39 @@ class TranscriptionDocument(BaseModel):
         }
 
 
+# Segments are appended to MongoDB in batches of this size while streaming
+TRANSCRIPTION_WRITE_BATCH_SIZE = 500
+
+
+def completed_transcription_filter(session_id: str) -> dict:
+    """
+    MongoDB filter matching the completed transcription for a session.
+    
+    Skips documents still being written by write_transcription_stream.
+    Documents written before streaming persistence have no "complete"
+    field and always match.
+    """
+    return {"session_id": session_id, "complete": {"$ne": False}}
+
+
+# Sort for reads/updates through completed_transcription_filter: while a
+# rewrite replaces a transcription both documents are complete for a
+# moment, and the newest (highest ObjectId) one is the current one
+LATEST_TRANSCRIPTION_SORT = [("_id", -1)]
+
+
+def segment_to_mongo(seg: dict) -> dict:
+    """
+    Convert a transcript segment from the Sarvam pipeline to MongoDB format.
+    """
+    return {
+        "speaker_id": seg.get("speaker", "Speaker_1"),
+        "text": seg.get("text", ""),
+        "start": seg.get("start", 0.0),
+        "end": seg.get("end", 0.0)
+    }
+
+
 def transcription_to_mongo_document(
     session_id: str,
     title: str,
@@ -79,22 +121,10 @@ def transcription_to_mongo_document(
         Dictionary ready for MongoDB insertion
     """
     # Transform segments to MongoDB format
-    mongo_segments = []
-    unique_speakers = set()
-    
-    for seg in segments:
-        speaker_id = seg.get("speaker", "Speaker_1")
-        unique_speakers.add(speaker_id)
-        
-        mongo_segments.append({
-            "speaker_id": speaker_id,
-            "text": seg.get("text", ""),
-            "start": seg.get("start", 0.0),
-            "end": seg.get("end", 0.0)
-        })
+    mongo_segments = [segment_to_mongo(seg) for seg in segments]
     
     # Initialize speaker_names mapping (all speakers map to themselves initially)
-    speaker_names = {speaker: speaker for speaker in unique_speakers}
+    speaker_names = {seg["speaker_id"]: seg["speaker_id"] for seg in mongo_segments}
     
     document = {
         "session_id": session_id,
@@ -114,23 +144,114 @@ def transcription_to_mongo_document(
     return document
 
 
-def get_transcription_response(transcription_doc: dict) -> dict:
+def write_transcription_stream(
+    collection: Collection,
+    session_id: str,
+    title: str,
+    segments: Iterable[dict],
+    total_duration: float,
+    batch_size: int = TRANSCRIPTION_WRITE_BATCH_SIZE
+) -> int:
     """
-    Convert MongoDB document to API response format.
+    Persist a transcription from a segment stream, writing in batches.
     
-    Applies speaker name mappings to segments.
+    The document is inserted as an incomplete staging document and
+    segments are $push-ed as they arrive, so the full transcript never
+    has to exist in memory. Once the stream is exhausted the staging
+    document is marked complete and the session's older completed
+    transcriptions are removed, along with staging documents abandoned
+    for longer than RECONCILE_GRACE_HOURS. Another run still writing
+    the same session (another API worker, a regenerate) keeps its
+    staging document. Until the cleanup both are complete; readers take
+    the newest (LATEST_TRANSCRIPTION_SORT), and reconciliation removes a
+    superseded one left behind by a crash. If the stream or a write
+    fails, the staging document is deleted and the previous
+    transcription stays untouched.
+    
+    Args:
+        collection: The transcriptions collection
+        session_id: Session UUID (as string)
+        title: Session title
+        segments: Iterable of transcript segments from the Sarvam pipeline
+        total_duration: Total audio duration
+        batch_size: Number of segments per write
+        
+    Returns:
+        Number of segments written
+    
+    Raises:
+        TranscriptionStagingLost: The staging document was deleted meanwhile
     """
-    segments = transcription_doc.get("segments", [])
-    speaker_names = transcription_doc.get("speaker_names", {})
+    document = transcription_to_mongo_document(session_id, title, [], total_duration)
+    document["complete"] = False
+    staging_id = collection.insert_one(document).inserted_id
+    
+    speaker_names = {}
+    total_segments = 0
+    batch = []
     
-    # Apply speaker mappings
+    def update_staging(update: dict) -> None:
+        if collection.update_one({"_id": staging_id}, update).matched_count == 0:
+            raise TranscriptionStagingLost(f"Transcription for {session_id} was removed while being written")
+    
+    def flush():
+        update_staging({"$push": {"segments": {"$each": batch}}})
+    
+    try:
+        for seg in segments:
+            mongo_seg = segment_to_mongo(seg)
+            speaker_names.setdefault(mongo_seg["speaker_id"], mongo_seg["speaker_id"])
+            batch.append(mongo_seg)
+            
+            if len(batch) >= batch_size:
+                flush()
+                total_segments += len(batch)
+                batch = []
+        
+        if batch:
+            flush()
+            total_segments += len(batch)
+        
+        update_staging({
+            "$set": {
+                "complete": True,
+                "total_segments": total_segments,
+                "speaker_names": speaker_names,
+                "updated_at": datetime.utcnow()
+            }
+        })
+    except BaseException:
+        collection.delete_one({"_id": staging_id})
+        raise
+    
+    # Replace the previous transcription for this session
+    abandoned_before = datetime.utcnow() - timedelta(hours=settings.RECONCILE_GRACE_HOURS)
+    collection.delete_many({
+        "session_id": session_id,
+        "$or": [
+            {"complete": {"$ne": False}, "_id": {"$lt": staging_id}},
+            {"complete": False, "created_at": {"$lt": abandoned_before}},
+        ]
+    })
+    
+    return total_segments
+
+
+def _format_segments(
+    segments: Iterable[Tuple[str, str, float, float]],
+    speaker_names: Dict[str, str]
+) -> List[dict]:
+    """
+    Format (speaker_id, text, start, end) tuples for API responses.
+    
+    Applies speaker name mappings and derives sequential ids and
+    HH:MM:SS timestamps.
+    """
     formatted_segments = []
-    for i, seg in enumerate(segments, 1):
-        speaker_id = seg.get("speaker_id", "Speaker_1")
+    for i, (speaker_id, text, start, end) in enumerate(segments, 1):
         display_name = speaker_names.get(speaker_id, speaker_id)
         
         # Format timestamp
-        start = seg.get("start", 0)
         hours = int(start // 3600)
         minutes = int((start % 3600) // 60)
         seconds = int(start % 60)
@@ -140,11 +261,31 @@ def get_transcription_response(transcription_doc: dict) -> dict:
             "id": str(i),
             "speaker": display_name,
             "timestamp": timestamp,
-            "text": seg.get("text", ""),
-            "start": seg.get("start", 0.0),
-            "end": seg.get("end", 0.0)
+            "text": text,
+            "start": start,
+            "end": end
         })
     
+    return formatted_segments
+
+
+def get_transcription_response(transcription_doc: dict) -> dict:
+    """
+    Convert MongoDB document to API response format.
+    
+    Applies speaker name mappings to segments.
+    """
+    segments = transcription_doc.get("segments", [])
+    speaker_names = transcription_doc.get("speaker_names", {})
+    
+    formatted_segments = _format_segments(
+        (
+            (seg.get("speaker_id", "Speaker_1"), seg.get("text", ""), seg.get("start", 0.0), seg.get("end", 0.0))
+            for seg in segments
+        ),
+        speaker_names
+    )
+    
     return {
         "session_id": transcription_doc.get("session_id"),
         "segments": formatted_segments,
@@ -153,3 +294,34 @@ def get_transcription_response(transcription_doc: dict) -> dict:
         "created_at": transcription_doc.get("created_at"),
         "updated_at": transcription_doc.get("updated_at")
     }
+
+
+def render_transcription_json(
+    header: dict,
+    packed: PackedSegments,
+    speaker_names: Dict[str, str],
+    segment_fields: Tuple[str, ...] | None = None
+) -> bytes:
+    """
+    Render a full transcription response body as JSON bytes.
+    
+    Process-pool task: the whole segment formatting and JSON encoding
+    happens in a worker so request handlers only ship bytes.
+    
+    Args:
+        header: JSON-ready top-level fields (session_id, timestamps, ...)
+        packed: Packed segments (see core.processing.pack_segments)
+        speaker_names: Speaker ID to display name mapping
+        segment_fields: Subset of segment keys to include (default: all)
+        
+    Returns:
+        UTF-8 encoded JSON response body
+    """
+    segments = _format_segments(iter_packed_segments(packed), speaker_names)
+    if segment_fields:
+        segments = [{key: seg[key] for key in segment_fields} for seg in segments]
+    
+    body = dict(header)
+    body["segments"] = segments
+    body["total_segments"] = len(segments)
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
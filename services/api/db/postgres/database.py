@@ -1,23 +1,40 @@
 """
 PostgreSQL database connection and session management.
 
-Creates the SQLAlchemy engine and session factory.
+Creates the SQLAlchemy engines and session factories.
 Uses connection pooling for production-ready performance.
+
+- engine / SessionLocal (psycopg2, blocking): background stages that run
+  in worker threads and scripts such as insert_dummy_data.py
+- async_engine / AsyncSessionLocal (asyncpg): the API routes, so a slow
+  query suspends its request instead of stalling the event loop
+
+Both pools report checkout waits and statement latency to
+core.db_metrics unless DB_METRICS_ENABLED is off.
 """
 
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from core.config import settings
+from core.db_metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+
 
+# Pool sizing, per engine (see GET /metrics/database before changing)
+POOL_SIZE = 5        # Number of connections to maintain
+MAX_OVERFLOW = 10    # Additional connections under load
 
 # SQLAlchemy engine with connection pooling
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # Verify connections before using
-    pool_size=5,         # Number of connections to maintain
-    max_overflow=10,     # Additional connections under load
-    echo=False           # Set to True for SQL query logging
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    echo=False,          # Set to True for SQL query logging
+    **({"poolclass": TimedQueuePool} if settings.DB_METRICS_ENABLED else {})
 )
 
 # Session factory
@@ -27,6 +44,44 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+
+def async_database_url(url: str) -> str:
+    """
+    asyncpg form of a postgresql:// URL.
+    
+    libpq's sslmode query parameter is spelled ssl for asyncpg.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.split("+")[0]
+    if scheme in ("postgres", "postgresql"):
+        scheme = "postgresql+asyncpg"
+    query = [("ssl" if key == "sslmode" else key, value) for key, value in parse_qsl(parts.query)]
+    return urlunsplit((scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+# Async engine for the API routes (same pool sizing as the sync engine)
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    echo=False,
+    **({"poolclass": TimedAsyncQueuePool} if settings.DB_METRICS_ENABLED else {})
+)
+
+if settings.DB_METRICS_ENABLED:
+    instrument_engine(engine, POOL_SIZE, MAX_OVERFLOW)
+    instrument_engine(async_engine.sync_engine, POOL_SIZE, MAX_OVERFLOW)
+
+# Async session factory. Objects stay readable after commit, since an
+# expired attribute cannot be lazily reloaded outside an await.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for all SQLAlchemy models
 Base = declarative_base()
 
@@ -5,10 +5,11 @@ Provides database session to route handlers via dependency injection.
 Ensures proper session lifecycle management (open/close).
 """
 
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db.postgres.database import SessionLocal
+from db.postgres.database import AsyncSessionLocal, SessionLocal
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -27,3 +28,19 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency that provides an async database session.
+    
+    Usage in routes:
+        @app.get("/sessions/{session_id}")
+        async def get_session(session_id: UUID, db: AsyncSession = Depends(get_async_db)):
+            return await db.get(Session, session_id)
+    
+    Queries are awaited, so other requests keep running while one waits
+    on PostgreSQL. The session is closed after the request completes.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,40 @@
+-- Transcription job ledger: one row per transcription run and per provider chunk.
+-- Used for capacity planning (processing time per audio minute, queue wait vs
+-- compute, failure rate by duration bucket).
+
+CREATE TABLE IF NOT EXISTS transcription_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    session_id UUID NOT NULL,
+    status VARCHAR NOT NULL,
+    audio_duration_seconds DOUBLE PRECISION,
+    audio_bytes BIGINT,
+    chunk_count INTEGER,
+    segment_count INTEGER,
+    retries INTEGER NOT NULL DEFAULT 0,
+    queued_at TIMESTAMP NOT NULL,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    queue_wait_seconds DOUBLE PRECISION,
+    processing_seconds DOUBLE PRECISION,
+    stage_seconds JSONB NOT NULL DEFAULT '{}'::jsonb,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_transcription_jobs_session_id ON transcription_jobs (session_id);
+CREATE INDEX IF NOT EXISTS ix_transcription_jobs_queued_at ON transcription_jobs (queued_at);
+
+CREATE TABLE IF NOT EXISTS transcription_job_chunks (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    job_id UUID NOT NULL REFERENCES transcription_jobs (id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    offset_seconds DOUBLE PRECISION NOT NULL,
+    duration_seconds DOUBLE PRECISION,
+    audio_bytes BIGINT,
+    provider_job_id VARCHAR,
+    status VARCHAR NOT NULL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    stage_seconds JSONB NOT NULL DEFAULT '{}'::jsonb,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_transcription_job_chunks_job_id ON transcription_job_chunks (job_id);
@@ -0,0 +1,4 @@
+-- Record what started each transcription run ("user" or "eager") so eager
+-- background work can be separated from user-facing latency.
+
+ALTER TABLE transcription_jobs ADD COLUMN IF NOT EXISTS trigger VARCHAR NOT NULL DEFAULT 'user';
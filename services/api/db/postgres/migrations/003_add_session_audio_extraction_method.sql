@@ -0,0 +1,5 @@
+-- Record how each session's WAV was produced, cheapest first:
+-- hardlink / reflink / copy (upload already 16kHz mono PCM WAV),
+-- remux, decode, transcode, stream_transcode (during upload).
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS audio_extraction_method VARCHAR;
@@ -0,0 +1,20 @@
+-- Content-addressed storage for originals and extracted audio.
+-- Identical uploads share one original blob (keyed by its sha256) and one
+-- derived WAV blob ("<sha256>.<recipe>"); each blob counts the sessions
+-- referencing it and is deleted when the last one goes.
+
+CREATE TABLE IF NOT EXISTS storage_blobs (
+    key VARCHAR PRIMARY KEY,
+    kind VARCHAR NOT NULL,
+    extension VARCHAR NOT NULL DEFAULT '',
+    size_bytes BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_referenced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS original_blob_key VARCHAR;
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS audio_blob_key VARCHAR;
+
+CREATE INDEX IF NOT EXISTS idx_sessions_original_blob_key ON sessions (original_blob_key);
+CREATE INDEX IF NOT EXISTS idx_sessions_audio_blob_key ON sessions (audio_blob_key);
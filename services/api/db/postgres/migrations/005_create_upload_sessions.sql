@@ -0,0 +1,32 @@
+-- Resumable multi-part uploads: create, PUT numbered parts (in any order,
+-- in parallel), complete. Parts are written in place into one
+-- preallocated file; a part is recorded only once it was fully received
+-- and matched its checksum, so an interrupted upload resumes from here.
+
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    title VARCHAR NOT NULL,
+    file_name VARCHAR NOT NULL,
+    file_type VARCHAR,
+    file_size_bytes BIGINT NOT NULL,
+    part_size BIGINT NOT NULL,
+    part_count INTEGER NOT NULL,
+    temp_path VARCHAR NOT NULL,
+    content_sha256 VARCHAR,
+    status VARCHAR NOT NULL,
+    session_id UUID,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS upload_parts (
+    upload_id UUID NOT NULL REFERENCES upload_sessions(id) ON DELETE CASCADE,
+    part_number INTEGER NOT NULL,
+    offset_bytes BIGINT NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    sha256 VARCHAR NOT NULL,
+    received_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (upload_id, part_number)
+);
+
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_status ON upload_sessions (status, updated_at);
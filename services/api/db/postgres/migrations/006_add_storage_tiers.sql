@@ -0,0 +1,14 @@
+-- Storage lifecycle tiering (core/lifecycle.py). Originals whose audio
+-- has been extracted move from the hot volume to a cheaper tier:
+--   hot       storage/blobs/ (default)
+--   archived  transcoded to compact audio-only Opus, next to the hot blobs
+--   cold      moved under COLD_STORAGE_DIR (location holds the path)
+--   deleted   file removed; the extracted WAV is kept
+
+ALTER TABLE storage_blobs ADD COLUMN IF NOT EXISTS tier VARCHAR NOT NULL DEFAULT 'hot';
+ALTER TABLE storage_blobs ADD COLUMN IF NOT EXISTS location VARCHAR;
+ALTER TABLE storage_blobs ADD COLUMN IF NOT EXISTS tiered_at TIMESTAMP;
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS original_storage_tier VARCHAR;
+
+CREATE INDEX IF NOT EXISTS idx_storage_blobs_lifecycle ON storage_blobs (kind, tier, last_referenced_at);
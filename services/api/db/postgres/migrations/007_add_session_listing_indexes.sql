@@ -0,0 +1,14 @@
+-- Keyset pagination for GET /sessions/: pages are ordered by
+-- (created_at, id) and continue from a cursor, so every page is an index
+-- range scan however deep it is. The status/session_type indexes serve
+-- the filtered listings in the same order.
+--
+-- CONCURRENTLY keeps the table writable while the indexes build; run
+-- this file with psql (autocommit), not inside a transaction.
+
+UPDATE sessions SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE sessions ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_created_at_id ON sessions (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_status_created_at_id ON sessions (status, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sessions_type_created_at_id ON sessions (session_type, created_at, id);
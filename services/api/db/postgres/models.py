@@ -1,12 +1,13 @@
 """
 SQLAlchemy models for PostgreSQL tables.
 
-Maps to the existing 'sessions' table.
+Maps to the existing 'sessions' table and the tables created by the SQL
+files in db/postgres/migrations/.
 Does NOT auto-generate or migrate the table schema.
 """
 
-from sqlalchemy import Column, String, Integer, TIMESTAMP, text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Text, TIMESTAMP, ForeignKey, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from db.postgres.database import Base
 
@@ -26,8 +27,11 @@ class Session(Base):
     - file_size_bytes: File size in bytes
     - file_type: MIME type of file
     - audio_duration_seconds: Duration of extracted audio
+    - audio_extraction_method: How the WAV was produced (migrations/003)
+    - original_blob_key / audio_blob_key: Content-addressed blobs the paths point at (migrations/004)
+    - original_storage_tier: Lifecycle tier of the original: hot, archived, cold or deleted (migrations/006)
     - status: Current state (e.g., "pending", "processing", "completed")
-    - created_at: Timestamp of creation
+    - created_at: Timestamp of creation; (created_at, id) is the listing order (migrations/007)
     """
     
     __tablename__ = "sessions"
@@ -42,8 +46,170 @@ class Session(Base):
     file_size_bytes = Column(Integer, nullable=True)
     file_type = Column(String, nullable=True)
     audio_duration_seconds = Column(Integer, nullable=True)
+    audio_extraction_method = Column(String, nullable=True)
+    original_blob_key = Column(String, nullable=True)
+    audio_blob_key = Column(String, nullable=True)
+    original_storage_tier = Column(String, nullable=True)
     status = Column(String, nullable=False)
-    created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
     
     def __repr__(self):
         return f"<Session(id={self.id}, title='{self.title}', status='{self.status}')>"
+
+
+class TranscriptionJob(Base):
+    """
+    SQLAlchemy model for the 'transcription_jobs' ledger table.
+    
+    One row per transcription run (see migrations/001_create_transcription_jobs.sql):
+    - session_id: Session that was transcribed (kept after the session is deleted)
+    - trigger: What started the run: "user" or "eager" (migrations/002)
+    - status: "running", "completed" or "failed"
+    - audio_duration_seconds / audio_bytes: Size of the input WAV
+    - chunk_count / segment_count: Provider chunks submitted, segments stored
+    - retries: Provider call retries across all chunks
+    - queued_at / started_at / finished_at: Lifecycle timestamps
+    - queue_wait_seconds / processing_seconds: Wait before work started, work wall time
+    - stage_seconds: Wall time per pipeline stage, e.g. {"probe": 0.1, "persist": 2.3}
+    - error: Failure message
+    """
+    
+    __tablename__ = "transcription_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    session_id = Column(UUID(as_uuid=True), nullable=False)
+    trigger = Column(String, nullable=False, server_default=text("'user'"))
+    status = Column(String, nullable=False)
+    audio_duration_seconds = Column(Float, nullable=True)
+    audio_bytes = Column(BigInteger, nullable=True)
+    chunk_count = Column(Integer, nullable=True)
+    segment_count = Column(Integer, nullable=True)
+    retries = Column(Integer, nullable=False, server_default=text("0"))
+    queued_at = Column(TIMESTAMP, nullable=False)
+    started_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+    queue_wait_seconds = Column(Float, nullable=True)
+    processing_seconds = Column(Float, nullable=True)
+    stage_seconds = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    error = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<TranscriptionJob(id={self.id}, session_id={self.session_id}, status='{self.status}')>"
+
+
+class TranscriptionJobChunk(Base):
+    """
+    SQLAlchemy model for the 'transcription_job_chunks' ledger table.
+    
+    One row per provider batch job within a transcription run:
+    - chunk_index / offset_seconds / duration_seconds: Position in the recording
+    - audio_bytes: Size of the chunk WAV
+    - provider_job_id: Sarvam batch job id
+    - stage_seconds: Wall time per stage (extract, create_job, upload, provider, download, transform)
+    """
+    
+    __tablename__ = "transcription_job_chunks"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    job_id = Column(UUID(as_uuid=True), ForeignKey("transcription_jobs.id", ondelete="CASCADE"), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    offset_seconds = Column(Float, nullable=False)
+    duration_seconds = Column(Float, nullable=True)
+    audio_bytes = Column(BigInteger, nullable=True)
+    provider_job_id = Column(String, nullable=True)
+    status = Column(String, nullable=False)
+    retries = Column(Integer, nullable=False, server_default=text("0"))
+    stage_seconds = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    error = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<TranscriptionJobChunk(job_id={self.job_id}, chunk_index={self.chunk_index}, status='{self.status}')>"
+
+
+class StorageBlob(Base):
+    """
+    SQLAlchemy model for the 'storage_blobs' table.
+    
+    One row per content-addressed file under storage/blobs/ (see
+    migrations/004_create_storage_blobs.sql):
+    - key: sha256 of an original upload, or "<sha256>.<recipe>" for audio derived from it
+    - kind: "original" or "audio"
+    - extension: File extension the blob is stored with
+    - size_bytes: File size
+    - ref_count: Number of sessions referencing the blob; the file is deleted at zero
+    - created_at / last_referenced_at: Lifecycle timestamps
+    - tier / location / tiered_at: Storage tier (migrations/006); location is
+      the file path when it is not the default blob path (cold tier)
+    """
+    
+    __tablename__ = "storage_blobs"
+    
+    key = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    extension = Column(String, nullable=False, server_default=text("''"))
+    size_bytes = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, server_default=text("0"))
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    last_referenced_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    tier = Column(String, nullable=False, server_default=text("'hot'"))
+    location = Column(String, nullable=True)
+    tiered_at = Column(TIMESTAMP, nullable=True)
+    
+    def __repr__(self):
+        return f"<StorageBlob(key='{self.key}', kind='{self.kind}', ref_count={self.ref_count})>"
+
+
+class UploadSession(Base):
+    """
+    SQLAlchemy model for the 'upload_sessions' table.
+    
+    One row per resumable multi-part upload (see
+    migrations/005_create_upload_sessions.sql):
+    - title / file_name / file_type: Become the session's fields on completion
+    - file_size_bytes / part_size / part_count: Layout; part N covers
+      bytes [(N-1) * part_size, N * part_size)
+    - temp_path: Preallocated file the parts are written into
+    - content_sha256: Optional whole-file hash to verify on completion
+    - status: "open", "completing", "completed" or "aborted"
+    - session_id: Session created on completion
+    """
+    
+    __tablename__ = "upload_sessions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    title = Column(String, nullable=False)
+    file_name = Column(String, nullable=False)
+    file_type = Column(String, nullable=True)
+    file_size_bytes = Column(BigInteger, nullable=False)
+    part_size = Column(BigInteger, nullable=False)
+    part_count = Column(Integer, nullable=False)
+    temp_path = Column(String, nullable=False)
+    content_sha256 = Column(String, nullable=True)
+    status = Column(String, nullable=False)
+    session_id = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, file_name='{self.file_name}', status='{self.status}')>"
+
+
+class UploadPart(Base):
+    """
+    SQLAlchemy model for the 'upload_parts' table.
+    
+    One row per part that was fully received and matched its checksum;
+    a resuming client re-sends only the parts missing here.
+    """
+    
+    __tablename__ = "upload_parts"
+    
+    upload_id = Column(UUID(as_uuid=True), ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    part_number = Column(Integer, primary_key=True)
+    offset_bytes = Column(BigInteger, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    sha256 = Column(String, nullable=False)
+    received_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    
+    def __repr__(self):
+        return f"<UploadPart(upload_id={self.upload_id}, part_number={self.part_number})>"
@@ -10,10 +10,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from core.config import settings
-from api.routes import sessions
+from api.routes import sessions, metrics
 from db.mongo.database import close_mongo_connection
 from core.storage import ensure_storage_directories
-from db.postgres.database import SessionLocal
+from core.processing import shutdown_process_pool
+from core.transcription_queue import transcription_queue
+from core.extraction import resume_pending_extractions
+from core.lifecycle import lifecycle_manager
+from core.db_metrics import RouteTaggingMiddleware
+from core.session_cache import invalidation_listener
+from db.postgres.database import SessionLocal, async_engine
 
 
 @asynccontextmanager
@@ -53,10 +59,30 @@ async def lifespan(app: FastAPI):
     # Initialize storage directories
     ensure_storage_directories()
     
+    # Hear about session changes made by other workers (if configured)
+    invalidation_listener.start()
+    
+    # Start transcription workers
+    await transcription_queue.start(settings.TRANSCRIPTION_WORKERS)
+    
+    # Pick up uploads whose audio extraction was interrupted by a restart
+    try:
+        resume_pending_extractions()
+    except Exception as e:
+        print(f"⚠️  Failed to resume pending extractions: {e}")
+    
+    # Move old originals to a cheaper storage tier (if enabled)
+    await lifecycle_manager.start()
+    
     yield
     
     # Shutdown
     print("🛑 Shutting down...")
+    await lifecycle_manager.stop()
+    await transcription_queue.stop()
+    invalidation_listener.stop()
+    shutdown_process_pool()
+    await async_engine.dispose()
     close_mongo_connection()
 
 
@@ -74,14 +100,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Session list pagination
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Tag database work with the route that issued it (GET /metrics/database)
+if settings.DB_METRICS_ENABLED:
+    app.add_middleware(RouteTaggingMiddleware)
+
 # Increase request timeout for large file uploads (2-4 hour videos)
 # Note: Uvicorn timeout is configured via command line, this is FastAPI-level config
 
 # Include routers
 app.include_router(sessions.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -0,0 +1,52 @@
+"""
+Cross-check PostgreSQL sessions, MongoDB transcriptions and storage/.
+
+Reports orphans by default; pass --apply to delete them (capped and
+paced, see core/reconcile.py). Safe to run while the API is serving.
+
+Usage:
+    python reconcile_storage.py
+    python reconcile_storage.py --apply --max-deletions 200 --rate 5
+    python reconcile_storage.py --output report.json
+"""
+
+import argparse
+import json
+import sys
+
+from core.reconcile import run_reconciliation
+import core.session_cache  # noqa: F401  (announces deleted sessions to API workers on SESSION_CACHE_NOTIFY_CHANNEL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find (and optionally delete) orphaned sessions, transcriptions and files")
+    parser.add_argument("--apply", action="store_true", help="Delete orphans and repair blob ref counts")
+    parser.add_argument("--grace-hours", type=int, help="Leave anything newer alone (default: RECONCILE_GRACE_HOURS)")
+    parser.add_argument("--batch-size", type=int, help="Rows/documents/files per query (default: RECONCILE_BATCH_SIZE)")
+    parser.add_argument("--max-deletions", type=int, help="Deletions per run (default: RECONCILE_MAX_DELETIONS)")
+    parser.add_argument("--rate", type=float, help="Deletions per second, 0 = unpaced (default: RECONCILE_DELETIONS_PER_SECOND)")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_reconciliation(
+        apply=args.apply,
+        grace_hours=args.grace_hours,
+        batch_size=args.batch_size,
+        max_deletions=args.max_deletions,
+        deletions_per_second=args.rate
+    )
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"✅ Report written to {args.output}")
+    else:
+        print(text)
+
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()